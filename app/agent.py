@@ -3,29 +3,40 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import logging
-import os
 import re
-from collections import deque
-
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from app import metrics
+from app.budget import BudgetScheduler, BudgetTracker
 from app.config import AppConfig
-from app.database import Database
+from app.database import NOTIFY_TASKS, Database
+from app.logbuffer import LogRecord, LogRingBuffer
 from app.models import (
     AgentState,
     AgentStatus,
-    LogEntry,
     LogLevel,
     PlanStatus,
     TaskPriority,
+    TaskRecord,
     TaskStatus,
     _now_iso,
 )
+from app.launcher import ClaudeLauncher
+from app.procs import CommandRunner
+from app.ratelimit import AdaptiveLimiter, RunSlot, Throttle, detect_throttle
+from app.reviews import ReviewCollector
+from app.scheduler import create_scheduler
+from app.timeline import PHASE, TaskTimeline, tool_detail
 
 logger = logging.getLogger(__name__)
 
+_SESSION_MISSING_RE = re.compile(r"no conversation found|session\b.{0,40}\bnot found", re.IGNORECASE)
+
 
 class AgentWorker:
     def __init__(self, config: AppConfig, db: Database) -> None:
@@ -37,17 +48,37 @@ class AgentWorker:
         self._tasks_completed = 0
         self._tasks_failed = 0
         self._loop_task: asyncio.Task | None = None
-        self._approval_event = asyncio.Event()
-        self._approved: bool = False
-        self._rejection_feedback: str = ""
-        self._logs: deque[LogEntry] = deque(maxlen=1000)
-        self._log_index = 0
+        self._review_events: dict[int, asyncio.Event] = {}  # plan task id → set once its review is applied
+        self._logs = LogRingBuffer(config.log_buffer_size)
         self._current_output: str = ""
         self._stop_requested = False
         self._proc: asyncio.subprocess.Process | None = None
         self._min_priority: int = 0  # 0=all, 1=Med+, 2=High+, 3=Urgent only
         self._epic_id: int | None = None  # None=all epics, N=specific epic
         self._exec_lock = asyncio.Lock()  # serialize task execution
+        self._work_event = asyncio.Event()  # set when tasks may have become pending
+        self._scheduler = create_scheduler(config)
+        self._budget = BudgetTracker.from_config(config)
+        self._budget_loaded = False
+        self._budget_paused_logged = False
+        if self._budget.enabled:
+            self._scheduler = BudgetScheduler(self._scheduler, self._budget)
+        self._run_task: TaskRecord | None = None  # task whose claude run is in flight (budget scope)
+        self._limiter = AdaptiveLimiter(
+            config.claude_max_concurrency,
+            cooldown_sec=config.rate_limit_cooldown_sec,
+            max_cooldown_sec=config.rate_limit_max_cooldown_sec,
+        )
+        self._throttled: dict[int, Throttle] = {}  # task id → limit signal from its last run
+        self._sessions: dict[int, str] = {}  # task id → claude session id reported by its last run
+        self._timelines: dict[int, TaskTimeline] = {}  # task id → spans of the attempt (or review) in progress
+        self.launcher = ClaudeLauncher.from_config(config)
+        self.procs = CommandRunner.from_config(config)  # gh/git: bounded spawns, cached reads
+        self._fetch_lock = asyncio.Lock()
+        self._fetched_at: float | None = None  # monotonic time of the last successful base fetch
+        self._base_ref = config.base_branch  # ref new branches start from (origin/<base> once fetched)
+        self.reviews = ReviewCollector.from_config(config, db, log=self._add_log, runner=self.procs)
+        db.add_listener(self._on_db_change)
 
     # ── Status ──
 
@@ -61,36 +92,60 @@ class AgentWorker:
             loop_running=self._loop_task is not None and not self._loop_task.done(),
         )
 
-    def get_logs(self, after_index: int = 0) -> list[LogEntry]:
-        return [e for e in self._logs if e.index >= after_index]
+    def get_logs(self, after_index: int = 0, task_id: int | None = None) -> list[LogRecord]:
+        return self._logs.since(after_index, task_id=task_id)
 
     def get_current_output(self) -> str:
         return self._current_output
 
+    def get_limiter(self) -> dict:
+        return self._limiter.stats()
+
+    def get_budget(self) -> dict:
+        return {
+            **self._budget.snapshot(),
+            "epic_usd": self._budget.epic_usd,
+            "target_usd": self._budget.target_usd,
+            "remaining_usd": self._budget.remaining(),
+        }
+
     # ── Logging ──
 
     def _add_log(self, level: LogLevel, message: str, task_id: int | None = None) -> None:
         ts = _now_iso()
-        entry = LogEntry(
-            index=self._log_index,
-            timestamp=ts,
-            level=level,
-            message=message,
-            task_id=task_id,
-        )
-        self._logs.append(entry)
-        self._log_index += 1
+        self._logs.append(ts, level, message, task_id)
         # Persist to DB (fire-and-forget)
         if task_id is not None:
             try:
-                asyncio.get_event_loop().create_task(
-                    self.db.insert_log(task_id, ts, level.value, message)
-                )
+                asyncio.get_event_loop().create_task(self._persist_log(task_id, ts, level, message, time.perf_counter()))
             except Exception:
                 pass  # never block on log persistence
 
+    async def _persist_log(self, task_id: int, ts: str, level: LogLevel, message: str, created: float) -> None:
+        await self.db.insert_log(task_id, ts, level.value, message)
+        metrics.LOG_FLUSH_LAG.observe(time.perf_counter() - created)
+
     # ── Loop Control ──
 
+    def _on_db_change(self, channel: str) -> None:
+        if channel == NOTIFY_TASKS:
+            self._work_event.set()
+
+    def _log_budget_pause(self) -> None:
+        if self._budget.enabled and self._budget.paused() and not self._budget_paused_logged:
+            self._budget_paused_logged = True
+            self._add_log(
+                LogLevel.SYSTEM,
+                f"Daily budget nearly spent (${self._budget.snapshot()['spent_usd']:.2f} of ${self._budget.daily_usd:.2f}) — dispatch paused until tomorrow (UTC)",
+            )
+
+    async def _wait_for_work(self) -> None:
+        """Sleep until a task change is committed, or poll_interval as a fallback."""
+        try:
+            await asyncio.wait_for(self._work_event.wait(), timeout=self.config.poll_interval)
+        except TimeoutError:
+            pass
+
     async def start_loop(self, min_priority: int = 0, epic_id: int | None = None) -> None:
         if self._loop_task and not self._loop_task.done():
             return
@@ -98,6 +153,9 @@ class AgentWorker:
         self._min_priority = min_priority
         self._epic_id = epic_id
         self._state = AgentState.IDLE
+        if self._budget.enabled and not self._budget_loaded:
+            await self._budget.load(self.db)
+            self._budget_loaded = True
         pri_label = {0:"All", 1:"Medium+", 2:"High+", 3:"Urgent"}
         epic_label = f", epic #{epic_id}" if epic_id else ""
         self._add_log(LogLevel.SYSTEM, f"Agent loop started (priority: {pri_label.get(min_priority, min_priority)}{epic_label})")
@@ -105,7 +163,8 @@ class AgentWorker:
 
     async def stop_loop(self) -> None:
         self._stop_requested = True
-        self._approval_event.set()  # unblock if waiting
+        for reviewed in self._review_events.values():
+            reviewed.set()  # unblock plans waiting on a review
         # Kill running claude process
         if self._proc and self._proc.returncode is None:
             try:
@@ -127,21 +186,84 @@ class AgentWorker:
 
     # ── Approval ──
 
-    def approve(self) -> bool:
-        if self._state != AgentState.WAITING_APPROVAL:
-            return False
-        self._approved = True
-        self._approval_event.set()
-        return True
+    async def approve(self, task_id: int | None = None) -> bool:
+        """Approve a task awaiting review (default: the oldest); merge + done run in the background."""
+        return await self._decide(task_id, approved=True)
+
+    async def reject(self, task_id: int | None = None, feedback: str = "") -> bool:
+        """Reject a task awaiting review (default: the oldest); it goes back to pending with the feedback."""
+        return await self._decide(task_id, approved=False, feedback=feedback)
 
-    def reject(self, feedback: str = "") -> bool:
-        if self._state != AgentState.WAITING_APPROVAL:
+    async def _decide(self, task_id: int | None, *, approved: bool, feedback: str = "") -> bool:
+        if task_id is None:
+            waiting = [t for t in await self.db.list_tasks(status=TaskStatus.WAITING_APPROVAL) if not t.approval_status]
+            if not waiting:
+                return False
+            task_id = min(waiting, key=lambda t: t.updated_at).id
+        task = await self.db.decide_approval(task_id, approved)
+        if task is None:
             return False
-        self._approved = False
-        self._rejection_feedback = feedback
-        self._approval_event.set()
+        bg = asyncio.create_task(self._apply_review(task, approved, feedback))
+        bg.add_done_callback(self._on_bg_task_done)
         return True
 
+    async def _apply_review(self, task: TaskRecord, approved: bool, feedback: str) -> None:
+        """Post-review steps; takes the exec lock only for git work, which switches branches in the worktree."""
+        git_ref = task.pr_url if approved else task.branch_name
+        lock = self._exec_lock if self.config.gitflow and git_ref else contextlib.nullcontext()
+        timeline = self._timelines[task.id] = TaskTimeline(task.id)
+        try:
+            await self._record_approval_wait(timeline)
+            async with lock:
+                if approved:
+                    self._tasks_completed += 1
+                    metrics.TASKS_FINISHED.inc(outcome="done")
+                    if self.config.gitflow and task.pr_url:
+                        merged = await self._merge_pr(task.pr_url, task.id)
+                        if not merged:
+                            self._add_log(LogLevel.ERROR, "PR merge failed — resolve conflicts manually", task.id)
+                    await self.db.set_task_done(task.id)
+                    self._add_log(LogLevel.SYSTEM, f"Task #{task.id} approved", task.id)
+                else:
+                    self._tasks_failed += 1
+                    metrics.TASKS_FINISHED.inc(outcome="rejected")
+                    await self.db.set_task_rejected(task.id, feedback)
+                    self._add_log(LogLevel.SYSTEM, f"Task #{task.id} rejected: {feedback}", task.id)
+                    if self.config.gitflow and task.branch_name:
+                        await self._cleanup_branch(task.branch_name, task.id)
+        finally:
+            self._timelines.pop(task.id, None)
+            await self._save_timeline(timeline, new_attempt=False)
+            reviewed = self._review_events.get(task.id)
+            if reviewed is not None:
+                reviewed.set()
+
+    async def _record_approval_wait(self, timeline: TaskTimeline) -> None:
+        """Span from the end of the reviewed attempt to this decision."""
+        spans = await self.db.get_task_spans(timeline.task_id)
+        if not spans:
+            return
+        attempt = spans[-1].attempt
+        ended = max(
+            datetime.fromisoformat(s.started_at) + timedelta(milliseconds=s.duration_ms) for s in spans if s.attempt == attempt
+        )
+        waited = (datetime.now(timezone.utc) - ended).total_seconds()
+        timeline.add(PHASE, "approval_wait", max(waited, 0.0), started_at=ended.isoformat())
+
+    # ── Timeline ──
+
+    def _phase(self, task_id: int | None, name: str, detail: str = ""):
+        """Context manager timing one phase into the task's timeline (no-op outside a task)."""
+        timeline = self._timelines.get(task_id) if task_id is not None else None
+        return timeline.phase(name, detail) if timeline else contextlib.nullcontext()
+
+    async def _save_timeline(self, timeline: TaskTimeline, *, new_attempt: bool = True) -> None:
+        timeline.tools_finished()
+        try:
+            await self.db.add_task_spans(timeline.task_id, timeline.spans, new_attempt=new_attempt)
+        except Exception:
+            logger.warning("Failed to save timeline for task #%d", timeline.task_id, exc_info=True)
+
     # ── Run Single Task ──
 
     async def run_task(self, task_id: int) -> bool:
@@ -154,8 +276,7 @@ class AgentWorker:
         if task.status not in (TaskStatus.PENDING, TaskStatus.FAILED):
             return False
         cwd = task.target or None
-        async with self._exec_lock:
-            await self._execute_task(task_id, task.title, task.description, cwd_override=cwd)
+        await self._run_task_with_lock(task_id, task.title, task.description, cwd_override=cwd)
         return True
 
     async def schedule_task(self, task_id: int) -> bool:
@@ -173,8 +294,16 @@ class AgentWorker:
         return True
 
     async def _run_task_with_lock(self, task_id: int, title: str, description: str, *, cwd_override: str | None = None) -> None:
+        """Run a task to completion, waiting out retry backoffs without holding the exec lock."""
         async with self._exec_lock:
-            await self._execute_task(task_id, title, description, cwd_override=cwd_override)
+            retry_in = await self._execute_task(task_id, title, description, cwd_override=cwd_override)
+        while retry_in is not None and not self._stop_requested:
+            await asyncio.sleep(retry_in)
+            async with self._exec_lock:
+                # The loop (or another node) may have picked the retry up meanwhile
+                if self._stop_requested or await self.db.claim_task(task_id) is None:
+                    return
+                retry_in = await self._execute_task(task_id, title, description, cwd_override=cwd_override)
 
     def _on_bg_task_done(self, task: asyncio.Task) -> None:
         if task.cancelled():
@@ -188,11 +317,22 @@ class AgentWorker:
     async def _run_loop(self) -> None:
         try:
             while not self._stop_requested:
-                task = await self.db.pick_next_pending(min_priority=self._min_priority, epic_id=self._epic_id)
+                pause = self._limiter.paused_for()
+                if pause > 0:
+                    # Claude is rate-limited/overloaded: claiming now would only burn the task
+                    self._state = AgentState.IDLE
+                    await asyncio.sleep(pause)
+                    continue
+                # Clear before claiming so a task committed meanwhile still wakes us
+                self._work_event.clear()
+                # Claim atomically so other nodes sharing the database skip this task
+                task = await self._scheduler.claim(self.db, min_priority=self._min_priority, epic_id=self._epic_id)
                 if not task:
                     self._state = AgentState.IDLE
-                    await asyncio.sleep(self.config.poll_interval)
+                    self._log_budget_pause()
+                    await self._wait_for_work()
                     continue
+                self._budget_paused_logged = False
                 cwd = task.target or None
                 async with self._exec_lock:
                     await self._execute_task(task.id, task.title, task.description, cwd_override=cwd)
@@ -212,7 +352,32 @@ class AgentWorker:
         cwd_override: str | None = None,
         context_files_override: list[str] | None = None,
         prior_outputs: list[tuple[str, str]] | None = None,
-    ) -> None:
+    ) -> float | None:
+        """Run one attempt of a task; returns the backoff in seconds when it was requeued for a retry."""
+        timeline = self._timelines[task_id] = TaskTimeline(task_id)
+        started = time.perf_counter()
+        try:
+            return await self._attempt_task(
+                task_id, title, description,
+                cwd_override=cwd_override,
+                context_files_override=context_files_override,
+                prior_outputs=prior_outputs,
+            )
+        finally:
+            metrics.TASK_DURATION.observe(time.perf_counter() - started)
+            self._timelines.pop(task_id, None)
+            await self._save_timeline(timeline)
+
+    async def _attempt_task(
+        self,
+        task_id: int,
+        title: str,
+        description: str,
+        *,
+        cwd_override: str | None,
+        context_files_override: list[str] | None,
+        prior_outputs: list[tuple[str, str]] | None,
+    ) -> float | None:
         self._current_task_id = task_id
         self._current_task_title = title
         self._current_output = ""
@@ -223,31 +388,55 @@ class AgentWorker:
 
         # ── Gitflow: create feature branch ──
         if self.config.gitflow:
-            branch_name = await self._create_branch(task_id, title) or ""
+            with self._phase(task_id, "branch"):
+                branch_name = await self._create_branch(task_id, title) or ""
             if not branch_name:
                 self._tasks_failed += 1
+                metrics.TASKS_FINISHED.inc(outcome="failed")
                 await self.db.set_task_failed(task_id, "Failed to create feature branch")
                 self._state = AgentState.IDLE
                 self._current_task_id = None
                 self._current_task_title = None
                 return
 
+        task = await self.db.get_task(task_id)  # read before start: it still holds the last attempt's error
         await self.db.set_task_started(task_id, branch_name=branch_name)
+        if task and task.retry_count == 0 and not task.approval_status and not task.session_id:
+            queued = datetime.now(timezone.utc) - datetime.fromisoformat(task.created_at)
+            metrics.TASK_QUEUE_WAIT.observe(max(0.0, queued.total_seconds()))
+        if self._budget.enabled:
+            self._run_task = task
         self._add_log(LogLevel.SYSTEM, f"Starting task #{task_id}: {title}", task_id)
         logger.info("Starting task #%d: %s", task_id, title)
 
         try:
-            prompt = self._build_prompt(
-                title,
-                description,
-                context_dir=cwd_override,
-                context_files=context_files_override,
-                prior_outputs=prior_outputs,
-            )
-            exit_code, output, cost = await self._run_claude(prompt, task_id, cwd=cwd_override)
+            delta = self._resume_prompt(task) if task else None
+            if delta is not None:
+                self._add_log(LogLevel.SYSTEM, f"Resuming session {task.session_id[:8]} with {len(delta)} chars of follow-up", task_id)
+                with self._phase(task_id, "claude", "resume"):
+                    exit_code, output, cost = await self._run_claude(delta, task_id, cwd=cwd_override, resume=task.session_id)
+                if exit_code != 0 and _SESSION_MISSING_RE.search(output):
+                    self._add_log(LogLevel.SYSTEM, "Session no longer available — starting a fresh one", task_id)
+                    delta = None
+            if delta is None:
+                with self._phase(task_id, "prompt"):
+                    prompt = self._build_prompt(
+                        title,
+                        description,
+                        context_dir=cwd_override,
+                        context_files=context_files_override,
+                        prior_outputs=prior_outputs,
+                        feedback=task.rejection_feedback if task and task.approval_status == "rejected" else "",
+                    )
+                with self._phase(task_id, "claude"):
+                    exit_code, output, cost = await self._run_claude(prompt, task_id, cwd=cwd_override)
+            session_id = self._sessions.pop(task_id, "")
+            if session_id:
+                await self.db.set_task_session(task_id, session_id)
         except Exception as exc:
             logger.exception("Unexpected error running task #%d", task_id)
             self._tasks_failed += 1
+            metrics.TASKS_FINISHED.inc(outcome="failed")
             await self.db.set_task_failed(task_id, str(exc)[:2000])
             self._add_log(LogLevel.ERROR, f"Task #{task_id} crashed: {exc}", task_id)
             if self.config.gitflow and branch_name:
@@ -263,6 +452,24 @@ class AgentWorker:
         if self._stop_requested:
             return
 
+        throttle = self._throttled.pop(task_id, None)
+        if exit_code != 0 and throttle is not None:
+            # Provider limit, not a task fault: back to the queue without spending a retry
+            self._add_log(
+                LogLevel.SYSTEM,
+                f"Task #{task_id} hit a Claude {throttle.signal.value.replace('_', ' ')} signal — "
+                f"requeued, launches paused for {self._limiter.paused_for():.0f}s",
+                task_id,
+            )
+            if self.config.gitflow and branch_name:
+                await self._cleanup_branch(branch_name, task_id)
+            await self.db.requeue_task(task_id)
+            metrics.TASKS_FINISHED.inc(outcome="throttled")
+            self._state = AgentState.IDLE
+            self._current_task_id = None
+            self._current_task_title = None
+            return
+
         if exit_code != 0:
             # ── Auto-retry logic ──
             task = await self.db.get_task(task_id)
@@ -277,19 +484,21 @@ class AgentWorker:
                 )
                 if self.config.gitflow and branch_name:
                     await self._cleanup_branch(branch_name, task_id)
-                await asyncio.sleep(backoff)
-                if not self._stop_requested:
-                    await self._execute_task(
-                        task_id, title, description,
-                        cwd_override=cwd_override,
-                        context_files_override=context_files_override,
-                        prior_outputs=prior_outputs,
-                    )
-                return
+                # Back to the queue with a not_before stamp: the exec lock is free for other work meanwhile
+                not_before = (datetime.now(timezone.utc) + timedelta(seconds=backoff)).isoformat()
+                # The error tail is what a resumed session gets told about this attempt
+                await self.db.requeue_task(task_id, not_before=not_before, error=output[-2000:] if output else "Process failed")
+                asyncio.get_running_loop().call_later(backoff, self._work_event.set)
+                metrics.TASKS_FINISHED.inc(outcome="retried")
+                self._state = AgentState.IDLE
+                self._current_task_id = None
+                self._current_task_title = None
+                return backoff
 
             self._state = AgentState.IDLE
             self._tasks_failed += 1
-            await self.db.set_task_failed(task_id, output[-2000:] if output else "Process failed")
+            metrics.TASKS_FINISHED.inc(outcome="failed")
+            await self.db.set_task_failed(task_id, output[-2000:] if output else "Process failed", cost)
             self._add_log(
                 LogLevel.ERROR,
                 f"Task #{task_id} failed (exit={exit_code}) after {current_retries} retries",
@@ -304,15 +513,19 @@ class AgentWorker:
         # ── Gitflow: commit + push + create PR ──
         pr_url = ""
         if self.config.gitflow and branch_name:
-            await self._git("add", "-A", task_id=task_id)
-            rc, diff_stat = await self._git("diff", "--cached", "--stat", task_id=task_id)
+            with self._phase(task_id, "commit"):
+                await self._git("add", "-A", task_id=task_id)
+                rc, diff_stat = await self._git("diff", "--cached", "--stat", task_id=task_id)
+                if diff_stat:
+                    await self._git("commit", "-m", f"[Task #{task_id}] {title}", task_id=task_id)
             if diff_stat:
-                await self._git("commit", "-m", f"[Task #{task_id}] {title}", task_id=task_id)
-                await self._git("push", "-u", "origin", branch_name, task_id=task_id)
-                pr_url = await self._create_pr(
-                    task_id, title, branch_name,
-                    description=description, diff_stat=diff_stat, cost=cost,
-                ) or ""
+                with self._phase(task_id, "push"):
+                    await self._git("push", "-u", "origin", branch_name, task_id=task_id)
+                with self._phase(task_id, "pr"):
+                    pr_url = await self._create_pr(
+                        task_id, title, branch_name,
+                        description=description, diff_stat=diff_stat, cost=cost,
+                    ) or ""
                 if pr_url:
                     await self.db.set_task_pr(task_id, pr_url)
             else:
@@ -321,43 +534,20 @@ class AgentWorker:
         # Approval gate
         if self.config.auto_approve:
             self._tasks_completed += 1
+            metrics.TASKS_FINISHED.inc(outcome="done")
             # Gitflow: wait for code review, address comments, then merge
             if self.config.gitflow and pr_url and self.config.auto_merge:
                 await self._merge_pr(pr_url, task_id)
                 # 백그라운드에서 리뷰 수집 → 개선 백로그 태스크 생성
-                self._schedule_review_followup(pr_url, task_id, title)
-            await self.db.set_task_done(task_id)
+                await self.reviews.watch(pr_url, task_id, title)
+            await self.db.set_task_done(task_id, cost)
             self._add_log(LogLevel.SYSTEM, f"Task #{task_id} completed (auto-approved)", task_id)
         else:
-            self._state = AgentState.WAITING_APPROVAL
+            # Review is persisted per task: the worker moves on, approve()/reject() finish it later
             await self.db.set_task_waiting(task_id, output[-5000:] if output else "", exit_code, cost)
+            metrics.TASKS_FINISHED.inc(outcome="waiting_approval")
             self._add_log(LogLevel.SYSTEM, f"Task #{task_id} waiting for approval", task_id)
 
-            self._approval_event.clear()
-            self._approved = False
-            self._rejection_feedback = ""
-            await self._approval_event.wait()
-
-            if self._stop_requested:
-                return
-
-            if self._approved:
-                self._tasks_completed += 1
-                # Gitflow: merge PR on approval
-                if self.config.gitflow and pr_url:
-                    merged = await self._merge_pr(pr_url, task_id)
-                    if not merged:
-                        self._add_log(LogLevel.ERROR, "PR merge failed — resolve conflicts manually", task_id)
-                await self.db.set_task_done(task_id)
-                self._add_log(LogLevel.SYSTEM, f"Task #{task_id} approved", task_id)
-            else:
-                self._tasks_failed += 1
-                await self.db.set_task_rejected(task_id, self._rejection_feedback)
-                self._add_log(LogLevel.SYSTEM, f"Task #{task_id} rejected: {self._rejection_feedback}", task_id)
-                # Gitflow: cleanup branch on rejection
-                if self.config.gitflow and branch_name:
-                    await self._cleanup_branch(branch_name, task_id)
-
         self._state = AgentState.IDLE
         self._current_task_id = None
         self._current_task_title = None
@@ -366,18 +556,11 @@ class AgentWorker:
 
     async def _git(self, *args: str, task_id: int | None = None, cwd: str | None = None) -> tuple[int, str]:
         """Run git command in target_project directory."""
-        run_cwd = cwd or self.config.target_project
-        proc = await asyncio.create_subprocess_exec(
-            "git", *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            cwd=run_cwd,
-        )
-        stdout, _ = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace").strip()
-        if proc.returncode != 0 and task_id:
+        result = await self.procs.run("git", *args, cwd=cwd or self.config.target_project, merge_stderr=True)
+        output = result.stdout or result.stderr
+        if not result.ok and task_id:
             self._add_log(LogLevel.ERROR, f"git {args[0]} failed: {output}", task_id)
-        return proc.returncode, output
+        return result.returncode, output
 
     def _slugify(self, title: str) -> str:
         """Convert task title to branch-safe slug."""
@@ -385,25 +568,41 @@ class AgentWorker:
         slug = re.sub(r"-+", "-", slug)
         return slug[:40].rstrip("-")
 
-    async def _create_branch(self, task_id: int, title: str) -> str | None:
-        """Checkout base branch, pull, create feature branch. Returns branch name or None on failure."""
+    async def _fetch_base(self, task_id: int) -> str:
+        """Fetch the base branch at most once per git_fetch_interval_sec; returns the ref to branch from."""
         base = self.config.base_branch
+        async with self._fetch_lock:
+            now = time.monotonic()
+            if self._fetched_at is None or now - self._fetched_at >= self.config.git_fetch_interval_sec:
+                rc, _ = await self._git("fetch", "origin", base, task_id=task_id)
+                if rc == 0:
+                    self._fetched_at = now
+                    self._base_ref = f"origin/{base}"
+                elif self._fetched_at is None:
+                    self._base_ref = base  # no remote yet: branch from the local base
+        return self._base_ref
+
+    async def _create_branch(self, task_id: int, title: str) -> str | None:
+        """Create the feature branch straight from the fetched base. Returns branch name or None on failure."""
         prefix = self.config.branch_prefix
         slug = self._slugify(title)
         branch = f"{prefix}/task-{task_id}-{slug}"
 
-        # Checkout base and pull latest
-        rc, _ = await self._git("checkout", base, task_id=task_id)
-        if rc != 0:
-            return None
-        await self._git("pull", "--ff-only", task_id=task_id)
-
-        # Create and checkout feature branch
-        rc, _ = await self._git("checkout", "-b", branch, task_id=task_id)
+        # One switch from the current tree: only files that differ from base are rewritten
+        started = time.perf_counter()
+        with self._phase(task_id, "fetch"):
+            base_ref = await self._fetch_base(task_id)
+        fetched = time.perf_counter()
+        rc, _ = await self._git("switch", "-c", branch, base_ref, task_id=task_id)
         if rc != 0:
             return None
+        switched = time.perf_counter()
 
-        self._add_log(LogLevel.SYSTEM, f"Created branch: {branch}", task_id)
+        self._add_log(
+            LogLevel.SYSTEM,
+            f"Created branch: {branch} from {base_ref} (fetch {fetched - started:.2f}s, switch {switched - fetched:.2f}s)",
+            task_id,
+        )
         return branch
 
     async def _build_pr_body(
@@ -470,19 +669,17 @@ class AgentWorker:
             task_id, branch,
             description=description, diff_stat=diff_stat, cost=cost,
         )
-        proc = await asyncio.create_subprocess_exec(
+        result = await self.procs.run(
             "gh", "pr", "create",
             "--title", f"[Task #{task_id}] {title}",
             "--body", body,
             "--base", self.config.base_branch,
             "--head", branch,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
             cwd=self.config.target_project,
+            merge_stderr=True,
         )
-        stdout, _ = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace").strip()
-        if proc.returncode != 0:
+        output = result.stdout or result.stderr
+        if not result.ok:
             self._add_log(LogLevel.ERROR, f"gh pr create failed: {output}", task_id)
             return None
         # gh pr create outputs the PR URL
@@ -490,183 +687,28 @@ class AgentWorker:
         self._add_log(LogLevel.SYSTEM, f"PR created: {pr_url}", task_id)
         return pr_url
 
-    def _schedule_review_followup(self, pr_url: str, task_id: int, title: str) -> None:
-        """Fire-and-forget: poll for review comments after merge and create backlog task."""
-        asyncio.create_task(self._poll_and_create_review_task(pr_url, task_id, title))
-
-    async def _poll_and_create_review_task(self, pr_url: str, task_id: int, title: str) -> None:
-        """Background: collect review comments and create a backlog task if actionable."""
-        pr_number = pr_url.rstrip("/").split("/")[-1]
-        initial_wait = 180  # 3 min — give CodeRabbit time to post
-        poll_interval = 30
-        max_poll = 420  # 7 min additional polling (total ~10 min)
-
-        self._add_log(LogLevel.SYSTEM, f"Background review polling for PR #{pr_number} (initial wait {initial_wait}s)", task_id)
-
-        try:
-            await asyncio.sleep(initial_wait)
-
-            review_comments: list[str] = []
-            elapsed = 0
-            while elapsed < max_poll:
-                inline = await self._get_inline_review_comments(pr_number, task_id)
-                review_body = await self._get_review_body_comments(pr_number, task_id)
-                comments = inline + review_body
-
-                if comments:
-                    # Wait extra 30s for late-arriving comments then re-fetch
-                    await asyncio.sleep(30)
-                    inline2 = await self._get_inline_review_comments(pr_number, task_id)
-                    review_body2 = await self._get_review_body_comments(pr_number, task_id)
-                    review_comments = inline2 + review_body2
-                    self._add_log(
-                        LogLevel.SYSTEM,
-                        f"Review poll: found {len(review_comments)} actionable comment(s) for PR #{pr_number}",
-                        task_id,
-                    )
-                    break
-
-                await asyncio.sleep(poll_interval)
-                elapsed += poll_interval
-
-            if not review_comments:
-                self._add_log(LogLevel.SYSTEM, f"No actionable review comments for PR #{pr_number}", task_id)
-                return
-
-            # Look up original task's epic_id
-            original_task = await self.db.get_task(task_id)
-            epic_id = original_task.epic_id if original_task else None
-
-            # Build description with review comments
-            comments_md = "\n\n".join(f"- {c}" for c in review_comments)
-            description = (
-                f"Code review comments from PR: {pr_url}\n\n"
-                f"## Review Comments\n\n{comments_md}"
-            )
-
-            from app.models import TaskCreate as _TC
-            new_task = await self.db.create_task(_TC(
-                title=f"[Review] {title}",
-                description=description,
-                priority=TaskPriority.LOW,
-                labels=["review"],
-                epic_id=epic_id,
-            ))
-            self._add_log(
-                LogLevel.SYSTEM,
-                f"Created review backlog task #{new_task.id} for PR #{pr_number} ({len(review_comments)} comments)",
-                task_id,
-            )
-
-        except Exception as exc:
-            logger.error("Review followup failed for PR %s: %s", pr_url, exc)
-
-    # Patterns to skip: walkthrough summaries, processing messages, tips
-    _SKIP_PATTERNS = [
-        "walkthrough",
-        "processing",
-        "in progress",
-        "<!-- tips_start",
-        "Thank you for using CodeRabbit",
-        "📝 Walkthrough",
-    ]
-
-    async def _get_inline_review_comments(self, pr_number: str, task_id: int) -> list[str]:
-        """Fetch inline (file-level) review comments — these are the actionable ones."""
-        proc = await asyncio.create_subprocess_exec(
-            "gh", "api", f"repos/:owner/:repo/pulls/{pr_number}/comments",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=self.config.target_project,
-        )
-        stdout, stderr = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace").strip()
-        if proc.returncode != 0:
-            err = stderr.decode("utf-8", errors="replace").strip()
-            self._add_log(LogLevel.ERROR, f"gh api pulls/comments failed (rc={proc.returncode}): {err[:200]}", task_id)
-            return []
-
-        try:
-            data = json.loads(output)
-        except json.JSONDecodeError:
-            self._add_log(LogLevel.ERROR, f"gh api pulls/comments JSON parse failed: {output[:200]}", task_id)
-            return []
-
-        comments: list[str] = []
-        for c in data:
-            body = c.get("body", "")
-            author = c.get("user", {}).get("login", "")
-            path = c.get("path", "")
-            if not body or not body.strip():
-                continue
-            # Skip non-actionable patterns
-            if any(pat.lower() in body.lower() for pat in self._SKIP_PATTERNS):
-                continue
-            comments.append(f"[{author} on {path}]: {body}")
-
-        return comments
-
-    async def _get_review_body_comments(self, pr_number: str, task_id: int) -> list[str]:
-        """Fetch review-level comments (the summary posted with 'Actionable comments posted: N')."""
-        proc = await asyncio.create_subprocess_exec(
-            "gh", "pr", "view", pr_number, "--json", "reviews",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=self.config.target_project,
-        )
-        stdout, stderr = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace").strip()
-        if proc.returncode != 0:
-            err = stderr.decode("utf-8", errors="replace").strip()
-            self._add_log(LogLevel.ERROR, f"gh pr view reviews failed (rc={proc.returncode}): {err[:200]}", task_id)
-            return []
-
-        try:
-            data = json.loads(output)
-        except json.JSONDecodeError:
-            self._add_log(LogLevel.ERROR, f"gh pr view reviews JSON parse failed: {output[:200]}", task_id)
-            return []
-
-        comments: list[str] = []
-        for r in data.get("reviews", []):
-            body = r.get("body", "")
-            author = r.get("author", {}).get("login", "")
-            if not body or not body.strip():
-                continue
-            # Only include reviews with actionable content
-            body_lower = body.lower()
-            if "actionable comments posted: 0" in body_lower:
-                continue
-            if any(pat.lower() in body_lower for pat in self._SKIP_PATTERNS):
-                continue
-            # Any non-empty review body that passed skip/zero-actionable filters is worth processing
-            comments.append(f"[{author} review]: {body}")
-
-        return comments
-
     async def _merge_pr(self, pr_url: str, task_id: int) -> bool:
         """Merge PR via gh CLI."""
-        proc = await asyncio.create_subprocess_exec(
-            "gh", "pr", "merge", pr_url, "--merge", "--delete-branch",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            cwd=self.config.target_project,
-        )
-        stdout, _ = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace").strip()
-        if proc.returncode != 0:
+        with self._phase(task_id, "merge"):
+            result = await self.procs.run(
+                "gh", "pr", "merge", pr_url, "--merge", "--delete-branch",
+                cwd=self.config.target_project,
+                merge_stderr=True,
+            )
+        output = result.stdout or result.stderr
+        if not result.ok:
             self._add_log(LogLevel.ERROR, f"gh pr merge failed: {output}", task_id)
             return False
         self._add_log(LogLevel.SYSTEM, f"PR merged: {pr_url}", task_id)
-        # Return to base branch
-        await self._git("checkout", self.config.base_branch, task_id=task_id)
-        await self._git("pull", "--ff-only", task_id=task_id)
+        # Base moved: the next branch fetches it again instead of switching back and pulling here
+        self._fetched_at = None
         return True
 
     async def _cleanup_branch(self, branch: str, task_id: int) -> None:
-        """Return to base branch on failure."""
-        await self._git("checkout", self.config.base_branch, task_id=task_id)
-        await self._git("branch", "-D", branch, task_id=task_id)
+        """Reset the worktree to the commit the failed branch started from, then delete the branch."""
+        with self._phase(task_id, "cleanup"):
+            await self._git("switch", "--discard-changes", "--detach", self._base_ref, task_id=task_id)
+            await self._git("branch", "-D", branch, task_id=task_id)
 
     # ── Plan Decomposition + Execution ──
 
@@ -742,15 +784,19 @@ class AgentWorker:
             await self.db.set_plan_status(plan_id, PlanStatus.DRAFT)
             return False
 
-        # Create tasks in DB (inherit epic_id from plan)
-        for order, td in enumerate(tasks_data):
-            title = td.get("title", f"Task {order + 1}")
-            desc = td.get("description", "")
-            target = td.get("target", "")
-            await self.db.create_plan_task(plan_id, title, desc, target, order, epic_id=plan.epic_id)
+        # Create tasks and move the plan to review in one transaction (inherit epic_id from plan)
+        async with self.db.transaction():
+            await self.db.create_plan_tasks(
+                plan_id,
+                [
+                    (td.get("title", f"Task {order + 1}"), td.get("description", ""), td.get("target", ""))
+                    for order, td in enumerate(tasks_data)
+                ],
+                epic_id=plan.epic_id,
+            )
+            await self.db.set_plan_status(plan_id, PlanStatus.REVIEWING)
 
         self._add_log(LogLevel.SYSTEM, f"Plan #{plan_id} decomposed into {len(tasks_data)} tasks")
-        await self.db.set_plan_status(plan_id, PlanStatus.REVIEWING)
         return True
 
     def _parse_json_from_output(self, output: str) -> list[dict] | None:
@@ -838,7 +884,7 @@ class AgentWorker:
             )
 
             async with self._exec_lock:
-                await self._execute_task(
+                retry_in = await self._execute_task(
                     task.id,
                     task.title,
                     task.description,
@@ -846,9 +892,18 @@ class AgentWorker:
                     context_files_override=ctx_files,
                     prior_outputs=prior_outputs if prior_outputs else None,
                 )
+            if retry_in is not None:
+                # Plan tasks run in order: wait out the backoff (lock released), then pick it again
+                await asyncio.sleep(retry_in)
+                continue
 
-            # Check result
+            # Check result; later tasks build on this one, so wait out its review (lock released)
+            reviewed = self._review_events.setdefault(task.id, asyncio.Event())
             completed_task = await self.db.get_task(task.id)
+            if completed_task and completed_task.status == TaskStatus.WAITING_APPROVAL and not self._stop_requested:
+                await reviewed.wait()
+                completed_task = await self.db.get_task(task.id)
+            self._review_events.pop(task.id, None)
             if not completed_task or completed_task.status == TaskStatus.FAILED:
                 self._add_log(LogLevel.ERROR, f"Plan #{plan_id} failed at task #{task.id}")
                 await self.db.set_plan_status(plan_id, PlanStatus.FAILED)
@@ -876,13 +931,15 @@ class AgentWorker:
         context_dir: str | None = None,
         context_files: list[str] | None = None,
         prior_outputs: list[tuple[str, str]] | None = None,
+        feedback: str = "",
     ) -> str:
         parts: list[str] = []
 
         # Inject project context files
         ctx_dir = context_dir or self.config.target_project
         ctx_files = context_files if context_files is not None else self.config.context_files
-        context = self._load_context_files(base_dir=ctx_dir, files=ctx_files)
+        with self._phase(self._current_task_id, "context"):
+            context = self._load_context_files(base_dir=ctx_dir, files=ctx_files)
         if context:
             parts.append(context)
 
@@ -897,8 +954,34 @@ class AgentWorker:
         parts.append(title)
         if description:
             parts.append(description)
+        if feedback:
+            parts.append(f"[Review Feedback]\nA previous attempt was rejected in review:\n{feedback}\n[/Review Feedback]")
         return "\n\n".join(parts)
 
+    def _resume_prompt(self, task: TaskRecord) -> str | None:
+        """Follow-up for the task's previous claude session, or None to start a fresh one.
+
+        Only the delta is sent: the failed attempt's error tail on a retry, or
+        the reviewer's feedback after a rejection.
+        """
+        if not self.config.claude_resume or not task.session_id:
+            return None
+        if task.error and task.retry_count > 0:
+            delta = (
+                f"Your previous attempt at this task failed. The end of its output was:\n\n{task.error[-2000:]}\n\n"
+                "Find the cause, fix it, and finish the task."
+            )
+        elif task.approval_status == "rejected" and task.rejection_feedback:
+            delta = (
+                f"Your previous attempt at this task was rejected in review with this feedback:\n\n{task.rejection_feedback}\n\n"
+                "Address the feedback and finish the task."
+            )
+        else:
+            return None
+        if self.config.gitflow:
+            delta += f"\n\nNote: your earlier changes were discarded; the working tree starts again from {self.config.base_branch}."
+        return delta
+
     def _load_context_files(
         self, *, base_dir: str = "", files: list[str] | None = None
     ) -> str:
@@ -945,13 +1028,47 @@ class AgentWorker:
 
         return f"[Project Context]\n{combined}\n[/Project Context]"
 
-    async def _run_claude(self, prompt: str, task_id: int, *, cwd: str | None = None) -> tuple[int, str, float | None]:
+    async def _run_claude(
+        self, prompt: str, task_id: int, *, cwd: str | None = None, resume: str | None = None
+    ) -> tuple[int, str, float | None]:
+        """Run claude -p under the adaptive limiter (waits out rate-limit pauses and the concurrency limit)."""
+        pause = self._limiter.paused_for()
+        if pause > 0:
+            self._add_log(LogLevel.SYSTEM, f"Claude rate-limited — waiting {pause:.0f}s before launching", task_id)
+        queued = time.perf_counter()
+        async with self._limiter.slot() as run:
+            waited = time.perf_counter() - queued
+            timeline = self._timelines.get(task_id)
+            if timeline and waited >= 0.01:
+                timeline.add(PHASE, "claude_queue", waited)
+            result = await self._spawn_claude(prompt, task_id, cwd=cwd, run=run, resume=resume)
+        if run.throttle is not None and task_id:
+            self._throttled[task_id] = run.throttle
+        return result
+
+    async def _spawn_claude(
+        self, prompt: str, task_id: int, *, cwd: str | None, run: RunSlot, resume: str | None = None
+    ) -> tuple[int, str, float | None]:
         # Pass prompt via stdin (not CLI arg) to avoid OS arg length limits and hanging
         cmd = [self.config.claude_command, "-p", "--output-format", "stream-json", "--verbose"]
-        if self.config.claude_model:
-            cmd.extend(["--model", self.config.claude_model])
-        if self.config.claude_max_budget:
-            cmd.extend(["--max-budget-usd", str(self.config.claude_max_budget)])
+        if resume:
+            cmd.extend(["--resume", resume])
+        budget_task = self._run_task if self._run_task and self._run_task.id == task_id else None
+        model = self._budget.model_for(budget_task, self.config.claude_model)
+        if model:
+            cmd.extend(["--model", model])
+            if model != self.config.claude_model:
+                self._add_log(LogLevel.SYSTEM, f"Budget tight — using model {model}", task_id)
+        max_budget = self.config.claude_max_budget
+        room = self._budget.remaining(budget_task)
+        if room is not None:
+            # Never let one run spend past the tightest ceiling
+            room = round(max(room, 0.01), 2)
+            max_budget = min(max_budget, room) if max_budget else room
+        if max_budget:
+            cmd.extend(["--max-budget-usd", str(max_budget)])
+        # --resume or a cap taken from the remaining budget makes this argv one-off: pre-spawning for it is waste
+        reusable = not resume and max_budget == self.config.claude_max_budget
         cmd.append("--dangerously-skip-permissions")
 
         # Resolve cwd: if relative or non-existent, fall back to target_project
@@ -960,26 +1077,17 @@ class AgentWorker:
             run_cwd = self.config.target_project
         if run_cwd and not Path(run_cwd).is_dir():
             run_cwd = self.config.target_project
-        env = os.environ.copy()
-        env.pop("CLAUDECODE", None)
 
         logger.info("Executing: claude -p (stdin, %d chars)", len(prompt))
         self._add_log(LogLevel.SYSTEM, f"Running claude CLI (cwd: {run_cwd}, prompt: {len(prompt)} chars)", task_id)
 
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,  # merge stderr → stdout (prevent deadlock)
-                cwd=run_cwd,
-                env=env,
-                limit=4 * 1024 * 1024,  # 4MB line buffer (default 64KB too small for large stream-json)
-            )
+            launch = await self.launcher.launch(cmd, run_cwd, refill=reusable)
         except FileNotFoundError as e:
             self._add_log(LogLevel.ERROR, f"FileNotFoundError: {e} (cmd={self.config.claude_command}, cwd={run_cwd})", task_id)
             return 1, f"FileNotFoundError: {e}", None
 
+        proc = launch.proc
         self._proc = proc
         # Feed prompt via stdin and close
         proc.stdin.write(prompt.encode("utf-8"))
@@ -988,11 +1096,21 @@ class AgentWorker:
 
         output_parts: list[str] = []
         cost: float | None = None
+        timeline = self._timelines.get(task_id)
 
         async def read_stream():
             nonlocal cost
             assert proc.stdout
+            first = True
             async for raw_line in proc.stdout:
+                if first:
+                    first = False
+                    ttfe = self.launcher.first_event(launch)
+                    logger.info("First claude event after %.2fs (%s)", ttfe, "warm" if launch.warm else "cold")
+                    if timeline:
+                        timeline.add(PHASE, "claude_start", ttfe, "warm" if launch.warm else "cold")
+                elif timeline:
+                    timeline.tools_finished()  # the line after a tool_use is its result
                 line = raw_line.decode("utf-8", errors="replace").strip()
                 if not line:
                     continue
@@ -1002,9 +1120,14 @@ class AgentWorker:
                     # Non-JSON line (stderr or plain text)
                     self._add_log(LogLevel.CLAUDE, line[:500], task_id)
                     output_parts.append(line)
+                    run.throttle = run.throttle or detect_throttle(line)
                     continue
 
                 etype = event.get("type", "")
+                if etype in ("error", "result"):
+                    run.throttle = run.throttle or detect_throttle(event)
+                if etype in ("system", "result") and event.get("session_id") and task_id:
+                    self._sessions[task_id] = event["session_id"]
 
                 if etype == "system":
                     # init event — log model info
@@ -1027,6 +1150,8 @@ class AgentWorker:
                                 elif block.get("type") == "tool_use":
                                     tool_name = block.get("name", "")
                                     self._add_log(LogLevel.TOOL, f"Tool: {tool_name}", task_id)
+                                    if timeline:
+                                        timeline.tool_started(tool_name, tool_detail(block.get("input")))
                     elif isinstance(msg_obj, str) and msg_obj:
                         self._add_log(LogLevel.CLAUDE, msg_obj[:500], task_id)
                         output_parts.append(msg_obj)
@@ -1034,10 +1159,18 @@ class AgentWorker:
                 elif etype == "tool_use":
                     tool_name = event.get("tool", event.get("name", ""))
                     self._add_log(LogLevel.TOOL, f"Tool: {tool_name}", task_id)
+                    if timeline:
+                        timeline.tool_started(tool_name, tool_detail(event.get("input")))
 
                 elif etype == "result":
                     result_text = str(event.get("result", "") or "")
                     cost = event.get("total_cost_usd") or event.get("cost_usd") or event.get("cost")
+                    if cost:
+                        metrics.TASK_COST.observe(cost)
+                        epic_id = budget_task.epic_id if budget_task else None
+                        target = budget_task.target if budget_task else ""
+                        self._budget.record(cost, epic_id=epic_id, target=target)
+                        await self.db.record_spend(cost, task_id=task_id or None, epic_id=epic_id, target=target)
                     if result_text:
                         output_parts.append(result_text)
                         self._add_log(LogLevel.RESULT, result_text[:500], task_id)
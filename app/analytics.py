@@ -0,0 +1,143 @@
+"""태스크 분석 — 일별 롤업(완료 시 증분 갱신) 기반 처리량/성공률/소요시간/비용/재시도 집계"""
+
+from __future__ import annotations
+
+import bisect
+from datetime import date, datetime, timedelta, timezone
+
+from app.models import TaskRecord, TaskStatus
+
+# Breakdown dimensions; "all" has the single key ""
+DIMENSIONS = ("all", "epic", "target", "label", "priority")
+
+# Duration histogram upper bounds in seconds (last bucket is open-ended)
+DURATION_BUCKETS = (
+    5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900, 1200,
+    1800, 2700, 3600, 5400, 7200, 10800, 14400, 21600, 43200, 86400,
+)
+
+# Rollup counter columns, in task_rollup order after (day, dim, key)
+ROLLUP_COUNTERS = ("done", "failed", "retried", "retries", "cost_usd", "costed", "duration_sec", "timed")
+
+
+def rollup_keys(task: TaskRecord) -> list[tuple[str, str]]:
+    """(dimension, key) pairs a finished task counts toward."""
+    keys = [("all", ""), ("epic", str(task.epic_id) if task.epic_id else ""), ("target", task.target or "")]
+    keys.extend(("label", label) for label in dict.fromkeys(task.labels))
+    keys.append(("priority", task.priority.name.lower()))
+    return keys
+
+
+def duration_sec(task: TaskRecord) -> float | None:
+    """Run time of the last attempt: start to when the run finished, so a review wait is not counted."""
+    ended = task.finished_at or task.completed_at
+    if not task.started_at or not ended:
+        return None
+    seconds = (datetime.fromisoformat(ended) - datetime.fromisoformat(task.started_at)).total_seconds()
+    return max(seconds, 0.0)
+
+
+def duration_bucket(seconds: float) -> int:
+    return bisect.bisect_left(DURATION_BUCKETS, seconds)
+
+
+def completion_counters(task: TaskRecord) -> tuple:
+    """ROLLUP_COUNTERS values one finished (done/failed) task adds."""
+    duration = duration_sec(task)
+    return (
+        int(task.status == TaskStatus.DONE),
+        int(task.status == TaskStatus.FAILED),
+        int(task.retry_count > 0),
+        task.retry_count,
+        task.cost_usd or 0.0,
+        int(task.cost_usd is not None),
+        duration or 0.0,
+        int(duration is not None),
+    )
+
+
+def since_day(days: int, today: date | None = None) -> str:
+    """First UTC day of a window of `days` days ending today."""
+    today = today or datetime.now(timezone.utc).date()
+    return (today - timedelta(days=days - 1)).isoformat()
+
+
+def percentile(hist: dict[int, int], q: float, bounds: tuple[float, ...] = DURATION_BUCKETS) -> float | None:
+    """Estimate a quantile from bucket counts, interpolating linearly inside the bucket."""
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bucket in sorted(hist):
+        count = hist[bucket]
+        if seen + count >= rank:
+            low = bounds[bucket - 1] if bucket > 0 else 0
+            if bucket >= len(bounds):
+                return float(low)  # open-ended bucket: report its lower bound
+            high = bounds[bucket]
+            return round(low + (high - low) * (rank - seen) / count, 1)
+        seen += count
+    return float(bounds[-1])
+
+
+def _metrics(counters: list[float], hist: dict[int, int], days: int) -> dict:
+    done, failed, retried, retries, cost, costed, duration, timed = counters
+    finished = done + failed
+    return {
+        "done": int(done),
+        "failed": int(failed),
+        "tasks_per_day": round(done / days, 2),
+        "success_rate": round(done / finished, 3) if finished else None,
+        "p50_sec": percentile(hist, 0.5),
+        "p95_sec": percentile(hist, 0.95),
+        "avg_sec": round(duration / timed, 1) if timed else None,
+        "cost_usd": round(cost, 4),
+        "cost_per_task": round(cost / costed, 4) if costed else None,
+        "retry_rate": round(retried / finished, 3) if finished else None,
+        "retries_per_task": round(retries / finished, 3) if finished else None,
+    }
+
+
+def totals(rows: list[tuple], hist_rows: list[tuple], days: int) -> dict:
+    """Metrics over the whole window, summing every row regardless of key."""
+    acc = [0] * len(ROLLUP_COUNTERS)
+    for _day, _key, *values in rows:
+        for i, v in enumerate(values):
+            acc[i] += v
+    hist: dict[int, int] = {}
+    for _day, _key, bucket, count in hist_rows:
+        hist[bucket] = hist.get(bucket, 0) + count
+    return _metrics(acc, hist, days)
+
+
+def breakdown(rows: list[tuple], hist_rows: list[tuple], days: int) -> list[dict]:
+    """Per-key metrics over the window from task_rollup rows (day, key, *counters) and
+    duration rows (day, key, bucket, count); busiest keys first."""
+    counters: dict[str, list[float]] = {}
+    hists: dict[str, dict[int, int]] = {}
+    for _day, key, *values in rows:
+        acc = counters.setdefault(key, [0] * len(ROLLUP_COUNTERS))
+        for i, v in enumerate(values):
+            acc[i] += v
+    for _day, key, bucket, count in hist_rows:
+        hist = hists.setdefault(key, {})
+        hist[bucket] = hist.get(bucket, 0) + count
+    groups = [{"key": key, **_metrics(acc, hists.get(key, {}), days)} for key, acc in counters.items()]
+    groups.sort(key=lambda g: (g["done"] + g["failed"], g["key"]), reverse=True)
+    return groups
+
+
+def daily(rows: list[tuple], hist_rows: list[tuple], first_day: str, days: int) -> list[dict]:
+    """One entry per day of the window (empty days included) from the "all" dimension's rows."""
+    by_day = {day: list(values) for day, _key, *values in rows}
+    hists: dict[str, dict[int, int]] = {}
+    for day, _key, bucket, count in hist_rows:
+        hists.setdefault(day, {})[bucket] = count
+    start = date.fromisoformat(first_day)
+    series = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        values = by_day.get(day, [0] * len(ROLLUP_COUNTERS))
+        series.append({"day": day, **_metrics(values, hists.get(day, {}), 1)})
+    return series
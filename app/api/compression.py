@@ -0,0 +1,113 @@
+"""응답 압축 미들웨어 — brotli(설치 시) / gzip, 크기 임계값"""
+
+from __future__ import annotations
+
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install 'claude-pilot[fast]'
+    brotli = None
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/plain",
+)
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Parse Accept-Encoding into the set of codings with q > 0."""
+    accepted: set[str] = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class CompressionMiddleware:
+    """Compress single-body responses of compressible types above minimum_size.
+
+    Prefers brotli when the optional ``brotli`` package is installed and the
+    client accepts it, otherwise gzip. Streaming responses (SSE) and bodies
+    that already carry a Content-Encoding are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _negotiate(self, accept_encoding: str) -> str | None:
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start: Message | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                pending_start = message  # hold until the first body chunk decides
+                return
+            if pending_start is None:
+                await send(message)
+                return
+            start, pending_start = pending_start, None
+            headers = MutableHeaders(raw=start["headers"])
+            media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+            compressible = media_type in _COMPRESSIBLE_TYPES and "content-encoding" not in headers
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if (
+                not compressible
+                or message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+            compressed = self._compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
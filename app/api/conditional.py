@@ -0,0 +1,51 @@
+"""HTTP 조건부 요청 — weak ETag / Last-Modified / 304"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import Request, Response
+
+
+def weak_etag(*parts: object) -> str:
+    """Build a weak ETag from version parts (e.g. row count + max(updated_at))."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()}"'
+
+
+def _http_date(iso_ts: str | None) -> str | None:
+    if not iso_ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(iso_ts)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: str | None = None) -> dict[str, str]:
+    """Validator headers; no-cache makes browsers revalidate every poll."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    http_date = _http_date(last_modified)
+    if http_date:
+        headers["Last-Modified"] = http_date
+    return headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against etag (RFC 9110 §13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str, last_modified: str | None = None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
@@ -0,0 +1,26 @@
+"""orjson 기반 JSON 응답 (orjson 미설치 시 stdlib json fallback)"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: pip install 'claude-pilot[fast]'
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available.
+
+    Used as the app's default_response_class. Routes that already hold
+    dumped models (to_dict / model_dump) return it directly so FastAPI
+    skips the jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
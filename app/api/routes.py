@@ -4,14 +4,18 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel as _PydanticBase
 from sse_starlette.sse import EventSourceResponse
 
+from app import analytics, metrics
 from app.agent import AgentWorker
+from app.api.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from app.api.responses import FastJSONResponse
 from app.database import Database
 from app.models import (
     ApprovalRequest,
@@ -21,12 +25,17 @@ from app.models import (
     PlanCreate,
     PlanStatus,
     PlanUpdate,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkUpdate,
     TaskCreate,
     TaskPriority,
     TaskStatus,
     TaskUpdate,
 )
 from app.reports.models import ReportGenerateRequest, ReportType
+from app.profiler import ProfileBusy, profile
+from app.timeline import summarize
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +54,7 @@ def _get_agent(request: Request) -> AgentWorker:
 
 
 @router.get("/api/tasks")
-async def list_tasks(status: str | None = None, label: str | None = None, q: str | None = None, epic_id: str | None = None, db: Database = Depends(_get_db)):
+async def list_tasks(request: Request, status: str | None = None, label: str | None = None, q: str | None = None, epic_id: str | None = None, db: Database = Depends(_get_db)):
     task_status = TaskStatus(status) if status else None
     # epic_id filter: not provided = no filter, "none" = tasks without epic, number = specific epic
     epic_filter: int | None | str = "unset"
@@ -54,14 +63,48 @@ async def list_tasks(status: str | None = None, label: str | None = None, q: str
             epic_filter = None
         else:
             epic_filter = int(epic_id)
+    count, last_modified = await db.tasks_version(task_status, label=label, search=q, plan_id=None, epic_id=epic_filter)
+    etag = weak_etag("tasks", count, last_modified)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     tasks = await db.list_tasks(task_status, label=label, search=q, plan_id=None, epic_id=epic_filter)
-    return [t.model_dump() for t in tasks]
+    return FastJSONResponse([t.to_dict() for t in tasks], headers=cache_headers(etag, last_modified))
 
 
 @router.post("/api/tasks", status_code=201)
 async def create_task(data: TaskCreate, db: Database = Depends(_get_db)):
     task = await db.create_task(data)
-    return task.model_dump()
+    return task.to_dict()
+
+
+# Bulk routes are registered before /api/tasks/{task_id} so "bulk" is not parsed as an id
+
+
+@router.post("/api/tasks/bulk", status_code=201)
+async def bulk_create_tasks(body: TaskBulkCreate, db: Database = Depends(_get_db)):
+    tasks = await db.bulk_create_tasks(body.tasks)
+    return FastJSONResponse([t.to_dict() for t in tasks], status_code=201)
+
+
+@router.patch("/api/tasks/bulk")
+async def bulk_update_tasks(body: TaskBulkUpdate, db: Database = Depends(_get_db)):
+    tasks = await db.bulk_update_tasks(body.ids, body.patch)
+    return FastJSONResponse([t.to_dict() for t in tasks])
+
+
+@router.post("/api/tasks/bulk/delete")
+async def bulk_delete_tasks(body: TaskBulkDelete, db: Database = Depends(_get_db)):
+    try:
+        deleted = await db.delete_tasks(
+            body.ids,
+            status=body.status,
+            label=body.label,
+            search=body.q,
+            epic_id=body.epic_id if body.epic_id is not None else "unset",
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return {"deleted": len(deleted), "ids": deleted}
 
 
 @router.patch("/api/tasks/{task_id}")
@@ -69,7 +112,7 @@ async def update_task(task_id: int, data: TaskUpdate, db: Database = Depends(_ge
     task = await db.update_task(task_id, data)
     if not task:
         raise HTTPException(404, "Task not found")
-    return task.model_dump()
+    return task.to_dict()
 
 
 @router.delete("/api/tasks/{task_id}")
@@ -81,9 +124,27 @@ async def delete_task(task_id: int, db: Database = Depends(_get_db)):
 
 
 @router.get("/api/tasks/{task_id}/logs")
-async def get_task_logs(task_id: int, db: Database = Depends(_get_db)):
+async def get_task_logs(task_id: int, request: Request, db: Database = Depends(_get_db)):
+    etag = weak_etag("logs", task_id, *await db.task_logs_version(task_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     logs = await db.get_task_logs(task_id)
-    return [l.model_dump() for l in logs]
+    return FastJSONResponse([l.to_dict() for l in logs], headers=cache_headers(etag))
+
+
+@router.get("/api/tasks/{task_id}/spans")
+async def get_task_spans(task_id: int, request: Request, db: Database = Depends(_get_db)):
+    etag = weak_etag("spans", task_id, *await db.task_spans_version(task_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    spans = await db.get_task_spans(task_id)
+    return FastJSONResponse([s.to_dict() for s in spans], headers=cache_headers(etag))
+
+
+@router.get("/api/spans/stats")
+async def span_stats(days: int = Query(7, ge=1, le=90), db: Database = Depends(_get_db)):
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    return {"days": days, **summarize(await db.span_histogram(since))}
 
 
 @router.post("/api/tasks/{task_id}/retry")
@@ -91,7 +152,27 @@ async def retry_task(task_id: int, db: Database = Depends(_get_db)):
     task = await db.retry_task(task_id)
     if not task:
         raise HTTPException(404, "Task not found")
-    return task.model_dump()
+    return task.to_dict()
+
+
+@router.post("/api/tasks/{task_id}/approve")
+async def approve_task(task_id: int, db: Database = Depends(_get_db), agent: AgentWorker = Depends(_get_agent)):
+    if not await db.get_task(task_id):
+        raise HTTPException(404, "Task not found")
+    if not await agent.approve(task_id):
+        raise HTTPException(409, "Task is not waiting for approval")
+    return {"ok": True, "task_id": task_id}
+
+
+@router.post("/api/tasks/{task_id}/reject")
+async def reject_task(
+    task_id: int, body: ApprovalRequest, db: Database = Depends(_get_db), agent: AgentWorker = Depends(_get_agent)
+):
+    if not await db.get_task(task_id):
+        raise HTTPException(404, "Task not found")
+    if not await agent.reject(task_id, body.feedback):
+        raise HTTPException(409, "Task is not waiting for approval")
+    return {"ok": True, "task_id": task_id}
 
 
 @router.post("/api/tasks/{task_id}/run")
@@ -133,29 +214,33 @@ async def agent_stop(agent: AgentWorker = Depends(_get_agent)):
 
 
 @router.post("/api/agent/approve")
-async def agent_approve(agent: AgentWorker = Depends(_get_agent)):
-    if not agent.approve():
-        raise HTTPException(400, "Agent not waiting for approval")
+async def agent_approve(body: ApprovalRequest | None = None, agent: AgentWorker = Depends(_get_agent)):
+    if not await agent.approve(body.task_id if body else None):
+        raise HTTPException(400, "No task waiting for approval")
     return {"ok": True}
 
 
 @router.post("/api/agent/reject")
 async def agent_reject(body: ApprovalRequest, agent: AgentWorker = Depends(_get_agent)):
-    if not agent.reject(body.feedback):
-        raise HTTPException(400, "Agent not waiting for approval")
+    if not await agent.reject(body.task_id, body.feedback):
+        raise HTTPException(400, "No task waiting for approval")
     return {"ok": True}
 
 
 @router.get("/api/agent/logs")
-async def agent_logs(agent: AgentWorker = Depends(_get_agent)):
+async def agent_logs(after: int = 0, task_id: int | None = None, agent: AgentWorker = Depends(_get_agent)):
     async def generate():
-        index = 0
-        while True:
-            logs = agent.get_logs(after_index=index)
-            for log in logs:
-                yield {"data": log.model_dump_json()}
-                index = log.index + 1
-            await asyncio.sleep(0.5)
+        index = after
+        metrics.SSE_SUBSCRIBERS.inc(stream="logs")
+        try:
+            while True:
+                logs = agent.get_logs(after_index=index, task_id=task_id)
+                for log in logs:
+                    yield {"data": log.to_json()}
+                    index = log.index + 1
+                await asyncio.sleep(0.5)
+        finally:
+            metrics.SSE_SUBSCRIBERS.dec(stream="logs")
 
     return EventSourceResponse(generate())
 
@@ -165,6 +250,110 @@ async def agent_output(agent: AgentWorker = Depends(_get_agent)):
     return {"output": agent.get_current_output()}
 
 
+@router.get("/api/agent/limiter")
+async def agent_limiter(agent: AgentWorker = Depends(_get_agent)):
+    return agent.get_limiter()
+
+
+@router.get("/api/agent/reviews")
+async def agent_reviews(agent: AgentWorker = Depends(_get_agent)):
+    return await agent.reviews.stats()
+
+
+@router.get("/api/agent/launcher")
+async def agent_launcher(agent: AgentWorker = Depends(_get_agent)):
+    return agent.launcher.stats()
+
+
+# ── Analytics ──
+
+
+def _analytics_window(days: int) -> str:
+    if not 1 <= days <= 366:
+        raise HTTPException(400, "days must be between 1 and 366")
+    return analytics.since_day(days)
+
+
+@router.get("/api/analytics/daily")
+async def analytics_daily(request: Request, days: int = 30, db: Database = Depends(_get_db)):
+    since = _analytics_window(days)
+    etag = weak_etag("analytics-daily", days, since, *await db.task_rollup_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    rows = await db.task_rollup("all", since)
+    hist_rows = await db.task_rollup_durations("all", since)
+    body = {
+        "days": days,
+        "since": since,
+        "totals": analytics.totals(rows, hist_rows, days),
+        "series": analytics.daily(rows, hist_rows, since, days),
+    }
+    return FastJSONResponse(body, headers=cache_headers(etag))
+
+
+@router.get("/api/analytics/breakdown")
+async def analytics_breakdown(request: Request, by: str = "epic", days: int = 30, db: Database = Depends(_get_db)):
+    if by not in analytics.DIMENSIONS:
+        raise HTTPException(400, f"by must be one of: {', '.join(analytics.DIMENSIONS)}")
+    since = _analytics_window(days)
+    etag = weak_etag("analytics-breakdown", by, days, since, *await db.task_rollup_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    rows = await db.task_rollup(by, since)
+    hist_rows = await db.task_rollup_durations(by, since)
+    body = {"by": by, "days": days, "since": since, "groups": analytics.breakdown(rows, hist_rows, days)}
+    return FastJSONResponse(body, headers=cache_headers(etag))
+
+
+@router.get("/api/admin/profile")
+async def admin_profile(seconds: float = 10, interval_ms: float = 5, agent: AgentWorker = Depends(_get_agent)):
+    if not 0 < seconds <= agent.config.profile_max_sec:
+        raise HTTPException(400, f"seconds must be in (0, {agent.config.profile_max_sec}]")
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(400, "interval_ms must be between 1 and 1000")
+    try:
+        stacks = await profile(seconds, interval_ms / 1000)
+    except ProfileBusy as e:
+        raise HTTPException(409, str(e))
+    return PlainTextResponse(stacks, headers={"Content-Disposition": 'attachment; filename="pilot.folded"'})
+
+
+@router.get("/api/admin/loop")
+async def admin_loop(request: Request):
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    return {"enabled": monitor is not None, **(monitor.stats() if monitor else {})}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(db: Database = Depends(_get_db), agent: AgentWorker = Depends(_get_agent)):
+    counts = await db.count_tasks_by_status()
+    for status in TaskStatus:
+        metrics.TASKS.set(counts.get(status.value, 0), status=status.value)
+    limiter = agent.get_limiter()
+    metrics.CLAUDE_LIMIT.set(limiter["limit"], kind="limit")
+    metrics.CLAUDE_LIMIT.set(limiter["in_flight"], kind="in_flight")
+    metrics.CLAUDE_LIMIT.set(limiter["paused_for_sec"], kind="paused_for_sec")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/api/agent/procs")
+async def agent_procs(agent: AgentWorker = Depends(_get_agent)):
+    return agent.procs.stats()
+
+
+@router.get("/api/agent/budget")
+async def agent_budget(agent: AgentWorker = Depends(_get_agent)):
+    return agent.get_budget()
+
+
+# ── Database ──
+
+
+@router.get("/api/db/stats")
+async def db_stats(db: Database = Depends(_get_db)):
+    return db.pool_stats()
+
+
 # ── Plans ──
 
 
@@ -175,21 +364,32 @@ async def create_plan(data: PlanCreate, db: Database = Depends(_get_db)):
 
 
 @router.get("/api/plans")
-async def list_plans(status: str | None = None, db: Database = Depends(_get_db)):
+async def list_plans(request: Request, status: str | None = None, db: Database = Depends(_get_db)):
     plan_status = PlanStatus(status) if status else None
+    count, last_modified = await db.plans_version(plan_status)
+    etag = weak_etag("plans", count, last_modified)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     plans = await db.list_plans(plan_status)
-    return [p.model_dump() for p in plans]
+    return FastJSONResponse([p.model_dump() for p in plans], headers=cache_headers(etag, last_modified))
 
 
 @router.get("/api/plans/{plan_id}")
-async def get_plan(plan_id: int, db: Database = Depends(_get_db)):
+async def get_plan(plan_id: int, request: Request, db: Database = Depends(_get_db)):
+    version = await db.plan_version(plan_id)
+    if version[0] is None:
+        raise HTTPException(404, "Plan not found")
+    etag = weak_etag("plan", plan_id, *version)
+    last_modified = max(v for v in (version[0], version[2]) if v)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     plan = await db.get_plan(plan_id)
     if not plan:
         raise HTTPException(404, "Plan not found")
     tasks = await db.get_plan_tasks(plan_id)
     result = plan.model_dump()
-    result["tasks"] = [t.model_dump() for t in tasks]
-    return result
+    result["tasks"] = [t.to_dict() for t in tasks]
+    return FastJSONResponse(result, headers=cache_headers(etag, last_modified))
 
 
 @router.patch("/api/plans/{plan_id}")
@@ -266,27 +466,40 @@ async def create_epic(data: EpicCreate, db: Database = Depends(_get_db)):
 
 
 @router.get("/api/epics")
-async def list_epics(status: str | None = None, db: Database = Depends(_get_db)):
+async def list_epics(request: Request, status: str | None = None, db: Database = Depends(_get_db)):
     epic_status = EpicStatus(status) if status else None
+    version = await db.epics_version(epic_status)
+    etag = weak_etag("epics", status, *version)
+    last_modified = max((v for v in (version[1], version[3]) if v), default=None)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     epics = await db.list_epics(epic_status)
+    all_stats = await db.list_epic_stats([e.id for e in epics])
     result = []
     for e in epics:
         d = e.model_dump()
-        d["stats"] = await db.get_epic_stats(e.id)
+        d["stats"] = all_stats[e.id]
         result.append(d)
-    return result
+    return FastJSONResponse(result, headers=cache_headers(etag, last_modified))
 
 
 @router.get("/api/epics/{epic_id}")
-async def get_epic(epic_id: int, db: Database = Depends(_get_db)):
+async def get_epic(epic_id: int, request: Request, db: Database = Depends(_get_db)):
+    version = await db.epic_version(epic_id)
+    if version[0] is None:
+        raise HTTPException(404, "Epic not found")
+    etag = weak_etag("epic", epic_id, *version)
+    last_modified = max(v for v in (version[0], version[2], version[4]) if v)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     epic = await db.get_epic(epic_id)
     if not epic:
         raise HTTPException(404, "Epic not found")
     result = epic.model_dump()
-    result["tasks"] = [t.model_dump() for t in await db.get_epic_tasks(epic_id)]
+    result["tasks"] = [t.to_dict() for t in await db.get_epic_tasks(epic_id)]
     result["plans"] = [p.model_dump() for p in await db.get_epic_plans(epic_id)]
     result["stats"] = await db.get_epic_stats(epic_id)
-    return result
+    return FastJSONResponse(result, headers=cache_headers(etag, last_modified))
 
 
 @router.patch("/api/epics/{epic_id}")
@@ -479,18 +692,9 @@ async def analyze_daily(
     summary = _extract_summary(analysis)
     task_items = analysis.get("tasks", [])
 
-    # 4. Delete existing tasks for same date, then create new ones
-    existing = await db.list_tasks(label="trading-analysis")
+    # 4. Replace existing tasks for same date with the new ones
     date_tag = f"[Auto-generated from {target_date} trading analysis]"
-    deleted_count = 0
-    for t in existing:
-        if date_tag in t.description:
-            await db.delete_task(t.id)
-            deleted_count += 1
-    if deleted_count:
-        logger.info("Replaced %d existing trading-analysis tasks for %s", deleted_count, target_date)
-
-    created_tasks = []
+    new_tasks: list[TaskCreate] = []
     for item in task_items:
         title = item.get("title", "")
         if not title:
@@ -502,14 +706,19 @@ async def analyze_daily(
         except ValueError:
             priority = TaskPriority.MEDIUM
 
-        task = await db.create_task(TaskCreate(
+        new_tasks.append(TaskCreate(
             title=f"[Trading] {title}",
-            description=f"[Auto-generated from {target_date} trading analysis]\n\n{description}",
+            description=f"{date_tag}\n\n{description}",
             priority=priority,
             labels=["trading-analysis"],
             epic_id=req.epic_id,
         ))
-        created_tasks.append({"id": task.id, "title": task.title, "priority": priority.value})
+    async with db.transaction():  # one swap: a failed create keeps the old tasks, readers never see a gap
+        deleted = await db.delete_tasks(label="trading-analysis", search=date_tag)
+        created = await db.bulk_create_tasks(new_tasks)
+    if deleted:
+        logger.info("Replaced %d existing trading-analysis tasks for %s", len(deleted), target_date)
+    created_tasks = [{"id": t.id, "title": t.title, "priority": t.priority.value} for t in created]
 
     return {
         "date": target_date,
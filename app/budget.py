@@ -0,0 +1,198 @@
+"""지출 한도 — 일일 + epic/target 누적 예산 추적, 한도 근접 시 디스패치 보류"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskRecord
+from app.scheduler import Scheduler
+
+
+class BudgetTracker:
+    """Running Claude spend: for the current UTC day, and in total by epic and by target.
+
+    Fed from `result` events as runs finish and seeded from the spend ledger
+    at start. The daily ceiling resets at midnight UTC; epic and target
+    ceilings are lifetime totals and never reset.
+    """
+
+    def __init__(
+        self,
+        *,
+        daily_usd: float | None = None,
+        epic_usd: dict[str, float] | None = None,
+        target_usd: dict[str, float] | None = None,
+        pause_ratio: float = 0.95,
+        tight_ratio: float = 0.8,
+        tight_model: str | None = None,
+    ) -> None:
+        self.daily_usd = daily_usd
+        self.epic_usd = epic_usd or {}
+        self.target_usd = target_usd or {}
+        self.pause_ratio = pause_ratio
+        self.tight_ratio = tight_ratio
+        self.tight_model = tight_model
+        self._day = ""
+        self._by_epic: dict[str, float] = {}
+        self._epic_runs: dict[str, int] = {}
+        self._by_target: dict[str, float] = {}
+        self._reset(datetime.now(timezone.utc))
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> BudgetTracker:
+        return cls(
+            daily_usd=config.budget_daily_usd,
+            epic_usd=config.budget_epic_usd,
+            target_usd=config.budget_target_usd,
+            pause_ratio=config.budget_pause_ratio,
+            tight_ratio=config.budget_tight_ratio,
+            tight_model=config.budget_tight_model,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.daily_usd or self.epic_usd or self.target_usd)
+
+    def _reset(self, now: datetime) -> None:
+        """Start a new day; epic/target totals carry over."""
+        self._day = now.date().isoformat()
+        self._spent = 0.0
+        self._runs = 0
+
+    def _roll(self, now: datetime | None) -> None:
+        now = now or datetime.now(timezone.utc)
+        if now.date().isoformat() != self._day:
+            self._reset(now)
+
+    def _add_scoped(self, cost: float, epic_id: int | None, target: str, runs: int) -> None:
+        epic = "" if epic_id is None else str(epic_id)
+        self._by_epic[epic] = self._by_epic.get(epic, 0.0) + cost
+        self._epic_runs[epic] = self._epic_runs.get(epic, 0) + runs
+        self._by_target[target] = self._by_target.get(target, 0.0) + cost
+
+    def record(self, cost: float, *, epic_id: int | None = None, target: str = "", now: datetime | None = None) -> None:
+        """Add spend from a finished run."""
+        self._roll(now)
+        self._spent += cost
+        self._runs += 1
+        self._add_scoped(cost, epic_id, target, 1)
+
+    async def load(self, db: Database, now: datetime | None = None) -> None:
+        """Seed today's spend and the epic/target totals from the database's spend ledger."""
+        now = now or datetime.now(timezone.utc)
+        self._reset(now)
+        self._by_epic, self._epic_runs, self._by_target = {}, {}, {}
+        for epic_id, target, cost, runs in await db.spend_since():
+            self._add_scoped(cost, epic_id, target, runs)
+        since = datetime.combine(now.date(), datetime.min.time(), timezone.utc).isoformat()
+        for _epic_id, _target, cost, runs in await db.spend_since(since):
+            self._spent += cost
+            self._runs += runs
+
+    def _scopes(self, task: TaskRecord | None) -> list[tuple[float, float]]:
+        """(spent, ceiling) for every ceiling that applies to task (daily only when task is None)."""
+        scopes = []
+        if self.daily_usd:
+            scopes.append((self._spent, self.daily_usd))
+        if task is not None:
+            epic = "" if task.epic_id is None else str(task.epic_id)
+            if epic in self.epic_usd:
+                scopes.append((self._by_epic.get(epic, 0.0), self.epic_usd[epic]))
+            if task.target in self.target_usd:
+                scopes.append((self._by_target.get(task.target, 0.0), self.target_usd[task.target]))
+        return scopes
+
+    def remaining(self, task: TaskRecord | None = None, now: datetime | None = None) -> float | None:
+        """Smallest room left under the ceilings that apply; None when unlimited."""
+        self._roll(now)
+        rooms = [ceiling - spent for spent, ceiling in self._scopes(task)]
+        return min(rooms) if rooms else None
+
+    def estimate(self, task: TaskRecord) -> float:
+        """Expected cost of running task: its last run, else its epic's mean run, else today's mean."""
+        if task.cost_usd is not None:
+            return task.cost_usd
+        epic = "" if task.epic_id is None else str(task.epic_id)
+        if self._epic_runs.get(epic):
+            return self._by_epic[epic] / self._epic_runs[epic]
+        return self._spent / self._runs if self._runs else 0.0
+
+    def paused(self, task: TaskRecord | None = None, now: datetime | None = None) -> bool:
+        """True when a ceiling that applies is near (pause_ratio) or the run would overshoot it."""
+        self._roll(now)
+        cost = self.estimate(task) if task is not None else 0.0
+        return any(spent >= ceiling * self.pause_ratio or spent + cost > ceiling for spent, ceiling in self._scopes(task))
+
+    def tight(self, task: TaskRecord | None = None, now: datetime | None = None) -> bool:
+        self._roll(now)
+        return any(spent >= ceiling * self.tight_ratio for spent, ceiling in self._scopes(task))
+
+    def model_for(self, task: TaskRecord | None, default: str | None) -> str | None:
+        """Cheaper model for runs in a tight scope, when one is configured."""
+        return self.tight_model if self.tight_model and self.tight(task) else default
+
+    def snapshot(self) -> dict:
+        self._roll(None)
+        return {
+            "day": self._day,
+            "spent_usd": round(self._spent, 4),
+            "daily_usd": self.daily_usd,
+            "runs": self._runs,
+            "by_epic": {k or "none": round(v, 4) for k, v in self._by_epic.items()},
+            "by_target": {k or "default": round(v, 4) for k, v in self._by_target.items()},
+            "paused": self.paused(),
+            "tight": self.tight(),
+        }
+
+
+class BudgetScheduler(Scheduler):
+    """Spend-aware layer over another policy.
+
+    Tasks whose day/epic/target ceiling is near are skipped; in a tight
+    scope only tasks whose estimated cost still fits are eligible, cheapest
+    first. With no scope tight or paused, claims go straight to the inner
+    policy (keeping its single-statement SQL claim).
+    """
+
+    window = 1000
+
+    def __init__(self, inner: Scheduler, budget: BudgetTracker) -> None:
+        super().__init__(deadline_slack_sec=inner.deadline_slack_sec)
+        self.inner = inner
+        self.budget = budget
+        self.name = f"{inner.name}+budget"
+
+    def select(self, candidates: list[TaskRecord], now: datetime) -> TaskRecord | None:
+        return self.inner.select(self.eligible(candidates), now)
+
+    def dispatched(self, task: TaskRecord) -> None:
+        self.inner.dispatched(task)
+
+    def eligible(self, candidates: list[TaskRecord]) -> list[TaskRecord]:
+        allowed = [t for t in candidates if not self.budget.paused(t)]
+        tight = [t for t in allowed if self.budget.tight(t)]
+        if not tight:
+            return allowed
+        cheapest = min(self.budget.estimate(t) for t in tight)
+        # Relaxed scopes keep their tasks; tight scopes only offer their cheapest work
+        return [t for t in allowed if not self.budget.tight(t) or self.budget.estimate(t) <= cheapest]
+
+    async def claim(
+        self, db: Database, *, min_priority: int = 0, epic_id: int | None = None, now: datetime | None = None
+    ) -> TaskRecord | None:
+        if self.budget.paused(now=now):
+            return None
+        if not (self.budget.epic_usd or self.budget.target_usd or self.budget.tight(now=now)):
+            return await self.inner.claim(db, min_priority=min_priority, epic_id=epic_id, now=now)
+        now = now or datetime.now(timezone.utc)
+        candidates = self.eligible(await db.list_pending_candidates(min_priority, epic_id, limit=self.window))
+        while candidates:
+            task = self.inner.select(candidates, now)  # already filtered
+            claimed = await db.claim_task(task.id)
+            if claimed is not None:
+                self.dispatched(claimed)
+                return claimed
+            candidates.remove(task)
+        return None
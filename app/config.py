@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Literal
 
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveFloat
 
 
 _CONFIG_PATH = Path(__file__).resolve().parent.parent / "config.yaml"
@@ -15,21 +16,58 @@ class AppConfig(BaseModel):
     target_project: str = ""
     claude_command: str = "claude"
     auto_approve: bool = False
-    poll_interval: int = 5
+    poll_interval: int = 30  # idle fallback re-check; new/reopened tasks wake the loop immediately
     claude_model: str | None = None
     claude_max_budget: float | None = None
+    claude_max_concurrency: int = 2  # ceiling for concurrent claude processes (loop + plan decomposition)
+    rate_limit_cooldown_sec: int = 30  # launch pause after a rate-limit/overload signal (doubles while they repeat)
+    rate_limit_max_cooldown_sec: int = 900
     claude_timeout_sec: int = 600  # claude process timeout in seconds
+    claude_resume: bool = True  # retries / rejected tasks resume the last session with just the error or feedback
+    claude_warm_pool: int = 0  # idle pre-spawned claude processes kept per command line/cwd (0=cold start every run)
+    claude_warm_idle_sec: int = 120  # kill a pre-spawned process nobody claims within this
     db_path: str = "data/tasks.db"
+    db_read_pool_size: int = 4  # read-only WAL connections for dashboard/API reads (0=share the writer)
+    db_url: str | None = None  # postgresql://... to share one queue across nodes (overrides db_path)
+    db_pool_size: int = 10  # asyncpg pool size when db_url is set
+    node_id: str = ""  # marks tasks this node claimed (default: hostname)
+    claim_lease_sec: int = 300  # PostgreSQL: in_progress tasks of a node silent this long go back to pending
     # Gitflow
     gitflow: bool = False  # enable branch-per-task + PR workflow
     branch_prefix: str = "feat"  # branch naming: {prefix}/task-{id}-{slug}
     base_branch: str = "main"  # PR target branch
     auto_merge: bool = False  # auto-merge PR on approval (requires gh CLI)
+    git_fetch_interval_sec: int = 60  # branches start from origin/<base>, fetched at most this often
+    review_batch_size: int = 20  # merged PRs checked for review comments per gh GraphQL call
+    gh_calls_per_min: int = 30  # global cap on gh calls made by the review collector
+    # gh/git subprocesses
+    gh_command: str = "gh"
+    git_command: str = "git"
+    subprocess_max_concurrency: int = 8  # gh/git processes running at once (claude runs are limited separately)
+    gh_cache_ttl_sec: int = 10  # reuse identical read-only gh results this long (keep below the 30s review settle)
     # Retry
     max_retries: int = 2  # max retry attempts for failed tasks (0=disable)
     retry_backoff_sec: int = 5  # backoff between retries (doubles each attempt)
     # Context injection
     context_files: list[str] = []  # files relative to target_project to inject into prompt
+    # Logs
+    log_buffer_size: int = 1000  # in-memory log ring capacity (SSE replay window)
+    # Diagnostics
+    loop_lag_threshold_ms: int = 100  # warn when the event loop is blocked this long, naming the culprit (0=off)
+    profile_max_sec: int = 60  # longest sampling profile /api/admin/profile will run
+    # Scheduling
+    scheduler: Literal["priority", "aging", "fair"] = "priority"  # priority=strict order, aging=waiting raises priority, fair=weighted fair queue
+    scheduler_aging_sec: int = 900  # aging/fair: waiting this long counts as one priority level
+    scheduler_fair_key: Literal["epic", "target"] = "epic"  # fair: what a flow is
+    scheduler_weights: dict[str, PositiveFloat] = {}  # fair: flow (epic id or target path, "" = none) → share weight, default 1
+    deadline_slack_sec: int = 600  # tasks due within this window run first, earliest deadline first
+    # Spend ceilings (USD per UTC day; unset = unlimited)
+    budget_daily_usd: PositiveFloat | None = None
+    budget_epic_usd: dict[str, PositiveFloat] = {}  # epic id → lifetime ceiling (never resets)
+    budget_target_usd: dict[str, PositiveFloat] = {}  # target path ("" = target_project) → lifetime ceiling
+    budget_pause_ratio: float = 0.95  # stop dispatching a scope at this fraction of its ceiling
+    budget_tight_ratio: float = 0.8  # past this fraction prefer cheaper tasks (and budget_tight_model)
+    budget_tight_model: str | None = None  # e.g. a cheaper model for runs in a tight scope
 
 
 def load_config(path: Path | None = None) -> AppConfig:
@@ -472,6 +472,20 @@ _EXTRA_CSS = """
 
 .sp-actions { display: flex; gap: 8px; flex-wrap: wrap; }
 
+/* Execution timeline (waterfall of phases + tool calls) */
+.wf { display: flex; flex-direction: column; gap: 3px; font-size: 11px; }
+.wf-attempt { font-size: 10px; color: var(--text-tertiary); margin-bottom: 4px; }
+.wf-row { display: flex; align-items: center; gap: 8px; }
+.wf-name {
+    width: 110px; flex-shrink: 0; overflow: hidden; text-overflow: ellipsis; white-space: nowrap;
+    color: var(--text-secondary); font-family: 'SF Mono', 'Fira Code', monospace;
+}
+.wf-name.wf-tool { padding-left: 12px; color: var(--text-tertiary); }
+.wf-track { position: relative; flex: 1; height: 10px; background: var(--bg-panel); border-radius: 3px; }
+.wf-bar { position: absolute; top: 0; bottom: 0; min-width: 2px; border-radius: 3px; background: var(--accent); }
+.wf-bar.wf-tool { background: #a78bfa; }
+.wf-dur { width: 56px; flex-shrink: 0; text-align: right; color: var(--text-tertiary); font-variant-numeric: tabular-nums; }
+
 /* Approval inside slide panel */
 .sp-approval {
     background: var(--bg-panel); border-radius: 10px; padding: 14px;
@@ -958,13 +972,14 @@ let activeLabel = null;
 let searchQuery = '';
 let searchTimer = null;
 let activeStatusFilter = localStorage.getItem('statusFilter') || 'all';
-let approvalShownFor = null;  // track which task auto-opened for approval
+const approvalSeen = new Set();  // tasks already announced as awaiting review
 let _lastSlideKey = null;  // diff check to avoid unnecessary re-render
 let epicCache = {};  // id → {title, color}
 let _lastKanbanKey = null;  // diff check for kanban board
 
 // Task-specific log storage: { taskId: [{timestamp, level, message}, ...] }
 const taskLogs = {};
+const taskSpans = {};  // task id → spans from /api/tasks/{id}/spans
 
 // ── Kanban Board ──
 
@@ -1208,6 +1223,7 @@ async function loadTasks() {
                 if(key !== _lastSlideKey) {
                     _lastSlideKey = key;
                     renderSlideLeft(t);
+                    loadTaskSpans(t.id);
                 }
             }
         }
@@ -1317,6 +1333,7 @@ async function openPanel(t) {
     if(elapsed) meta.innerHTML += `<span style="font-size:11px;color:#666">${elapsed}</span>`;
 
     renderSlideLeft(t);
+    loadTaskSpans(t.id);
 
     // Load persisted logs from DB if not already in memory
     if(!taskLogs[t.id] || taskLogs[t.id].length === 0) {
@@ -1383,6 +1400,9 @@ function renderSlideLeft(t) {
     detailsContent += '</div>';
     html += sectionHtml('details', 'Details', detailsContent);
 
+    // ── Timeline (collapsible) ──
+    html += sectionHtml('timeline', 'Timeline', `<div id="spTimeline">${timelineHtml(taskSpans[t.id])}</div>`);
+
     // ── Approval Gate ──
     if(t.status === 'waiting_approval') {
         html += `<div class="sp-section">
@@ -1431,6 +1451,45 @@ function renderSlideLeft(t) {
     footer.style.display = actions.length ? 'flex' : 'none';
 }
 
+// ── Task Timeline ──
+
+async function loadTaskSpans(taskId) {
+    try {
+        const res = await fetch(`/api/tasks/${taskId}/spans`);
+        taskSpans[taskId] = await res.json();
+    } catch(e) { return; }
+    const box = document.getElementById('spTimeline');
+    if(box && selectedTaskId === taskId) box.innerHTML = timelineHtml(taskSpans[taskId]);
+}
+
+function fmtMs(ms) {
+    if(ms < 1000) return `${Math.round(ms)}ms`;
+    if(ms < 60000) return `${(ms/1000).toFixed(1)}s`;
+    return `${Math.floor(ms/60000)}m${Math.round(ms%60000/1000)}s`;
+}
+
+function timelineHtml(spans) {
+    if(!spans || spans.length === 0) return '<div class="sp-log-empty" style="padding:12px">No timeline recorded yet.</div>';
+    // Latest attempt only: phases and tool calls laid out against its own start
+    const attempt = spans[spans.length - 1].attempt;
+    const rows = spans.filter(s => s.attempt === attempt);
+    const starts = rows.map(s => Date.parse(s.started_at));
+    const t0 = Math.min(...starts);
+    const total = Math.max(1, ...rows.map((s, i) => starts[i] - t0 + s.duration_ms));
+    let html = attempt > 1 ? `<div class="wf-attempt">Attempt ${attempt} · ${fmtMs(total)}</div>` : `<div class="wf-attempt">${fmtMs(total)}</div>`;
+    html += rows.map((s, i) => {
+        const left = (starts[i] - t0) / total * 100;
+        const width = s.duration_ms / total * 100;
+        const tip = esc(s.detail ? `${s.name}: ${s.detail}` : s.name).replace(/"/g, '&quot;');
+        return `<div class="wf-row" title="${tip}">
+            <span class="wf-name wf-${s.kind}">${esc(s.name)}</span>
+            <span class="wf-track"><span class="wf-bar wf-${s.kind}" style="left:${left.toFixed(2)}%;width:${width.toFixed(2)}%"></span></span>
+            <span class="wf-dur">${fmtMs(s.duration_ms)}</span>
+        </div>`;
+    }).join('');
+    return `<div class="wf">${html}</div>`;
+}
+
 // ── Task-specific Log ──
 
 function isLogNearBottom(area) {
@@ -1545,17 +1604,15 @@ async function pollStatus() {
 
         if(s.state !== 'stopped' && !eventSource) ensureSSE();
 
-        // Auto-open approval task in slide panel (once per task)
-        if(s.state === 'waiting_approval' && s.current_task_id && approvalShownFor !== s.current_task_id) {
-            approvalShownFor = s.current_task_id;
-            const t = allTasks.find(x => x.id === s.current_task_id);
-            if(t) { selectedTaskId = s.current_task_id; openPanel(t); renderKanban(allTasks); }
+        // Announce tasks entering review once each (the agent keeps working meanwhile)
+        const waitingIds = new Set(allTasks.filter(x => x.status === 'waiting_approval').map(x => x.id));
+        for(const id of waitingIds) {
+            if(!approvalSeen.has(id)) { approvalSeen.add(id); if(prevState) showToast(`Task #${id} awaiting approval`, 'info'); }
         }
-        if(s.state !== 'waiting_approval') approvalShownFor = null;
+        for(const id of [...approvalSeen]) if(!waitingIds.has(id)) approvalSeen.delete(id);
 
         if(prevState && prevState !== s.state) {
             if(s.state === 'idle' && prevState === 'running') showToast('Task completed', 'success');
-            if(s.state === 'waiting_approval') showToast('Awaiting approval', 'info');
             if(s.state === 'stopped' && prevState !== 'stopped') showToast('Agent stopped', 'info');
         }
         prevState = s.state;
@@ -1565,14 +1622,16 @@ async function pollStatus() {
 }
 
 async function approveTask() {
-    await fetch('/api/agent/approve', {method:'POST'});
+    if(!selectedTaskId) return;
+    await fetch(`/api/tasks/${selectedTaskId}/approve`, {method:'POST'});
     showToast('Task approved', 'success');
 }
 
 async function rejectTask() {
     const input = document.getElementById('feedbackInput');
     const fb = input ? input.value.trim() : '';
-    await fetch('/api/agent/reject', {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({feedback:fb})});
+    if(!selectedTaskId) return;
+    await fetch(`/api/tasks/${selectedTaskId}/reject`, {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify({feedback:fb})});
     if(input) input.value = '';
     showToast('Task rejected', 'error');
 }
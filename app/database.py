@@ -1,32 +1,61 @@
-"""SQLite async CRUD (aiosqlite)"""
+"""SQLite async CRUD (aiosqlite) — 기본 스토리지 백엔드"""
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import socket
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
 from pathlib import Path
 
 import aiosqlite
 
+from app import metrics
+from app.analytics import ROLLUP_COUNTERS, completion_counters, duration_bucket, duration_sec, rollup_keys
+from app.config import AppConfig
 from app.models import (
     DailySnapshot,
     Epic,
     EpicCreate,
     EpicStatus,
     EpicUpdate,
-    LogEntry,
     LogLevel,
     Plan,
     PlanCreate,
     PlanStatus,
     PlanUpdate,
-    Task,
+    ReviewWatch,
     TaskCreate,
+    TaskPriority,
+    TaskRecord,
+    TaskSpan,
     TaskStatus,
     TaskUpdate,
     _now_iso,
 )
+from app.logbuffer import LogRecord
+from app.timeline import SPAN_BUCKETS_MS
 from app.reports.models import ReportSnapshot, ReportType
 
+logger = logging.getLogger(__name__)
+
+# Notification channel fired when tasks may have become runnable (created, retried, rejected, reset)
+NOTIFY_TASKS = "tasks"
+
+# Explicit column list (in TaskRecord field order) so rows unpack positionally
+_TASK_COLUMNS = ", ".join(f.name for f in fields(TaskRecord))
+_INSERT_TASK_COLUMNS = "title, description, priority, status, labels, epic_id, target, deadline, plan_id, task_order, created_at, updated_at"
+_INSERT_TASK_PLACEHOLDERS = "(" + ", ".join("?" * len(_INSERT_TASK_COLUMNS.split(", "))) + ")"
+_BULK_CHUNK = 500  # rows per statement (stays well under SQLite's bound-parameter limit)
+_TASK_STATUS = {s.value: s for s in TaskStatus}
+_FINAL_STATUSES = (TaskStatus.DONE, TaskStatus.FAILED)  # outcomes counted by the analytics rollup
+_TASK_PRIORITY = {p.value: p for p in TaskPriority}
+_LOG_LEVEL = {l.value: l for l in LogLevel}
+
 _CREATE_LOGS_TABLE = """
 CREATE TABLE IF NOT EXISTS logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -135,91 +164,528 @@ CREATE TABLE IF NOT EXISTS report_snapshots (
 """
 
 
+_SNAPSHOT_METRICS = (
+    "net_asset", "daily_pnl", "daily_return_pct", "total_signals", "total_orders", "buy_count", "sell_count",
+    "win_count", "loss_count", "win_rate", "best_trade_pnl", "worst_trade_pnl",
+    "symbols_traded", "analysis_summary", "raw_metrics",
+)
+
+
+def _upsert_sql(table: str, columns: tuple[str, ...], key: str) -> str:
+    """INSERT ... ON CONFLICT DO UPDATE (same syntax in SQLite and PostgreSQL, unlike INSERT OR REPLACE)."""
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in key.split(", "))
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    )
+
+
+_UPSERT_SNAPSHOT = _upsert_sql("daily_snapshots", ("date", *_SNAPSHOT_METRICS, "created_at"), "date")
+_UPSERT_REPORT = _upsert_sql(
+    "report_snapshots",
+    ("report_type", "period_key", *_SNAPSHOT_METRICS, "period_start", "period_end", "trading_days", "created_at"),
+    "report_type, period_key",
+)
+
+
+_CREATE_EPIC_STATS_TABLE = """
+CREATE TABLE IF NOT EXISTS epic_task_stats (
+    epic_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    cnt INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    duration_sec REAL NOT NULL DEFAULT 0,
+    timed_cnt INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (epic_id, status)
+)
+"""
+
+
+def _epic_stats_delta(row: str, sign: str) -> str:
+    """Trigger statement applying one task row (NEW/OLD) to epic_task_stats."""
+    timed = f"({row}.started_at IS NOT NULL AND {row}.completed_at IS NOT NULL)"
+    duration = f"CASE WHEN {timed} THEN (julianday({row}.completed_at) - julianday({row}.started_at)) * 86400.0 ELSE 0 END"
+    stmt = (
+        "INSERT INTO epic_task_stats (epic_id, status, cnt, cost_usd, duration_sec, timed_cnt) "
+        f"VALUES ({row}.epic_id, {row}.status, {sign}1, {sign}COALESCE({row}.cost_usd, 0), {sign}({duration}), {sign}{timed}) "
+        "ON CONFLICT(epic_id, status) DO UPDATE SET cnt = cnt + excluded.cnt, "
+        "cost_usd = cost_usd + excluded.cost_usd, duration_sec = duration_sec + excluded.duration_sec, "
+        "timed_cnt = timed_cnt + excluded.timed_cnt;"
+    )
+    if sign == "-":
+        stmt += f" DELETE FROM epic_task_stats WHERE epic_id = {row}.epic_id AND status = {row}.status AND cnt <= 0;"
+    return stmt
+
+
+# Keep epic_task_stats in step with tasks so epic listings never scan tasks
+_EPIC_STATS_COLUMNS = "status, epic_id, cost_usd, started_at, completed_at"
+_CREATE_EPIC_STATS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_epic_stats_insert AFTER INSERT ON tasks
+    WHEN NEW.epic_id IS NOT NULL BEGIN {_epic_stats_delta("NEW", "+")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_epic_stats_delete AFTER DELETE ON tasks
+    WHEN OLD.epic_id IS NOT NULL BEGIN {_epic_stats_delta("OLD", "-")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_epic_stats_update_old AFTER UPDATE OF {_EPIC_STATS_COLUMNS} ON tasks
+    WHEN OLD.epic_id IS NOT NULL BEGIN {_epic_stats_delta("OLD", "-")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_epic_stats_update_new AFTER UPDATE OF {_EPIC_STATS_COLUMNS} ON tasks
+    WHEN NEW.epic_id IS NOT NULL BEGIN {_epic_stats_delta("NEW", "+")} END""",
+)
+
+_REBUILD_EPIC_STATS = """
+INSERT INTO epic_task_stats (epic_id, status, cnt, cost_usd, duration_sec, timed_cnt)
+SELECT epic_id, status, COUNT(*), SUM(COALESCE(cost_usd, 0)),
+    SUM(CASE WHEN started_at IS NOT NULL AND completed_at IS NOT NULL
+        THEN (julianday(completed_at) - julianday(started_at)) * 86400.0 ELSE 0 END),
+    SUM(started_at IS NOT NULL AND completed_at IS NOT NULL)
+FROM tasks WHERE epic_id IS NOT NULL GROUP BY epic_id, status
+"""
+
+# PRs whose review comments are still being collected (one row per PR, survives restarts)
+_CREATE_REVIEW_WATCHES_TABLE = """
+CREATE TABLE IF NOT EXISTS review_watches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pr_url TEXT NOT NULL UNIQUE,
+    task_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    due_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    settling INTEGER DEFAULT 0,
+    created_at TEXT NOT NULL
+)
+"""
+
+# Timed phases and tool calls of each task attempt (append-only, written once per attempt)
+_CREATE_TASK_SPANS_TABLE = """
+CREATE TABLE IF NOT EXISTS task_spans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    attempt INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    duration_ms REAL NOT NULL,
+    detail TEXT DEFAULT ''
+)
+"""
+
+# One row per finished claude run that reported a cost (budget seeding; survives task deletes and reruns)
+_CREATE_SPEND_LEDGER_TABLE = """
+CREATE TABLE IF NOT EXISTS spend_ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER,
+    epic_id INTEGER,
+    target TEXT DEFAULT '',
+    cost_usd REAL NOT NULL,
+    recorded_at TEXT NOT NULL
+)
+"""
+
+# First start with the ledger: carry over costs already on tasks (their latest run each; timed by last update)
+_SEED_SPEND_LEDGER = (
+    "INSERT INTO spend_ledger (task_id, epic_id, target, cost_usd, recorded_at) "
+    "SELECT id, epic_id, target, cost_usd, COALESCE(completed_at, updated_at) FROM tasks "
+    "WHERE cost_usd IS NOT NULL AND NOT EXISTS (SELECT 1 FROM spend_ledger)"
+)
+
+# Daily analytics rollup, bumped as each task finishes so charts never scan tasks.
+# task_rollup_entries remembers what each finished task added, so a status change
+# away from (or between) done/failed can take exactly that contribution back out.
+_CREATE_TASK_ROLLUP_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup (
+        day TEXT NOT NULL,
+        dim TEXT NOT NULL,
+        key TEXT NOT NULL,
+        done INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        retried INTEGER NOT NULL DEFAULT 0,
+        retries INTEGER NOT NULL DEFAULT 0,
+        cost_usd REAL NOT NULL DEFAULT 0,
+        costed INTEGER NOT NULL DEFAULT 0,
+        duration_sec REAL NOT NULL DEFAULT 0,
+        timed INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dim, key, day)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup_durations (
+        day TEXT NOT NULL,
+        dim TEXT NOT NULL,
+        key TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        cnt INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dim, key, day, bucket)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup_entries (
+        task_id INTEGER PRIMARY KEY,
+        status TEXT NOT NULL,
+        completed_at TEXT,
+        day TEXT NOT NULL,
+        keys TEXT NOT NULL,
+        counters TEXT NOT NULL,
+        bucket INTEGER
+    )
+    """,
+)
+
+_BUMP_ROLLUP = (
+    f"INSERT INTO task_rollup (day, dim, key, {', '.join(ROLLUP_COUNTERS)}) "
+    f"VALUES (?, ?, ?, {', '.join('?' * len(ROLLUP_COUNTERS))}) ON CONFLICT (dim, key, day) DO UPDATE SET "
+    + ", ".join(f"{c} = task_rollup.{c} + excluded.{c}" for c in ROLLUP_COUNTERS)
+)
+_BUMP_ROLLUP_DURATION = (
+    "INSERT INTO task_rollup_durations (day, dim, key, bucket, cnt) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (dim, key, day, bucket) DO UPDATE SET cnt = task_rollup_durations.cnt + excluded.cnt"
+)
+
+# SQL bucket index for a span's duration_ms (same bucketing as analytics.duration_bucket)
+_SPAN_BUCKET = (
+    "CASE " + " ".join(f"WHEN duration_ms <= {b} THEN {i}" for i, b in enumerate(SPAN_BUCKETS_MS))
+    + f" ELSE {len(SPAN_BUCKETS_MS)} END"
+)
+
+_CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_epic_id ON tasks(epic_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_plan_id ON tasks(plan_id, task_order)",
+    "CREATE INDEX IF NOT EXISTS idx_logs_task_id ON logs(task_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_review_watches_due ON review_watches(due_at)",
+    "CREATE INDEX IF NOT EXISTS idx_task_spans_task_id ON task_spans(task_id, attempt)",
+    "CREATE INDEX IF NOT EXISTS idx_task_spans_started_at ON task_spans(started_at)",
+    "CREATE INDEX IF NOT EXISTS idx_spend_ledger_recorded_at ON spend_ledger(recorded_at)",
+)
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    """Queue wait (time to acquire) and busy time for one connection, in seconds."""
+
+    name: str
+    acquired: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    busy_total: float = 0.0
+
+    def record(self, wait: float, busy: float) -> None:
+        self.acquired += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.busy_total += busy
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "acquired": self.acquired,
+            "wait_avg_ms": round(self.wait_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "busy_ms": round(self.busy_total * 1000, 3),
+        }
+
+
 class Database:
-    def __init__(self, db_path: str = "data/tasks.db") -> None:
+    """Storage backend interface, implemented on SQLite (the default).
+
+    One writer connection plus a pool of read-only WAL reader connections.
+    Writes are serialized through transaction(); _fetchall/_fetchone run on an
+    idle reader so dashboard queries don't wait behind agent writes. A pool
+    size of 0 (or an in-memory database) sends reads to the writer.
+
+    All SQL goes through transaction(), _fetchall, _fetchone, _execute and
+    _executemany with qmark placeholders; other backends (PostgresDatabase)
+    override those primitives plus init/close and the dialect hooks.
+    """
+
+    # Dialect hooks: PostgresDatabase swaps these for ILIKE / FOR UPDATE SKIP LOCKED
+    _LIKE = "LIKE"
+    _SKIP_LOCKED = ""
+    # Several nodes share the queue (PostgreSQL): reset only this node's claims
+    _SHARED = False
+
+    def __init__(self, db_path: str = "data/tasks.db", read_pool_size: int = 4, *, node_id: str = "") -> None:
         self._db_path = db_path
+        self.node_id = node_id or socket.gethostname()
         self._db: aiosqlite.Connection | None = None
+        self._read_pool_size = 0 if db_path == ":memory:" else read_pool_size
+        self._readers: list[aiosqlite.Connection] = []
+        self._idle_readers: asyncio.Queue[int] = asyncio.Queue()
+        self._reader_stats: list[ConnectionStats] = []
+        self._writer_stats = ConnectionStats("writer")
+        self._tx_lock = asyncio.Lock()
+        self._tx_owner: asyncio.Task | None = None
+        self._pending_logs: list[tuple] = []
+        self._log_flush: asyncio.Future | None = None
+        self._listeners: list[Callable[[str], None]] = []
+        self._pending_notify: set[str] = set()
 
     async def init(self) -> None:
         Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
         self._db = await aiosqlite.connect(self._db_path)
         self._db.row_factory = aiosqlite.Row
-        await self._db.execute(_CREATE_TABLE)
-        await self._db.execute(_CREATE_LOGS_TABLE)
-        await self._db.execute(_CREATE_PLANS_TABLE)
-        await self._db.execute(_CREATE_EPICS_TABLE)
-        await self._db.execute(_CREATE_SNAPSHOTS_TABLE)
-        await self._db.execute(_CREATE_REPORT_SNAPSHOTS_TABLE)
-        await self._db.commit()
-        # Migrate daily_snapshots → report_snapshots
-        await self._migrate_daily_to_report_snapshots()
-        await self._db.commit()
-        # Migrate: add labels column if missing
-        async with self._db.execute("PRAGMA table_info(tasks)") as cur:
-            cols = {row[1] for row in await cur.fetchall()}
-        if "labels" not in cols:
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN labels TEXT DEFAULT '[]'")
-            await self._db.commit()
-        if "branch_name" not in cols:
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN branch_name TEXT DEFAULT ''")
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN pr_url TEXT DEFAULT ''")
-            await self._db.commit()
-        if "retry_count" not in cols:
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN retry_count INTEGER DEFAULT 0")
-            await self._db.commit()
-        if "plan_id" not in cols:
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN plan_id INTEGER")
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN target TEXT DEFAULT ''")
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN task_order INTEGER DEFAULT 0")
-            await self._db.commit()
-        if "epic_id" not in cols:
-            await self._db.execute("ALTER TABLE tasks ADD COLUMN epic_id INTEGER")
-            await self._db.commit()
-        # Migrate plans: add epic_id if missing
-        async with self._db.execute("PRAGMA table_info(plans)") as cur:
-            plan_cols = {row[1] for row in await cur.fetchall()}
-        if "epic_id" not in plan_cols:
-            await self._db.execute("ALTER TABLE plans ADD COLUMN epic_id INTEGER")
-            await self._db.commit()
+        if self._read_pool_size:
+            # WAL lets readers run alongside the writer; NORMAL skips the per-commit fsync
+            # (still crash-safe, only the last commits can be lost on power failure)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.execute("PRAGMA synchronous=NORMAL")
+        # Schema + migrations apply atomically (SQLite DDL is transactional)
+        async with self.transaction():
+            await self._db.execute(_CREATE_TABLE)
+            await self._db.execute(_CREATE_LOGS_TABLE)
+            await self._db.execute(_CREATE_PLANS_TABLE)
+            await self._db.execute(_CREATE_EPICS_TABLE)
+            await self._db.execute(_CREATE_SNAPSHOTS_TABLE)
+            await self._db.execute(_CREATE_REPORT_SNAPSHOTS_TABLE)
+            await self._db.execute(_CREATE_REVIEW_WATCHES_TABLE)
+            await self._db.execute(_CREATE_TASK_SPANS_TABLE)
+            await self._db.execute(_CREATE_SPEND_LEDGER_TABLE)
+            for stmt in _CREATE_TASK_ROLLUP_TABLES:
+                await self._db.execute(stmt)
+            # Migrate daily_snapshots → report_snapshots
+            await self._migrate_daily_to_report_snapshots()
+            # Migrate: add labels column if missing
+            async with self._db.execute("PRAGMA table_info(tasks)") as cur:
+                cols = {row[1] for row in await cur.fetchall()}
+            if "labels" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN labels TEXT DEFAULT '[]'")
+            if "branch_name" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN branch_name TEXT DEFAULT ''")
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN pr_url TEXT DEFAULT ''")
+            if "retry_count" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN retry_count INTEGER DEFAULT 0")
+            if "plan_id" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN plan_id INTEGER")
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN target TEXT DEFAULT ''")
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN task_order INTEGER DEFAULT 0")
+            if "epic_id" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN epic_id INTEGER")
+            if "claimed_by" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN claimed_by TEXT DEFAULT ''")
+            if "deadline" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN deadline TEXT")
+            if "not_before" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN not_before TEXT")
+            if "session_id" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN session_id TEXT DEFAULT ''")
+            if "finished_at" not in cols:
+                await self._db.execute("ALTER TABLE tasks ADD COLUMN finished_at TEXT")
+            # Migrate plans: add epic_id if missing
+            async with self._db.execute("PRAGMA table_info(plans)") as cur:
+                plan_cols = {row[1] for row in await cur.fetchall()}
+            if "epic_id" not in plan_cols:
+                await self._db.execute("ALTER TABLE plans ADD COLUMN epic_id INTEGER")
+            for stmt in _CREATE_INDEXES:
+                await self._db.execute(stmt)
+            # Epic stats counter table: rebuilt once at startup, then trigger-maintained
+            await self._db.execute(_CREATE_EPIC_STATS_TABLE)
+            for stmt in _CREATE_EPIC_STATS_TRIGGERS:
+                await self._db.execute(stmt)
+            await self._db.execute("DELETE FROM epic_task_stats")
+            await self._db.execute(_REBUILD_EPIC_STATS)
+            await self._db.execute(_SEED_SPEND_LEDGER)
+            await self._backfill_task_rollup()
+        await self._open_readers()
+
+    async def _open_readers(self) -> None:
+        uri = f"{Path(self._db_path).resolve().as_uri()}?mode=ro"
+        self._idle_readers = asyncio.Queue()
+        for i in range(self._read_pool_size):
+            conn = await aiosqlite.connect(uri, uri=True, isolation_level=None)
+            conn.row_factory = aiosqlite.Row
+            self._readers.append(conn)
+            self._reader_stats.append(ConnectionStats(f"reader-{i}"))
+            self._idle_readers.put_nowait(i)
 
     async def close(self) -> None:
+        if self._log_flush is not None and not self._log_flush.done():
+            await self._log_flush
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        self._reader_stats.clear()
         if self._db:
             await self._db.close()
             self._db = None
 
-    def _row_to_task(self, row: aiosqlite.Row) -> Task:
-        d = dict(row)
-        d["labels"] = json.loads(d.get("labels") or "[]")
-        return Task(**d)
+    def pool_stats(self) -> dict:
+        """Queue-wait metrics for the writer lock and each reader connection."""
+        return {
+            "writer": self._writer_stats.to_dict(),
+            "readers": [st.to_dict() for st in self._reader_stats],
+            "idle_readers": self._idle_readers.qsize(),
+        }
+
+    # ── Change notifications ──
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Call callback(channel) after a transaction that touched channel commits (on any node for Postgres)."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, channel: str) -> None:
+        """Queue a notification for the current transaction; dropped on rollback."""
+        self._pending_notify.add(channel)
+
+    def _dispatch(self, channels: set[str]) -> None:
+        for channel in channels:
+            for callback in list(self._listeners):
+                try:
+                    callback(channel)
+                except Exception:
+                    logger.exception("Database listener failed for %s", channel)
+
+    # ── Backend primitives (PostgresDatabase overrides these) ──
+
+    def _owns_transaction(self) -> bool:
+        return self._tx_owner is not None and self._tx_owner is asyncio.current_task()
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """An idle reader; inside our own transaction the writer, so reads see its changes."""
+        if not self._readers or self._owns_transaction():
+            yield self._db
+            return
+        requested = time.perf_counter()
+        idx = await self._idle_readers.get()
+        acquired = time.perf_counter()
+        try:
+            yield self._readers[idx]
+        finally:
+            self._idle_readers.put_nowait(idx)
+            self._reader_stats[idx].record(acquired - requested, time.perf_counter() - acquired)
+
+    async def _fetchall(self, sql: str, params: tuple | list = ()) -> list:
+        started = time.perf_counter()
+        try:
+            async with self._connection() as conn:
+                async with conn.execute(sql, params) as cur:
+                    return await cur.fetchall()
+        finally:
+            metrics.observe_query(sql, started)
+
+    async def _fetchone(self, sql: str, params: tuple | list = ()) -> aiosqlite.Row | None:
+        started = time.perf_counter()
+        try:
+            async with self._connection() as conn:
+                async with conn.execute(sql, params) as cur:
+                    return await cur.fetchone()
+        finally:
+            metrics.observe_query(sql, started)
+
+    async def _execute(self, sql: str, params: tuple | list = ()) -> int:
+        """Run one write statement (joining the current transaction if any); returns rowcount."""
+        started = time.perf_counter()
+        try:
+            async with self.transaction():
+                cursor = await self._db.execute(sql, params)
+        finally:
+            metrics.observe_query(sql, started)
+        return cursor.rowcount
 
-    async def create_task(self, data: TaskCreate) -> Task:
-        now = _now_iso()
-        cursor = await self._db.execute(
-            "INSERT INTO tasks (title, description, priority, status, labels, epic_id, target, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (data.title, data.description, data.priority.value, TaskStatus.PENDING.value, json.dumps(data.labels), data.epic_id, data.target, now, now),
+    async def _executemany(self, sql: str, rows: list[tuple]) -> None:
+        started = time.perf_counter()
+        try:
+            async with self.transaction():
+                await self._db.executemany(sql, rows)
+        finally:
+            metrics.observe_query(sql, started)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Unit of work: statements inside commit once together, or roll back on error.
+
+        Nested calls from the same asyncio task join the outer transaction.
+        Writers in other tasks wait on the lock, so their statements never
+        land inside someone else's transaction. Reads do not take the lock.
+        """
+        if self._owns_transaction():
+            yield
+            return
+        requested = time.perf_counter()
+        async with self._tx_lock:
+            acquired = time.perf_counter()
+            self._tx_owner = asyncio.current_task()
+            self._pending_notify = set()
+            try:
+                try:
+                    await self._db.execute("BEGIN IMMEDIATE")
+                    yield
+                except BaseException:
+                    # Also covers cancellation while BEGIN is queued: the worker thread
+                    # still runs it, so roll back (a no-op if it never started).
+                    await self._db.rollback()
+                    raise
+                await self._db.commit()
+                notify, self._pending_notify = self._pending_notify, set()
+            finally:
+                self._tx_owner = None
+                self._writer_stats.record(acquired - requested, time.perf_counter() - acquired)
+        self._dispatch(notify)
+
+    def _row_to_task(self, row: aiosqlite.Row) -> TaskRecord:
+        rec = TaskRecord(*row)
+        rec.status = _TASK_STATUS[rec.status]
+        rec.priority = _TASK_PRIORITY[rec.priority]
+        labels = rec.labels
+        rec.labels = json.loads(labels) if labels and labels != "[]" else []
+        return rec
+
+    async def _insert_tasks(self, rows: list[tuple]) -> list[TaskRecord]:
+        """Multi-row INSERT ... RETURNING (rows in _INSERT_TASK_COLUMNS order)."""
+        created: list[TaskRecord] = []
+        async with self.transaction():
+            for start in range(0, len(rows), _BULK_CHUNK):
+                chunk = rows[start:start + _BULK_CHUNK]
+                values = ", ".join([_INSERT_TASK_PLACEHOLDERS] * len(chunk))
+                params = [v for row in chunk for v in row]
+                returned = await self._fetchall(
+                    f"INSERT INTO tasks ({_INSERT_TASK_COLUMNS}) VALUES {values} RETURNING {_TASK_COLUMNS}", params
+                )
+                created.extend(self._row_to_task(r) for r in returned)
+            self._notify(NOTIFY_TASKS)
+        # RETURNING order is unspecified; ids follow VALUES order
+        created.sort(key=lambda t: t.id)
+        return created
+
+    @staticmethod
+    def _task_create_row(data: TaskCreate, now: str) -> tuple:
+        return (
+            data.title, data.description, data.priority.value, TaskStatus.PENDING.value, json.dumps(data.labels),
+            data.epic_id, data.target, data.deadline, None, 0, now, now,
         )
-        await self._db.commit()
-        return await self.get_task(cursor.lastrowid)
 
-    async def get_task(self, task_id: int) -> Task | None:
-        async with self._db.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)) as cur:
-            row = await cur.fetchone()
-            return self._row_to_task(row) if row else None
+    async def create_task(self, data: TaskCreate) -> TaskRecord:
+        async with self.transaction():
+            created = await self._insert_tasks([self._task_create_row(data, _now_iso())])
+        return created[0]
+
+    async def bulk_create_tasks(self, items: list[TaskCreate]) -> list[TaskRecord]:
+        """Create many tasks in one transaction."""
+        if not items:
+            return []
+        now = _now_iso()
+        async with self.transaction():
+            created = await self._insert_tasks([self._task_create_row(d, now) for d in items])
+        return created
+
+    async def get_task(self, task_id: int) -> TaskRecord | None:
+        row = await self._fetchone(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,))
+        return self._row_to_task(row) if row else None
 
-    async def list_tasks(self, status: TaskStatus | None = None, label: str | None = None, search: str | None = None, *, plan_id: int | None | str = "unset", epic_id: int | None | str = "unset") -> list[Task]:
+    def _task_filters(
+        self,
+        status: TaskStatus | None = None,
+        label: str | None = None,
+        search: str | None = None,
+        *,
+        plan_id: int | None | str = "unset",
+        epic_id: int | None | str = "unset",
+    ) -> tuple[str, list]:
+        """Build the WHERE clause shared by list_tasks and tasks_version."""
         # plan_id filtering: "unset" = no filter, None = quick tasks only, int = specific plan
         # epic_id filtering: "unset" = no filter, None = tasks without epic, int = specific epic
-        # 정렬: 활성(in_progress/waiting) → pending → 완료(done/failed), 각 그룹 내 priority DESC
-        order = """ORDER BY
-            CASE status
-                WHEN 'in_progress' THEN 0
-                WHEN 'waiting_approval' THEN 1
-                WHEN 'pending' THEN 2
-                WHEN 'failed' THEN 3
-                WHEN 'done' THEN 4
-                WHEN 'cancelled' THEN 5
-            END,
-            priority DESC, created_at ASC"""
         conditions: list[str] = []
         params: list = []
         if plan_id == "unset":
@@ -241,21 +707,42 @@ class Database:
             params.append(status.value)
         if label:
             # JSON array contains the label string (e.g. '["bug","feat"]' LIKE '%"bug"%')
-            conditions.append("labels LIKE ?")
+            conditions.append(f"labels {self._LIKE} ?")
             params.append(f'%"{label}"%')
         if search:
-            conditions.append("(title LIKE ? OR description LIKE ?)")
+            conditions.append(f"(title {self._LIKE} ? OR description {self._LIKE} ?)")
             params.extend([f"%{search}%", f"%{search}%"])
         where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-        sql = f"SELECT * FROM tasks {where} {order}"
-        async with self._db.execute(sql, tuple(params)) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_task(r) for r in rows]
-
-    async def update_task(self, task_id: int, data: TaskUpdate) -> Task | None:
-        task = await self.get_task(task_id)
-        if not task:
-            return None
+        return where, params
+
+    async def list_tasks(self, status: TaskStatus | None = None, label: str | None = None, search: str | None = None, *, plan_id: int | None | str = "unset", epic_id: int | None | str = "unset") -> list[TaskRecord]:
+        # 정렬: 활성(in_progress/waiting) → pending → 완료(done/failed), 각 그룹 내 priority DESC
+        order = """ORDER BY
+            CASE status
+                WHEN 'in_progress' THEN 0
+                WHEN 'waiting_approval' THEN 1
+                WHEN 'pending' THEN 2
+                WHEN 'failed' THEN 3
+                WHEN 'done' THEN 4
+                WHEN 'cancelled' THEN 5
+            END,
+            priority DESC, created_at ASC"""
+        where, params = self._task_filters(status, label, search, plan_id=plan_id, epic_id=epic_id)
+        sql = f"SELECT {_TASK_COLUMNS} FROM tasks {where} {order}"
+        rows = await self._fetchall(sql, tuple(params))
+        return [self._row_to_task(r) for r in rows]
+
+    async def tasks_version(self, status: TaskStatus | None = None, label: str | None = None, search: str | None = None, *, plan_id: int | None | str = "unset", epic_id: int | None | str = "unset") -> tuple:
+        """(row count, max(updated_at)) of the list_tasks result set — the list's ETag source."""
+        where, params = self._task_filters(status, label, search, plan_id=plan_id, epic_id=epic_id)
+        return await self._version(f"SELECT COUNT(*), MAX(updated_at) FROM tasks {where}", tuple(params))
+
+    async def _version(self, sql: str, params: tuple = ()) -> tuple:
+        row = await self._fetchone(sql, params)
+        return tuple(row)
+
+    @staticmethod
+    def _task_update_sets(data: TaskUpdate) -> tuple[list[str], list]:
         updates: list[str] = []
         values: list = []
         if data.title is not None:
@@ -270,6 +757,9 @@ class Database:
         if data.status is not None:
             updates.append("status = ?")
             values.append(data.status.value)
+            if data.status in _FINAL_STATUSES:
+                updates.append("completed_at = COALESCE(completed_at, ?)")
+                values.append(_now_iso())
         if data.labels is not None:
             updates.append("labels = ?")
             values.append(json.dumps(data.labels))
@@ -279,116 +769,297 @@ class Database:
         if data.target is not None:
             updates.append("target = ?")
             values.append(data.target)
+        if data.deadline is not None:
+            updates.append("deadline = ?")
+            values.append(data.deadline or None)
+        return updates, values
+
+    async def update_task(self, task_id: int, data: TaskUpdate) -> TaskRecord | None:
+        updates, values = self._task_update_sets(data)
         if not updates:
-            return task
+            return await self.get_task(task_id)
         updates.append("updated_at = ?")
         values.append(_now_iso())
         values.append(task_id)
-        await self._db.execute(
-            f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?", values
-        )
-        await self._db.commit()
-        return await self.get_task(task_id)
+        async with self.transaction():
+            row = await self._fetchone(
+                f"UPDATE tasks SET {', '.join(updates)} WHERE id = ? RETURNING {_TASK_COLUMNS}", values
+            )
+            if row and data.status is not None:
+                await self._sync_rollup([task_id])
+            if data.status == TaskStatus.PENDING:
+                self._notify(NOTIFY_TASKS)
+        return self._row_to_task(row) if row else None
+
+    async def bulk_update_tasks(self, task_ids: list[int], data: TaskUpdate) -> list[TaskRecord]:
+        """Apply one patch to many tasks in one transaction. Returns the updated rows (missing ids skipped)."""
+        if not task_ids:
+            return []
+        updates, values = self._task_update_sets(data)
+        if not updates:
+            return await self._get_tasks_by_ids(task_ids)
+        updates.append("updated_at = ?")
+        values.append(_now_iso())
+        updated: list[TaskRecord] = []
+        async with self.transaction():
+            for start in range(0, len(task_ids), _BULK_CHUNK):
+                chunk = task_ids[start:start + _BULK_CHUNK]
+                marks = ", ".join("?" * len(chunk))
+                rows = await self._fetchall(
+                    f"UPDATE tasks SET {', '.join(updates)} WHERE id IN ({marks}) RETURNING {_TASK_COLUMNS}",
+                    [*values, *chunk],
+                )
+                updated.extend(self._row_to_task(r) for r in rows)
+            if data.status is not None:
+                await self._sync_rollup([t.id for t in updated])
+            if data.status == TaskStatus.PENDING:
+                self._notify(NOTIFY_TASKS)
+        updated.sort(key=lambda t: t.id)
+        return updated
+
+    async def _get_tasks_by_ids(self, task_ids: list[int]) -> list[TaskRecord]:
+        found: list[TaskRecord] = []
+        for start in range(0, len(task_ids), _BULK_CHUNK):
+            chunk = task_ids[start:start + _BULK_CHUNK]
+            marks = ", ".join("?" * len(chunk))
+            rows = await self._fetchall(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id IN ({marks}) ORDER BY id", chunk)
+            found.extend(self._row_to_task(r) for r in rows)
+        return found
 
     async def delete_task(self, task_id: int) -> bool:
-        cursor = await self._db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        await self._db.commit()
-        return cursor.rowcount > 0
+        return await self._execute("DELETE FROM tasks WHERE id = ?", (task_id,)) > 0
 
-    async def pick_next_pending(self, min_priority: int = 0, epic_id: int | None = None) -> Task | None:
-        conditions = ["status = ?", "priority >= ?", "plan_id IS NULL"]
-        params: list = [TaskStatus.PENDING.value, min_priority]
+    async def delete_tasks(
+        self,
+        task_ids: list[int] | None = None,
+        *,
+        status: TaskStatus | None = None,
+        label: str | None = None,
+        search: str | None = None,
+        plan_id: int | None | str = "unset",
+        epic_id: int | None | str = "unset",
+    ) -> list[int]:
+        """Delete tasks matching ids and/or list_tasks-style filters in one statement. Returns deleted ids."""
+        where, params = self._task_filters(status, label, search, plan_id=plan_id, epic_id=epic_id)
+        if task_ids is not None:
+            if not task_ids:
+                return []
+            marks = ", ".join("?" * len(task_ids))
+            where = f"{where} AND id IN ({marks})" if where else f"WHERE id IN ({marks})"
+            params.extend(task_ids)
+        if not where:
+            raise ValueError("delete_tasks requires ids or at least one filter")
+        async with self.transaction():
+            rows = await self._fetchall(f"DELETE FROM tasks {where} RETURNING id", params)
+            deleted = sorted(r[0] for r in rows)
+        return deleted
+
+    async def pick_next_pending(self, min_priority: int = 0, epic_id: int | None = None) -> TaskRecord | None:
+        where, params = self._pending_filters(min_priority, epic_id, _now_iso())
+        sql = f"SELECT {_TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY priority DESC, created_at ASC LIMIT 1"
+        row = await self._fetchone(sql, tuple(params))
+        return self._row_to_task(row) if row else None
+
+    @staticmethod
+    def _pending_filters(min_priority: int, epic_id: int | None, now: str) -> tuple[str, list]:
+        # Tasks backing off after a failed run stay pending but are skipped until not_before
+        conditions = ["status = ?", "priority >= ?", "plan_id IS NULL", "(not_before IS NULL OR not_before <= ?)"]
+        params: list = [TaskStatus.PENDING.value, min_priority, now]
         if epic_id is not None:
             conditions.append("epic_id = ?")
             params.append(epic_id)
-        sql = f"SELECT * FROM tasks WHERE {' AND '.join(conditions)} ORDER BY priority DESC, created_at ASC LIMIT 1"
-        async with self._db.execute(sql, tuple(params)) as cur:
-            row = await cur.fetchone()
-            return self._row_to_task(row) if row else None
+        return " AND ".join(conditions), params
+
+    async def claim_next_pending(
+        self, min_priority: int = 0, epic_id: int | None = None, *, due_before: str | None = None
+    ) -> TaskRecord | None:
+        """Atomically pick the next pending task and mark it in_progress for this node.
+
+        Order is priority, then age; with due_before, tasks whose deadline falls
+        before it go first, earliest deadline first. Safe with several nodes on
+        one queue: on PostgreSQL the candidate row is locked with FOR UPDATE
+        SKIP LOCKED, so concurrent claimers take different tasks.
+        """
+        now = _now_iso()
+        where, params = self._pending_filters(min_priority, epic_id, now)
+        order = "priority DESC, created_at ASC"
+        if due_before is not None:
+            order = "CASE WHEN deadline <= ? THEN deadline ELSE '~' END, " + order
+            params.append(due_before)
+        async with self.transaction():
+            row = await self._fetchone(
+                "UPDATE tasks SET status = ?, claimed_by = ?, started_at = ?, updated_at = ?, not_before = NULL, finished_at = NULL "
+                "WHERE id = ("
+                f"SELECT id FROM tasks WHERE {where} "
+                f"ORDER BY {order} LIMIT 1{self._SKIP_LOCKED}) RETURNING {_TASK_COLUMNS}",
+                (TaskStatus.IN_PROGRESS.value, self.node_id, now, now, *params),
+            )
+        return self._row_to_task(row) if row else None
+
+    async def list_pending_candidates(
+        self, min_priority: int = 0, epic_id: int | None = None, *, limit: int = 1000
+    ) -> list[TaskRecord]:
+        """Oldest pending tasks eligible for the agent loop, for schedulers that rank in Python."""
+        where, params = self._pending_filters(min_priority, epic_id, _now_iso())
+        rows = await self._fetchall(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY created_at ASC, id ASC LIMIT ?", (*params, limit)
+        )
+        return [self._row_to_task(r) for r in rows]
+
+    async def claim_task(self, task_id: int) -> TaskRecord | None:
+        """Mark one pending task in_progress for this node; None if it is no longer pending (claimed elsewhere)."""
+        now = _now_iso()
+        async with self.transaction():
+            row = await self._fetchone(
+                "UPDATE tasks SET status = ?, claimed_by = ?, started_at = ?, updated_at = ?, not_before = NULL, finished_at = NULL "
+                f"WHERE id = ? AND status = ? RETURNING {_TASK_COLUMNS}",
+                (TaskStatus.IN_PROGRESS.value, self.node_id, now, now, task_id, TaskStatus.PENDING.value),
+            )
+        return self._row_to_task(row) if row else None
 
     async def set_task_started(self, task_id: int, branch_name: str = "") -> None:
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, started_at = ?, branch_name = ?, updated_at = ? WHERE id = ?",
-            (TaskStatus.IN_PROGRESS.value, now, branch_name, now, task_id),
+        await self._execute(
+            "UPDATE tasks SET status = ?, started_at = ?, branch_name = ?, claimed_by = ?, updated_at = ?, not_before = NULL, "
+            "finished_at = NULL, error = '' WHERE id = ?",
+            (TaskStatus.IN_PROGRESS.value, now, branch_name, self.node_id, now, task_id),
         )
-        await self._db.commit()
+
+    async def set_task_session(self, task_id: int, session_id: str) -> None:
+        await self._execute("UPDATE tasks SET session_id = ? WHERE id = ?", (session_id, task_id))
 
     async def set_task_pr(self, task_id: int, pr_url: str) -> None:
         now = _now_iso()
-        await self._db.execute(
+        await self._execute(
             "UPDATE tasks SET pr_url = ?, updated_at = ? WHERE id = ?",
             (pr_url, now, task_id),
         )
-        await self._db.commit()
 
     async def set_task_waiting(self, task_id: int, output: str, exit_code: int, cost_usd: float | None) -> None:
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, output = ?, exit_code = ?, cost_usd = ?, updated_at = ? WHERE id = ?",
-            (TaskStatus.WAITING_APPROVAL.value, output, exit_code, cost_usd, now, task_id),
+        await self._execute(
+            "UPDATE tasks SET status = ?, output = ?, exit_code = ?, cost_usd = ?, approval_status = '', finished_at = ?, "
+            "updated_at = ? WHERE id = ?",
+            (TaskStatus.WAITING_APPROVAL.value, output, exit_code, cost_usd, now, now, task_id),
         )
-        await self._db.commit()
 
-    async def set_task_done(self, task_id: int) -> None:
+    async def decide_approval(self, task_id: int, approved: bool) -> TaskRecord | None:
+        """Record a review decision on a waiting_approval task; None if it is not awaiting one (or already decided)."""
+        async with self.transaction():
+            row = await self._fetchone(
+                "UPDATE tasks SET approval_status = ?, updated_at = ? "
+                f"WHERE id = ? AND status = ? AND approval_status = '' RETURNING {_TASK_COLUMNS}",
+                ("approved" if approved else "rejected", _now_iso(), task_id, TaskStatus.WAITING_APPROVAL.value),
+            )
+        return self._row_to_task(row) if row else None
+
+    async def set_task_done(self, task_id: int, cost_usd: float | None = None) -> None:
+        """Mark done (cost_usd, when given, records the final run's cost) and count it in the analytics rollup."""
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, completed_at = ?, approval_status = 'approved', updated_at = ? WHERE id = ?",
-            (TaskStatus.DONE.value, now, now, task_id),
-        )
-        await self._db.commit()
+        async with self.transaction():
+            count = await self._execute(
+                "UPDATE tasks SET status = ?, completed_at = ?, approval_status = 'approved', "
+                "cost_usd = COALESCE(?, cost_usd), finished_at = COALESCE(finished_at, ?), updated_at = ? WHERE id = ?",
+                (TaskStatus.DONE.value, now, cost_usd, now, now, task_id),
+            )
+            if count:
+                await self._sync_rollup([task_id])
 
     async def increment_retry_count(self, task_id: int) -> int:
         """Increment retry_count and return the new value."""
-        now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET retry_count = retry_count + 1, updated_at = ? WHERE id = ?",
-            (now, task_id),
-        )
-        await self._db.commit()
-        task = await self.get_task(task_id)
-        return task.retry_count if task else 0
+        async with self.transaction():
+            row = await self._fetchone(
+                "UPDATE tasks SET retry_count = retry_count + 1, updated_at = ? WHERE id = ? RETURNING retry_count",
+                (_now_iso(), task_id),
+            )
+        return row[0] if row else 0
 
-    async def set_task_failed(self, task_id: int, error: str) -> None:
+    async def set_task_failed(self, task_id: int, error: str, cost_usd: float | None = None) -> None:
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, error = ?, completed_at = ?, updated_at = ? WHERE id = ?",
-            (TaskStatus.FAILED.value, error, now, now, task_id),
-        )
-        await self._db.commit()
+        async with self.transaction():
+            count = await self._execute(
+                "UPDATE tasks SET status = ?, error = ?, completed_at = ?, cost_usd = COALESCE(?, cost_usd), "
+                "finished_at = COALESCE(finished_at, ?), updated_at = ? WHERE id = ?",
+                (TaskStatus.FAILED.value, error, now, cost_usd, now, now, task_id),
+            )
+            if count:
+                await self._sync_rollup([task_id])
 
     async def set_task_rejected(self, task_id: int, feedback: str) -> None:
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, approval_status = 'rejected', rejection_feedback = ?, updated_at = ? WHERE id = ?",
-            (TaskStatus.PENDING.value, feedback, now, task_id),
-        )
-        await self._db.commit()
+        async with self.transaction():
+            await self._execute(
+                "UPDATE tasks SET status = ?, approval_status = 'rejected', rejection_feedback = ?, updated_at = ? WHERE id = ?",
+                (TaskStatus.PENDING.value, feedback, now, task_id),
+            )
+            self._notify(NOTIFY_TASKS)
 
-    async def retry_task(self, task_id: int) -> Task | None:
+    async def retry_task(self, task_id: int) -> TaskRecord | None:
         """Reset a failed/done task back to pending, clearing execution artifacts."""
-        task = await self.get_task(task_id)
-        if not task:
-            return None
-        now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET status = ?, started_at = NULL, completed_at = NULL, "
-            "output = '', error = '', exit_code = NULL, cost_usd = NULL, "
-            "approval_status = '', rejection_feedback = '', updated_at = ? WHERE id = ?",
-            (TaskStatus.PENDING.value, now, task_id),
+        async with self.transaction():
+            row = await self._fetchone(
+                "UPDATE tasks SET status = ?, started_at = NULL, completed_at = NULL, finished_at = NULL, "
+                "output = '', error = '', exit_code = NULL, cost_usd = NULL, not_before = NULL, session_id = '', "
+                f"approval_status = '', rejection_feedback = '', updated_at = ? WHERE id = ? RETURNING {_TASK_COLUMNS}",
+                (TaskStatus.PENDING.value, _now_iso(), task_id),
+            )
+            if row:
+                await self._sync_rollup([task_id])  # leaving done/failed takes the task's counts back out
+            self._notify(NOTIFY_TASKS)
+        return self._row_to_task(row) if row else None
+
+    async def requeue_task(self, task_id: int, not_before: str | None = None, error: str = "") -> None:
+        """Put a claimed task back to pending (retry_count untouched), optionally not claimable before not_before."""
+        async with self.transaction():
+            await self._execute(
+                "UPDATE tasks SET status = ?, started_at = NULL, claimed_by = '', not_before = ?, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (TaskStatus.PENDING.value, not_before, error, _now_iso(), task_id),
+            )
+            self._notify(NOTIFY_TASKS)
+
+    async def record_spend(
+        self, cost: float, *, task_id: int | None = None, epic_id: int | None = None, target: str = ""
+    ) -> None:
+        """Append one finished run's cost to the spend ledger."""
+        await self._execute(
+            "INSERT INTO spend_ledger (task_id, epic_id, target, cost_usd, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            (task_id, epic_id, target, cost, _now_iso()),
         )
-        await self._db.commit()
-        return await self.get_task(task_id)
+
+    async def spend_since(self, since: str = "") -> list[tuple[int | None, str, float, int]]:
+        """(epic_id, target, cost, runs) from ledger entries recorded at or after since (all of them by default)."""
+        rows = await self._fetchall(
+            "SELECT epic_id, target, SUM(cost_usd), COUNT(*) FROM spend_ledger "
+            "WHERE recorded_at >= ? GROUP BY epic_id, target",
+            (since,),
+        )
+        return [(r[0], r[1] or "", r[2], r[3]) for r in rows]
+
+    async def count_tasks_by_status(self) -> dict[str, int]:
+        rows = await self._fetchall("SELECT status, COUNT(*) FROM tasks GROUP BY status")
+        return {r[0]: r[1] for r in rows}
 
     async def reset_stuck_tasks(self) -> int:
-        """Reset in_progress/waiting_approval tasks back to pending (e.g. after crash/stop)."""
+        """Reset in_progress tasks back to pending (e.g. after crash/stop).
+
+        Tasks awaiting approval keep their state (reviews survive restarts). A
+        SQLite database belongs to one node, so every in_progress task is reset
+        even if the hostname (default node_id) changed since it was claimed. On
+        a shared database only this node's claims are reset; a dead node's are
+        released by the other nodes once its heartbeat lapses.
+        """
         now = _now_iso()
-        cursor = await self._db.execute(
-            "UPDATE tasks SET status = ?, updated_at = ? WHERE status IN (?, ?)",
-            (TaskStatus.PENDING.value, now, TaskStatus.IN_PROGRESS.value, TaskStatus.WAITING_APPROVAL.value),
-        )
-        await self._db.commit()
-        return cursor.rowcount
+        sql = "UPDATE tasks SET status = ?, updated_at = ? WHERE status = ?"
+        params: list = [TaskStatus.PENDING.value, now, TaskStatus.IN_PROGRESS.value]
+        if self._SHARED:
+            sql += " AND claimed_by IN ('', ?)"
+            params.append(self.node_id)
+        async with self.transaction():
+            count = await self._execute(sql, params)
+            if count:
+                self._notify(NOTIFY_TASKS)
+        return count
 
     # ── Plans ──
 
@@ -399,17 +1070,17 @@ class Database:
 
     async def create_plan(self, data: PlanCreate) -> Plan:
         now = _now_iso()
-        cursor = await self._db.execute(
-            "INSERT INTO plans (title, spec, targets, status, epic_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (data.title, data.spec, json.dumps(data.targets), PlanStatus.DRAFT.value, data.epic_id, now, now),
-        )
-        await self._db.commit()
-        return await self.get_plan(cursor.lastrowid)
+        async with self.transaction():
+            row = await self._fetchone(
+                "INSERT INTO plans (title, spec, targets, status, epic_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING *",
+                (data.title, data.spec, json.dumps(data.targets), PlanStatus.DRAFT.value, data.epic_id, now, now),
+            )
+        return self._row_to_plan(row)
 
     async def get_plan(self, plan_id: int) -> Plan | None:
-        async with self._db.execute("SELECT * FROM plans WHERE id = ?", (plan_id,)) as cur:
-            row = await cur.fetchone()
-            return self._row_to_plan(row) if row else None
+        row = await self._fetchone("SELECT * FROM plans WHERE id = ?", (plan_id,))
+        return self._row_to_plan(row) if row else None
 
     async def list_plans(self, status: PlanStatus | None = None) -> list[Plan]:
         if status:
@@ -418,9 +1089,21 @@ class Database:
         else:
             sql = "SELECT * FROM plans ORDER BY created_at DESC"
             params = ()
-        async with self._db.execute(sql, params) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_plan(r) for r in rows]
+        rows = await self._fetchall(sql, params)
+        return [self._row_to_plan(r) for r in rows]
+
+    async def plans_version(self, status: PlanStatus | None = None) -> tuple:
+        if status:
+            return await self._version("SELECT COUNT(*), MAX(updated_at) FROM plans WHERE status = ?", (status.value,))
+        return await self._version("SELECT COUNT(*), MAX(updated_at) FROM plans")
+
+    async def plan_version(self, plan_id: int) -> tuple:
+        """(plan updated_at, task count, max task updated_at); updated_at is None if the plan is missing."""
+        return await self._version(
+            "SELECT MAX(p.updated_at), COUNT(t.id), MAX(t.updated_at) FROM plans p "
+            "LEFT JOIN tasks t ON t.plan_id = p.id WHERE p.id = ?",
+            (plan_id,),
+        )
 
     async def update_plan(self, plan_id: int, data: PlanUpdate) -> Plan | None:
         plan = await self.get_plan(plan_id)
@@ -448,62 +1131,71 @@ class Database:
         updates.append("updated_at = ?")
         values.append(_now_iso())
         values.append(plan_id)
-        await self._db.execute(
-            f"UPDATE plans SET {', '.join(updates)} WHERE id = ?", values
-        )
-        await self._db.commit()
-        return await self.get_plan(plan_id)
+        async with self.transaction():
+            row = await self._fetchone(
+                f"UPDATE plans SET {', '.join(updates)} WHERE id = ? RETURNING *", values
+            )
+        return self._row_to_plan(row) if row else None
 
     async def delete_plan(self, plan_id: int) -> bool:
-        cursor = await self._db.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
-        await self._db.commit()
-        return cursor.rowcount > 0
+        return await self._execute("DELETE FROM plans WHERE id = ?", (plan_id,)) > 0
 
     async def set_plan_status(self, plan_id: int, status: PlanStatus) -> None:
         now = _now_iso()
-        await self._db.execute(
+        await self._execute(
             "UPDATE plans SET status = ?, updated_at = ? WHERE id = ?",
             (status.value, now, plan_id),
         )
-        await self._db.commit()
 
     # ── Plan Tasks ──
 
-    async def get_plan_tasks(self, plan_id: int) -> list[Task]:
-        async with self._db.execute(
-            "SELECT * FROM tasks WHERE plan_id = ? ORDER BY task_order ASC, id ASC",
+    async def get_plan_tasks(self, plan_id: int) -> list[TaskRecord]:
+        rows = await self._fetchall(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE plan_id = ? ORDER BY task_order ASC, id ASC",
             (plan_id,),
-        ) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_task(r) for r in rows]
+        )
+        return [self._row_to_task(r) for r in rows]
 
     async def create_plan_task(
         self, plan_id: int, title: str, description: str, target: str, task_order: int, *, epic_id: int | None = None
-    ) -> Task:
+    ) -> TaskRecord:
+        created = await self.create_plan_tasks(plan_id, [(title, description, target)], epic_id=epic_id, start_order=task_order)
+        return created[0]
+
+    async def create_plan_tasks(
+        self,
+        plan_id: int,
+        items: list[tuple[str, str, str]],
+        *,
+        epic_id: int | None = None,
+        start_order: int = 0,
+    ) -> list[TaskRecord]:
+        """Create a plan's (title, description, target) tasks in order, in one transaction."""
+        if not items:
+            return []
         now = _now_iso()
-        cursor = await self._db.execute(
-            "INSERT INTO tasks (title, description, priority, status, labels, created_at, updated_at, plan_id, target, task_order, epic_id) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (title, description, 1, TaskStatus.PENDING.value, "[]", now, now, plan_id, target, task_order, epic_id),
-        )
-        await self._db.commit()
-        return await self.get_task(cursor.lastrowid)
+        rows = [
+            (title, description, 1, TaskStatus.PENDING.value, "[]", epic_id, target, None, plan_id, start_order + i, now, now)
+            for i, (title, description, target) in enumerate(items)
+        ]
+        async with self.transaction():
+            created = await self._insert_tasks(rows)
+        return created
 
     async def reorder_plan_tasks(self, plan_id: int, task_ids: list[int]) -> None:
-        for order, tid in enumerate(task_ids):
-            await self._db.execute(
+        now = _now_iso()
+        async with self.transaction():
+            await self._executemany(
                 "UPDATE tasks SET task_order = ?, updated_at = ? WHERE id = ? AND plan_id = ?",
-                (order, _now_iso(), tid, plan_id),
+                [(order, now, tid, plan_id) for order, tid in enumerate(task_ids)],
             )
-        await self._db.commit()
 
-    async def pick_next_plan_task(self, plan_id: int) -> Task | None:
-        async with self._db.execute(
-            "SELECT * FROM tasks WHERE plan_id = ? AND status = ? ORDER BY task_order ASC, id ASC LIMIT 1",
+    async def pick_next_plan_task(self, plan_id: int) -> TaskRecord | None:
+        row = await self._fetchone(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE plan_id = ? AND status = ? ORDER BY task_order ASC, id ASC LIMIT 1",
             (plan_id, TaskStatus.PENDING.value),
-        ) as cur:
-            row = await cur.fetchone()
-            return self._row_to_task(row) if row else None
+        )
+        return self._row_to_task(row) if row else None
 
     # ── Epics ──
 
@@ -512,17 +1204,17 @@ class Database:
 
     async def create_epic(self, data: EpicCreate) -> Epic:
         now = _now_iso()
-        cursor = await self._db.execute(
-            "INSERT INTO epics (title, description, status, color, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-            (data.title, data.description, EpicStatus.OPEN.value, data.color, now, now),
-        )
-        await self._db.commit()
-        return await self.get_epic(cursor.lastrowid)
+        async with self.transaction():
+            row = await self._fetchone(
+                "INSERT INTO epics (title, description, status, color, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) RETURNING *",
+                (data.title, data.description, EpicStatus.OPEN.value, data.color, now, now),
+            )
+        return self._row_to_epic(row)
 
     async def get_epic(self, epic_id: int) -> Epic | None:
-        async with self._db.execute("SELECT * FROM epics WHERE id = ?", (epic_id,)) as cur:
-            row = await cur.fetchone()
-            return self._row_to_epic(row) if row else None
+        row = await self._fetchone("SELECT * FROM epics WHERE id = ?", (epic_id,))
+        return self._row_to_epic(row) if row else None
 
     async def list_epics(self, status: EpicStatus | None = None) -> list[Epic]:
         if status:
@@ -531,9 +1223,28 @@ class Database:
         else:
             sql = "SELECT * FROM epics ORDER BY created_at DESC"
             params = ()
-        async with self._db.execute(sql, params) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_epic(r) for r in rows]
+        rows = await self._fetchall(sql, params)
+        return [self._row_to_epic(r) for r in rows]
+
+    async def epics_version(self, status: EpicStatus | None = None) -> tuple:
+        """Epic list version; includes epic tasks because listings embed their stats."""
+        epic_where = "WHERE status = ?" if status else ""
+        params: tuple = (status.value, status.value) if status else ()
+        return await self._version(
+            f"SELECT (SELECT COUNT(*) FROM epics {epic_where}), (SELECT MAX(updated_at) FROM epics {epic_where}), "
+            "(SELECT COUNT(*) FROM tasks WHERE epic_id IS NOT NULL), "
+            "(SELECT MAX(updated_at) FROM tasks WHERE epic_id IS NOT NULL)",
+            params,
+        )
+
+    async def epic_version(self, epic_id: int) -> tuple:
+        """(epic updated_at, task count/max, plan count/max); updated_at is None if the epic is missing."""
+        return await self._version(
+            "SELECT (SELECT updated_at FROM epics WHERE id = ?), "
+            "(SELECT COUNT(*) FROM tasks WHERE epic_id = ?), (SELECT MAX(updated_at) FROM tasks WHERE epic_id = ?), "
+            "(SELECT COUNT(*) FROM plans WHERE epic_id = ?), (SELECT MAX(updated_at) FROM plans WHERE epic_id = ?)",
+            (epic_id,) * 5,
+        )
 
     async def update_epic(self, epic_id: int, data: EpicUpdate) -> Epic | None:
         epic = await self.get_epic(epic_id)
@@ -558,55 +1269,71 @@ class Database:
         updates.append("updated_at = ?")
         values.append(_now_iso())
         values.append(epic_id)
-        await self._db.execute(
-            f"UPDATE epics SET {', '.join(updates)} WHERE id = ?", values
-        )
-        await self._db.commit()
-        return await self.get_epic(epic_id)
+        async with self.transaction():
+            row = await self._fetchone(
+                f"UPDATE epics SET {', '.join(updates)} WHERE id = ? RETURNING *", values
+            )
+        return self._row_to_epic(row) if row else None
 
     async def delete_epic(self, epic_id: int) -> bool:
-        epic = await self.get_epic(epic_id)
-        if not epic:
-            return False
-        # Unlink tasks and plans (set epic_id to NULL, don't delete them)
+        # Unlink tasks and plans (set epic_id to NULL, don't delete them), atomically with the delete
         now = _now_iso()
-        await self._db.execute(
-            "UPDATE tasks SET epic_id = NULL, updated_at = ? WHERE epic_id = ?", (now, epic_id)
-        )
-        await self._db.execute(
-            "UPDATE plans SET epic_id = NULL, updated_at = ? WHERE epic_id = ?", (now, epic_id)
-        )
-        await self._db.execute("DELETE FROM epics WHERE id = ?", (epic_id,))
-        await self._db.commit()
+        async with self.transaction():
+            if not await self._execute("DELETE FROM epics WHERE id = ?", (epic_id,)):
+                return False
+            await self._execute(
+                "UPDATE tasks SET epic_id = NULL, updated_at = ? WHERE epic_id = ?", (now, epic_id)
+            )
+            await self._execute(
+                "UPDATE plans SET epic_id = NULL, updated_at = ? WHERE epic_id = ?", (now, epic_id)
+            )
         return True
 
-    async def get_epic_tasks(self, epic_id: int) -> list[Task]:
-        async with self._db.execute(
-            "SELECT * FROM tasks WHERE epic_id = ? ORDER BY task_order ASC, id ASC",
+    async def get_epic_tasks(self, epic_id: int) -> list[TaskRecord]:
+        rows = await self._fetchall(
+            f"SELECT {_TASK_COLUMNS} FROM tasks WHERE epic_id = ? ORDER BY task_order ASC, id ASC",
             (epic_id,),
-        ) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_task(r) for r in rows]
+        )
+        return [self._row_to_task(r) for r in rows]
 
     async def get_epic_plans(self, epic_id: int) -> list[Plan]:
-        async with self._db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM plans WHERE epic_id = ? ORDER BY created_at DESC",
             (epic_id,),
-        ) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_plan(r) for r in rows]
+        )
+        return [self._row_to_plan(r) for r in rows]
+
+    @staticmethod
+    def _epic_stats(rows: list) -> dict:
+        by_status = {row["status"]: row["cnt"] for row in rows}
+        total = sum(by_status.values())
+        timed = sum(row["timed_cnt"] for row in rows)
+        duration = sum(row["duration_sec"] for row in rows)
+        return {
+            "by_status": by_status,
+            "total": total,
+            "done": by_status.get(TaskStatus.DONE.value, 0),
+            "cost_usd": round(sum(row["cost_usd"] for row in rows), 6),
+            "duration_sec": round(duration, 3),
+            "avg_duration_sec": round(duration / timed, 3) if timed else None,
+        }
 
     async def get_epic_stats(self, epic_id: int) -> dict:
-        """Return task count by status for an epic."""
-        async with self._db.execute(
-            "SELECT status, COUNT(*) as cnt FROM tasks WHERE epic_id = ? GROUP BY status",
+        """Return task counts by status, total cost and durations for an epic."""
+        rows = await self._fetchall(
+            "SELECT * FROM epic_task_stats WHERE epic_id = ?",
             (epic_id,),
-        ) as cur:
-            rows = await cur.fetchall()
-        stats = {row["status"]: row["cnt"] for row in rows}
-        total = sum(stats.values())
-        done = stats.get(TaskStatus.DONE.value, 0)
-        return {"by_status": stats, "total": total, "done": done}
+        )
+        return self._epic_stats(rows)
+
+    async def list_epic_stats(self, epic_ids: list[int]) -> dict[int, dict]:
+        """Stats for many epics in one read of the counter table (epics without tasks get zeros)."""
+        rows = await self._fetchall("SELECT * FROM epic_task_stats")
+        grouped: dict[int, list] = {epic_id: [] for epic_id in epic_ids}
+        for row in rows:
+            if row["epic_id"] in grouped:
+                grouped[row["epic_id"]].append(row)
+        return {epic_id: self._epic_stats(epic_rows) for epic_id, epic_rows in grouped.items()}
 
     # ── Daily Snapshots ──
 
@@ -618,14 +1345,8 @@ class Database:
 
     async def upsert_snapshot(self, date: str, data: dict) -> DailySnapshot:
         now = _now_iso()
-        await self._db.execute(
-            "INSERT OR REPLACE INTO daily_snapshots "
-            "(date, net_asset, daily_pnl, daily_return_pct, "
-            "total_signals, total_orders, buy_count, sell_count, "
-            "win_count, loss_count, win_rate, "
-            "best_trade_pnl, worst_trade_pnl, "
-            "symbols_traded, analysis_summary, raw_metrics, created_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        await self._execute(
+            _UPSERT_SNAPSHOT,
             (
                 date,
                 data.get("net_asset", 0),
@@ -646,22 +1367,19 @@ class Database:
                 now,
             ),
         )
-        await self._db.commit()
         return await self.get_snapshot(date)
 
     async def get_snapshot(self, date: str) -> DailySnapshot | None:
-        async with self._db.execute(
+        row = await self._fetchone(
             "SELECT * FROM daily_snapshots WHERE date = ?", (date,)
-        ) as cur:
-            row = await cur.fetchone()
-            return self._row_to_snapshot(row) if row else None
+        )
+        return self._row_to_snapshot(row) if row else None
 
     async def list_snapshots(self, limit: int = 30) -> list[DailySnapshot]:
-        async with self._db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM daily_snapshots ORDER BY date DESC LIMIT ?", (limit,)
-        ) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_snapshot(r) for r in rows]
+        )
+        return [self._row_to_snapshot(r) for r in rows]
 
     # ── Report Snapshots ──
 
@@ -700,15 +1418,8 @@ class Database:
         trading_days: int = 0,
     ) -> ReportSnapshot:
         now = _now_iso()
-        await self._db.execute(
-            "INSERT OR REPLACE INTO report_snapshots "
-            "(report_type, period_key, net_asset, daily_pnl, daily_return_pct, "
-            "total_signals, total_orders, buy_count, sell_count, "
-            "win_count, loss_count, win_rate, "
-            "best_trade_pnl, worst_trade_pnl, "
-            "symbols_traded, analysis_summary, raw_metrics, "
-            "period_start, period_end, trading_days, created_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        await self._execute(
+            _UPSERT_REPORT,
             (
                 report_type.value,
                 period_key,
@@ -733,16 +1444,14 @@ class Database:
                 now,
             ),
         )
-        await self._db.commit()
         return await self.get_report(report_type, period_key)
 
     async def get_report(self, report_type: ReportType, period_key: str) -> ReportSnapshot | None:
-        async with self._db.execute(
+        row = await self._fetchone(
             "SELECT * FROM report_snapshots WHERE report_type = ? AND period_key = ?",
             (report_type.value, period_key),
-        ) as cur:
-            row = await cur.fetchone()
-            return self._row_to_report(row) if row else None
+        )
+        return self._row_to_report(row) if row else None
 
     async def list_reports(self, report_type: ReportType | None = None, limit: int = 30) -> list[ReportSnapshot]:
         if report_type:
@@ -751,41 +1460,285 @@ class Database:
         else:
             sql = "SELECT * FROM report_snapshots ORDER BY period_key DESC LIMIT ?"
             params = (limit,)
-        async with self._db.execute(sql, params) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_report(r) for r in rows]
+        rows = await self._fetchall(sql, params)
+        return [self._row_to_report(r) for r in rows]
+
+    async def reports_version(self, report_type: ReportType | None = None) -> tuple:
+        if report_type:
+            return await self._version(
+                "SELECT COUNT(*), MAX(created_at) FROM report_snapshots WHERE report_type = ?", (report_type.value,)
+            )
+        return await self._version("SELECT COUNT(*), MAX(created_at) FROM report_snapshots")
 
     async def get_daily_range(self, start_date: str, end_date: str) -> list[ReportSnapshot]:
         """Get daily report snapshots in a date range (inclusive), ordered by period_key ASC."""
-        async with self._db.execute(
+        rows = await self._fetchall(
             "SELECT * FROM report_snapshots WHERE report_type = ? AND period_key >= ? AND period_key <= ? ORDER BY period_key ASC",
             (ReportType.DAILY.value, start_date, end_date),
-        ) as cur:
-            rows = await cur.fetchall()
-            return [self._row_to_report(r) for r in rows]
+        )
+        return [self._row_to_report(r) for r in rows]
+
+    # ── Review Watches ──
+
+    async def add_review_watch(self, pr_url: str, task_id: int, title: str, due_at: str, expires_at: str) -> bool:
+        """Queue a PR for review collection; False if it is already queued."""
+        async with self.transaction():
+            count = await self._execute(
+                "INSERT INTO review_watches (pr_url, task_id, title, due_at, expires_at, settling, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?) ON CONFLICT (pr_url) DO NOTHING",
+                (pr_url, task_id, title, due_at, expires_at, _now_iso()),
+            )
+        return count > 0
+
+    async def lease_review_watches(self, now: str, lease_until: str, limit: int) -> list[ReviewWatch]:
+        """Take up to limit due watches, pushing their due_at to lease_until.
+
+        The lease keeps another node (or a crashed run) from checking the
+        same PRs concurrently; unfinished watches come due again after it.
+        """
+        async with self.transaction():
+            rows = await self._fetchall(
+                "UPDATE review_watches SET due_at = ? WHERE id IN ("
+                f"SELECT id FROM review_watches WHERE due_at <= ? ORDER BY due_at LIMIT ?{self._SKIP_LOCKED}) "
+                "RETURNING id, pr_url, task_id, title, due_at, expires_at, settling, created_at",
+                (lease_until, now, limit),
+            )
+        watches = [ReviewWatch(*r) for r in rows]
+        for w in watches:
+            w.settling = bool(w.settling)
+        return sorted(watches, key=lambda w: w.id)
+
+    async def update_review_watch(self, watch_id: int, due_at: str, settling: bool) -> None:
+        await self._execute(
+            "UPDATE review_watches SET due_at = ?, settling = ? WHERE id = ?", (due_at, int(settling), watch_id)
+        )
+
+    async def delete_review_watch(self, watch_id: int) -> None:
+        await self._execute("DELETE FROM review_watches WHERE id = ?", (watch_id,))
+
+    async def next_review_due(self) -> str | None:
+        row = await self._fetchone("SELECT MIN(due_at) FROM review_watches")
+        return row[0] if row else None
+
+    async def count_review_watches(self) -> int:
+        row = await self._fetchone("SELECT COUNT(*) FROM review_watches")
+        return row[0] if row else 0
 
     # ── Logs ──
 
     async def insert_log(self, task_id: int, timestamp: str, level: str, message: str) -> None:
-        await self._db.execute(
-            "INSERT INTO logs (task_id, timestamp, level, message) VALUES (?, ?, ?, ?)",
-            (task_id, timestamp, level, message),
-        )
-        await self._db.commit()
+        """Queue a log row and group-commit it with any others queued meanwhile.
+
+        The agent fires these off per output line; a single flusher drains
+        the queue, so a burst of lines costs one commit instead of one each.
+        """
+        self._pending_logs.append((task_id, timestamp, level, message))
+        if self._owns_transaction():
+            await self._write_pending_logs()  # already inside our own unit of work
+            return
+        if self._log_flush is None or self._log_flush.done():
+            self._log_flush = asyncio.ensure_future(self._flush_logs())
+        await asyncio.shield(self._log_flush)
+
+    async def _flush_logs(self) -> None:
+        # Loop until the queue is empty so rows appended mid-commit are not stranded
+        while self._pending_logs:
+            async with self.transaction():
+                await self._write_pending_logs()
+
+    async def _write_pending_logs(self) -> None:
+        rows, self._pending_logs = self._pending_logs, []
+        if rows:
+            await self._executemany(
+                "INSERT INTO logs (task_id, timestamp, level, message) VALUES (?, ?, ?, ?)", rows
+            )
 
-    async def get_task_logs(self, task_id: int, limit: int = 500) -> list[LogEntry]:
-        async with self._db.execute(
-            "SELECT * FROM logs WHERE task_id = ? ORDER BY id ASC LIMIT ?",
+    async def task_logs_version(self, task_id: int) -> tuple:
+        """Logs are append-only, so (count, max id) identifies the set."""
+        return await self._version("SELECT COUNT(*), MAX(id) FROM logs WHERE task_id = ?", (task_id,))
+
+    async def get_task_logs(self, task_id: int, limit: int = 500) -> list[LogRecord]:
+        rows = await self._fetchall(
+            "SELECT id, timestamp, level, message, task_id FROM logs WHERE task_id = ? ORDER BY id ASC LIMIT ?",
             (task_id, limit),
-        ) as cur:
-            rows = await cur.fetchall()
-            return [
-                LogEntry(
-                    index=row["id"],
-                    timestamp=row["timestamp"],
-                    level=LogLevel(row["level"]),
-                    message=row["message"],
-                    task_id=row["task_id"],
+        )
+        return [LogRecord(r[0], r[1], _LOG_LEVEL[r[2]], r[3], r[4]) for r in rows]
+
+    # ── Analytics Rollup ──
+
+    async def _sync_rollup(self, task_ids: list[int]) -> None:
+        """Bring the rollup in line with these tasks' current status (call inside the status write's transaction).
+
+        A task counts once, under the outcome it holds now: moving between done
+        and failed, or out of them (retry, PATCH back to pending), subtracts what
+        it added before. Deleted tasks keep their history.
+        """
+        async with self.transaction():
+            for start in range(0, len(task_ids), _BULK_CHUNK):
+                chunk = task_ids[start:start + _BULK_CHUNK]
+                marks = ", ".join("?" * len(chunk))
+                tasks = await self._fetchall(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id IN ({marks})", chunk)
+                entries = {
+                    r[0]: r for r in await self._fetchall(
+                        "SELECT task_id, status, completed_at, day, keys, counters, bucket "
+                        f"FROM task_rollup_entries WHERE task_id IN ({marks})",
+                        chunk,
+                    )
+                }
+                stale: list[tuple] = []
+                fresh: list[TaskRecord] = []
+                for row in tasks:
+                    task = self._row_to_task(row)
+                    entry = entries.get(task.id)
+                    final = task.status in _FINAL_STATUSES and task.completed_at is not None
+                    if entry and final and (entry[1], entry[2]) == (task.status.value, task.completed_at):
+                        continue  # already counted as this outcome
+                    if entry:
+                        stale.append(entry)
+                    if final:
+                        fresh.append(task)
+                await self._unroll(stale)
+                await self._roll_up(fresh)
+
+    async def _roll_up(self, tasks: list[TaskRecord]) -> None:
+        """Add finished tasks to the day they completed on, under every dimension they belong to."""
+        rows: list[tuple] = []
+        durations: list[tuple] = []
+        entries: list[tuple] = []
+        for task in tasks:
+            day = task.completed_at[:10]
+            keys = rollup_keys(task)
+            counters = completion_counters(task)
+            seconds = duration_sec(task)
+            bucket = duration_bucket(seconds) if seconds is not None else None
+            for dim, key in keys:
+                rows.append((day, dim, key, *counters))
+                if bucket is not None:
+                    durations.append((day, dim, key, bucket, 1))
+            entries.append(
+                (task.id, task.status.value, task.completed_at, day, json.dumps(keys), json.dumps(counters), bucket)
+            )
+        if rows:
+            await self._executemany(_BUMP_ROLLUP, rows)
+        if durations:
+            await self._executemany(_BUMP_ROLLUP_DURATION, durations)
+        if entries:
+            await self._executemany(
+                "INSERT INTO task_rollup_entries (task_id, status, completed_at, day, keys, counters, bucket) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                entries,
+            )
+
+    async def _unroll(self, entries: list[tuple]) -> None:
+        """Subtract what task_rollup_entries rows added, and forget them."""
+        rows: list[tuple] = []
+        durations: list[tuple] = []
+        for _task_id, _status, _completed_at, day, keys, counters, bucket in entries:
+            negated = [-v for v in json.loads(counters)]
+            for dim, key in json.loads(keys):
+                rows.append((day, dim, key, *negated))
+                if bucket is not None:
+                    durations.append((day, dim, key, bucket, -1))
+        if rows:
+            await self._executemany(_BUMP_ROLLUP, rows)
+            await self._executemany(
+                "DELETE FROM task_rollup WHERE day = ? AND dim = ? AND key = ? AND done + failed <= 0",
+                [r[:3] for r in rows],
+            )
+        if durations:
+            await self._executemany(_BUMP_ROLLUP_DURATION, durations)
+            await self._executemany(
+                "DELETE FROM task_rollup_durations WHERE day = ? AND dim = ? AND key = ? AND bucket = ? AND cnt <= 0",
+                [d[:4] for d in durations],
+            )
+        for start in range(0, len(entries), _BULK_CHUNK):
+            chunk = [e[0] for e in entries[start:start + _BULK_CHUNK]]
+            await self._execute(f"DELETE FROM task_rollup_entries WHERE task_id IN ({', '.join('?' * len(chunk))})", chunk)
+
+    async def _backfill_task_rollup(self) -> None:
+        """Rebuild the rollup from finished tasks when it has no per-task entries yet (first start only).
+
+        Also replaces a rollup written before entries were tracked, which could
+        hold a retried task under both outcomes.
+        """
+        if await self._fetchone("SELECT 1 FROM task_rollup_entries LIMIT 1"):
+            return
+        await self._execute("DELETE FROM task_rollup")
+        await self._execute("DELETE FROM task_rollup_durations")
+        rows = await self._fetchall(
+            "SELECT id FROM tasks WHERE status IN (?, ?) AND completed_at IS NOT NULL",
+            (TaskStatus.DONE.value, TaskStatus.FAILED.value),
+        )
+        if rows:
+            await self._sync_rollup([r[0] for r in rows])
+
+    async def task_rollup(self, dim: str, since: str) -> list[tuple]:
+        """(day, key, *ROLLUP_COUNTERS) rows of one dimension from day `since` on."""
+        rows = await self._fetchall(
+            f"SELECT day, key, {', '.join(ROLLUP_COUNTERS)} FROM task_rollup WHERE dim = ? AND day >= ? ORDER BY day",
+            (dim, since),
+        )
+        return [tuple(r) for r in rows]
+
+    async def task_rollup_durations(self, dim: str, since: str) -> list[tuple[str, str, int, int]]:
+        """(day, key, bucket, count) duration histogram rows of one dimension from day `since` on."""
+        rows = await self._fetchall(
+            "SELECT day, key, bucket, cnt FROM task_rollup_durations WHERE dim = ? AND day >= ?", (dim, since)
+        )
+        return [(r[0], r[1], r[2], r[3]) for r in rows]
+
+    async def task_rollup_version(self) -> tuple:
+        return await self._version("SELECT COUNT(*), SUM(done + failed) FROM task_rollup WHERE dim = 'all'")
+
+    # ── Task Spans ──
+
+    async def add_task_spans(
+        self, task_id: int, spans: list[tuple[str, str, str, float, str]], *, new_attempt: bool = True
+    ) -> int:
+        """Append (kind, name, started_at, duration_ms, detail) spans to the task's next attempt, or its latest one.
+
+        Returns the attempt number the spans were filed under.
+        """
+        async with self.transaction():
+            row = await self._fetchone("SELECT MAX(attempt) FROM task_spans WHERE task_id = ?", (task_id,))
+            attempt = (row[0] or 0) if row else 0
+            if new_attempt or not attempt:
+                attempt += 1
+            if spans:
+                await self._executemany(
+                    "INSERT INTO task_spans (task_id, attempt, kind, name, started_at, duration_ms, detail) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(task_id, attempt, *span) for span in spans],
                 )
-                for row in rows
-            ]
+        return attempt
+
+    async def task_spans_version(self, task_id: int) -> tuple:
+        return await self._version("SELECT COUNT(*), MAX(id) FROM task_spans WHERE task_id = ?", (task_id,))
+
+    async def get_task_spans(self, task_id: int) -> list[TaskSpan]:
+        rows = await self._fetchall(
+            "SELECT id, task_id, attempt, kind, name, started_at, duration_ms, detail FROM task_spans "
+            "WHERE task_id = ? ORDER BY attempt, started_at, id",
+            (task_id,),
+        )
+        return [TaskSpan(r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7] or "") for r in rows]
+
+    async def span_histogram(self, since: str) -> list[tuple[str, str, int, int, float, float, float]]:
+        """(kind, name, bucket, count, total_ms, min_ms, max_ms) per SPAN_BUCKETS_MS bucket, for spans started at or after since."""
+        rows = await self._fetchall(
+            f"SELECT kind, name, {_SPAN_BUCKET} AS bucket, COUNT(*), SUM(duration_ms), MIN(duration_ms), MAX(duration_ms) "
+            "FROM task_spans WHERE started_at >= ? GROUP BY kind, name, bucket",
+            (since,),
+        )
+        return [tuple(r) for r in rows]
+
+
+def create_database(config: AppConfig) -> Database:
+    """Storage backend from config: PostgreSQL when db_url is set, otherwise SQLite at db_path."""
+    if config.db_url:
+        from app.database_pg import PostgresDatabase  # needs the optional asyncpg dependency
+
+        return PostgresDatabase(
+            config.db_url, pool_size=config.db_pool_size, node_id=config.node_id, claim_lease_sec=config.claim_lease_sec
+        )
+    return Database(config.db_path, read_pool_size=config.db_read_pool_size, node_id=config.node_id)
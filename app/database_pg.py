@@ -0,0 +1,545 @@
+"""PostgreSQL 스토리지 백엔드 (asyncpg) — 여러 노드가 하나의 큐를 공유"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+try:
+    import asyncpg
+except ImportError:  # optional: pip install 'claude-pilot[pg]'
+    asyncpg = None
+
+from app import metrics
+from app.database import NOTIFY_TASKS, ConnectionStats, Database
+from app.models import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+_CHANNEL = "claude_pilot"
+_SCHEMA_LOCK_ID = 0x636C_7064  # pg_advisory_xact_lock key serializing schema setup across nodes
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id BIGSERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        status TEXT DEFAULT 'pending',
+        priority INTEGER DEFAULT 1,
+        created_at TEXT,
+        updated_at TEXT,
+        started_at TEXT,
+        completed_at TEXT,
+        output TEXT DEFAULT '',
+        error TEXT DEFAULT '',
+        exit_code INTEGER,
+        cost_usd DOUBLE PRECISION,
+        approval_status TEXT DEFAULT '',
+        rejection_feedback TEXT DEFAULT '',
+        labels TEXT DEFAULT '[]',
+        retry_count INTEGER DEFAULT 0,
+        branch_name TEXT DEFAULT '',
+        pr_url TEXT DEFAULT '',
+        plan_id BIGINT,
+        target TEXT DEFAULT '',
+        task_order INTEGER DEFAULT 0,
+        epic_id BIGINT,
+        claimed_by TEXT DEFAULT '',
+        deadline TEXT,
+        not_before TEXT,
+        session_id TEXT DEFAULT '',
+        finished_at TEXT
+    )
+    """,
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS finished_at TEXT",
+    """
+    CREATE TABLE IF NOT EXISTS logs (
+        id BIGSERIAL PRIMARY KEY,
+        task_id BIGINT NOT NULL,
+        timestamp TEXT NOT NULL,
+        level TEXT NOT NULL,
+        message TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS plans (
+        id BIGSERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        spec TEXT DEFAULT '',
+        targets TEXT DEFAULT '{}',
+        status TEXT DEFAULT 'draft',
+        created_at TEXT,
+        updated_at TEXT,
+        epic_id BIGINT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS epics (
+        id BIGSERIAL PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        status TEXT DEFAULT 'open',
+        color TEXT DEFAULT '',
+        created_at TEXT,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_snapshots (
+        id BIGSERIAL PRIMARY KEY,
+        date TEXT NOT NULL UNIQUE,
+        net_asset DOUBLE PRECISION DEFAULT 0,
+        daily_pnl DOUBLE PRECISION DEFAULT 0,
+        daily_return_pct DOUBLE PRECISION DEFAULT 0,
+        total_signals INTEGER DEFAULT 0,
+        total_orders INTEGER DEFAULT 0,
+        buy_count INTEGER DEFAULT 0,
+        sell_count INTEGER DEFAULT 0,
+        win_count INTEGER DEFAULT 0,
+        loss_count INTEGER DEFAULT 0,
+        win_rate DOUBLE PRECISION DEFAULT 0,
+        best_trade_pnl DOUBLE PRECISION DEFAULT 0,
+        worst_trade_pnl DOUBLE PRECISION DEFAULT 0,
+        symbols_traded TEXT DEFAULT '[]',
+        analysis_summary TEXT DEFAULT '',
+        raw_metrics TEXT DEFAULT '{}',
+        created_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS report_snapshots (
+        id BIGSERIAL PRIMARY KEY,
+        report_type TEXT NOT NULL,
+        period_key TEXT NOT NULL,
+        net_asset DOUBLE PRECISION DEFAULT 0,
+        daily_pnl DOUBLE PRECISION DEFAULT 0,
+        daily_return_pct DOUBLE PRECISION DEFAULT 0,
+        total_signals INTEGER DEFAULT 0,
+        total_orders INTEGER DEFAULT 0,
+        buy_count INTEGER DEFAULT 0,
+        sell_count INTEGER DEFAULT 0,
+        win_count INTEGER DEFAULT 0,
+        loss_count INTEGER DEFAULT 0,
+        win_rate DOUBLE PRECISION DEFAULT 0,
+        best_trade_pnl DOUBLE PRECISION DEFAULT 0,
+        worst_trade_pnl DOUBLE PRECISION DEFAULT 0,
+        symbols_traded TEXT DEFAULT '[]',
+        analysis_summary TEXT DEFAULT '',
+        raw_metrics TEXT DEFAULT '{}',
+        period_start TEXT DEFAULT '',
+        period_end TEXT DEFAULT '',
+        trading_days INTEGER DEFAULT 0,
+        created_at TEXT,
+        UNIQUE (report_type, period_key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS epic_task_stats (
+        epic_id BIGINT NOT NULL,
+        status TEXT NOT NULL,
+        cnt BIGINT NOT NULL DEFAULT 0,
+        cost_usd DOUBLE PRECISION NOT NULL DEFAULT 0,
+        duration_sec DOUBLE PRECISION NOT NULL DEFAULT 0,
+        timed_cnt BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (epic_id, status)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_epic_id ON tasks(epic_id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_plan_id ON tasks(plan_id, task_order)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_pending ON tasks(priority DESC, created_at) WHERE status = 'pending'",
+    "CREATE INDEX IF NOT EXISTS idx_logs_task_id ON logs(task_id, id)",
+    """
+    CREATE TABLE IF NOT EXISTS review_watches (
+        id BIGSERIAL PRIMARY KEY,
+        pr_url TEXT NOT NULL UNIQUE,
+        task_id BIGINT NOT NULL,
+        title TEXT NOT NULL,
+        due_at TEXT NOT NULL,
+        expires_at TEXT NOT NULL,
+        settling INTEGER DEFAULT 0,
+        created_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_review_watches_due ON review_watches(due_at)",
+    """
+    CREATE TABLE IF NOT EXISTS node_heartbeats (
+        node_id TEXT PRIMARY KEY,
+        seen_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_spans (
+        id BIGSERIAL PRIMARY KEY,
+        task_id BIGINT NOT NULL,
+        attempt INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        duration_ms DOUBLE PRECISION NOT NULL,
+        detail TEXT DEFAULT ''
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_task_spans_task_id ON task_spans(task_id, attempt)",
+    """
+    CREATE TABLE IF NOT EXISTS spend_ledger (
+        id BIGSERIAL PRIMARY KEY,
+        task_id BIGINT,
+        epic_id BIGINT,
+        target TEXT DEFAULT '',
+        cost_usd DOUBLE PRECISION NOT NULL,
+        recorded_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_spend_ledger_recorded_at ON spend_ledger(recorded_at)",
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup (
+        day TEXT NOT NULL,
+        dim TEXT NOT NULL,
+        key TEXT NOT NULL,
+        done BIGINT NOT NULL DEFAULT 0,
+        failed BIGINT NOT NULL DEFAULT 0,
+        retried BIGINT NOT NULL DEFAULT 0,
+        retries BIGINT NOT NULL DEFAULT 0,
+        cost_usd DOUBLE PRECISION NOT NULL DEFAULT 0,
+        costed BIGINT NOT NULL DEFAULT 0,
+        duration_sec DOUBLE PRECISION NOT NULL DEFAULT 0,
+        timed BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (dim, key, day)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup_durations (
+        day TEXT NOT NULL,
+        dim TEXT NOT NULL,
+        key TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        cnt BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (dim, key, day, bucket)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task_rollup_entries (
+        task_id BIGINT PRIMARY KEY,
+        status TEXT NOT NULL,
+        completed_at TEXT,
+        day TEXT NOT NULL,
+        keys TEXT NOT NULL,
+        counters TEXT NOT NULL,
+        bucket INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_task_spans_started_at ON task_spans(started_at)",
+    # Same counter maintenance as the SQLite triggers, as one plpgsql row trigger
+    """
+    CREATE OR REPLACE FUNCTION epic_task_stats_apply(r tasks, sign INTEGER) RETURNS void AS $$
+    DECLARE
+        timed BOOLEAN := r.started_at IS NOT NULL AND r.completed_at IS NOT NULL;
+    BEGIN
+        IF r.epic_id IS NULL THEN
+            RETURN;
+        END IF;
+        INSERT INTO epic_task_stats AS s (epic_id, status, cnt, cost_usd, duration_sec, timed_cnt)
+        VALUES (
+            r.epic_id, r.status, sign, sign * COALESCE(r.cost_usd, 0),
+            sign * CASE WHEN timed
+                THEN EXTRACT(EPOCH FROM r.completed_at::timestamptz - r.started_at::timestamptz) ELSE 0 END,
+            sign * timed::int
+        )
+        ON CONFLICT (epic_id, status) DO UPDATE SET
+            cnt = s.cnt + excluded.cnt,
+            cost_usd = s.cost_usd + excluded.cost_usd,
+            duration_sec = s.duration_sec + excluded.duration_sec,
+            timed_cnt = s.timed_cnt + excluded.timed_cnt;
+        IF sign < 0 THEN
+            DELETE FROM epic_task_stats WHERE epic_id = r.epic_id AND status = r.status AND cnt <= 0;
+        END IF;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION trg_epic_task_stats() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM epic_task_stats_apply(OLD, -1);
+        END IF;
+        IF TG_OP IN ('UPDATE', 'INSERT') THEN
+            PERFORM epic_task_stats_apply(NEW, 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_epic_task_stats ON tasks",
+    """
+    CREATE TRIGGER trg_epic_task_stats
+    AFTER INSERT OR DELETE OR UPDATE OF status, epic_id, cost_usd, started_at, completed_at ON tasks
+    FOR EACH ROW EXECUTE FUNCTION trg_epic_task_stats()
+    """,
+)
+
+_SEED_SPEND_LEDGER = (
+    "INSERT INTO spend_ledger (task_id, epic_id, target, cost_usd, recorded_at) "
+    "SELECT id, epic_id, target, cost_usd, COALESCE(completed_at, updated_at) FROM tasks "
+    "WHERE cost_usd IS NOT NULL AND NOT EXISTS (SELECT 1 FROM spend_ledger)"
+)
+
+_REBUILD_EPIC_STATS = """
+INSERT INTO epic_task_stats (epic_id, status, cnt, cost_usd, duration_sec, timed_cnt)
+SELECT epic_id, status, COUNT(*), SUM(COALESCE(cost_usd, 0)),
+    SUM(CASE WHEN started_at IS NOT NULL AND completed_at IS NOT NULL
+        THEN EXTRACT(EPOCH FROM completed_at::timestamptz - started_at::timestamptz) ELSE 0 END),
+    SUM((started_at IS NOT NULL AND completed_at IS NOT NULL)::int)
+FROM tasks WHERE epic_id IS NOT NULL GROUP BY epic_id, status
+"""
+
+
+@lru_cache(maxsize=1024)
+def to_pg_params(sql: str) -> str:
+    """Rewrite qmark placeholders to $1..$n, leaving quoted literals alone."""
+    out: list[str] = []
+    n = 0
+    quote: str | None = None
+    for ch in sql:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == "?":
+            n += 1
+            out.append(f"${n}")
+            continue
+        out.append(ch)
+    return "".join(out)
+
+
+def _rowcount(status: str) -> int:
+    """Row count from an asyncpg command tag such as 'UPDATE 3' or 'INSERT 0 1'."""
+    last = status.rsplit(" ", 1)[-1]
+    return int(last) if last.isdigit() else 0
+
+
+class PostgresDatabase(Database):
+    """Database on a shared PostgreSQL server via an asyncpg pool.
+
+    Every node points at the same database. Claims lock the candidate row
+    with FOR UPDATE SKIP LOCKED so nodes never take the same task, and
+    transactions touching a channel send pg_notify on commit; each node
+    LISTENs on a dedicated connection (reopened if it drops) and fans
+    notifications out to the local add_listener callbacks. Each node also
+    heartbeats into node_heartbeats; in_progress tasks claimed by a node
+    silent for claim_lease_sec are put back to pending by the others.
+    """
+
+    _LIKE = "ILIKE"
+    _SKIP_LOCKED = " FOR UPDATE SKIP LOCKED"
+    _SHARED = True
+
+    def __init__(self, dsn: str, pool_size: int = 10, *, node_id: str = "", claim_lease_sec: float = 300) -> None:
+        if asyncpg is None:
+            raise RuntimeError("PostgreSQL backend requires asyncpg: pip install 'claude-pilot[pg]'")
+        super().__init__(dsn, read_pool_size=0, node_id=node_id)
+        self._dsn = dsn
+        self._pool_size = pool_size
+        self.claim_lease_sec = claim_lease_sec
+        self._heartbeat: asyncio.Task | None = None
+        self._pool: asyncpg.Pool | None = None
+        self._listen_conn: asyncpg.Connection | None = None
+        self._relisten: asyncio.Task | None = None
+        self._tx_conns: dict[asyncio.Task, asyncpg.Connection] = {}
+        self._tx_notify: dict[asyncio.Task, set[str]] = {}
+        self._pool_stats = ConnectionStats("pool")
+
+    async def init(self) -> None:
+        self._pool = await asyncpg.create_pool(self._dsn, min_size=1, max_size=self._pool_size)
+        async with self.transaction():
+            conn = self._tx_conns[asyncio.current_task()]
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_LOCK_ID)
+            for stmt in _SCHEMA:
+                await conn.execute(stmt)
+            # Rebuild counters with task writes from other nodes held off until commit
+            await conn.execute("LOCK TABLE tasks IN SHARE MODE")
+            await conn.execute("DELETE FROM epic_task_stats")
+            await conn.execute(_REBUILD_EPIC_STATS)
+            await conn.execute(_SEED_SPEND_LEDGER)
+            await self._backfill_task_rollup()
+        await self._listen()
+        await self.release_orphaned_claims()  # also registers this node before it claims anything
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def close(self) -> None:
+        if self._log_flush is not None and not self._log_flush.done():
+            await self._log_flush
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self._relisten is not None:
+            self._relisten.cancel()
+            self._relisten = None
+        if self._listen_conn is not None:
+            conn, self._listen_conn = self._listen_conn, None  # cleared first: not a lost connection
+            await conn.close()
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def pool_stats(self) -> dict:
+        return {
+            "writer": self._writer_stats.to_dict(),
+            "readers": [self._pool_stats.to_dict()],
+            "idle_readers": self._pool.get_idle_size() if self._pool else 0,
+        }
+
+    # ── Change notifications ──
+
+    def _notify(self, channel: str) -> None:
+        self._tx_notify[asyncio.current_task()].add(channel)
+
+    def _on_notification(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        self._dispatch({payload})
+
+    async def _listen(self) -> None:
+        conn = await asyncpg.connect(self._dsn)
+        await conn.add_listener(_CHANNEL, self._on_notification)
+        conn.add_termination_listener(self._on_listen_lost)
+        self._listen_conn = conn
+
+    def _on_listen_lost(self, conn: asyncpg.Connection) -> None:
+        if conn is not self._listen_conn:  # closed by close()
+            return
+        self._listen_conn = None
+        logger.warning("PostgreSQL LISTEN connection lost; reconnecting")
+        self._relisten = asyncio.create_task(self._reconnect_listen())
+
+    async def _reconnect_listen(self) -> None:
+        """Reopen the LISTEN connection with backoff, then wake listeners for anything missed meanwhile."""
+        delay = 0.5
+        while True:
+            try:
+                await self._listen()
+                break
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("PostgreSQL LISTEN reconnect failed (%s); retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+        self._relisten = None
+        logger.info("PostgreSQL LISTEN connection restored")
+        self._dispatch({NOTIFY_TASKS})  # NOTIFYs sent while disconnected are gone
+
+    # ── Claim leases ──
+
+    async def release_orphaned_claims(self) -> int:
+        """Heartbeat this node, then put back to pending the in_progress tasks of nodes silent for claim_lease_sec."""
+        now = datetime.now(timezone.utc)
+        expired = (now - timedelta(seconds=self.claim_lease_sec)).isoformat()
+        async with self.transaction():
+            await self._execute(
+                "INSERT INTO node_heartbeats (node_id, seen_at) VALUES (?, ?) "
+                "ON CONFLICT (node_id) DO UPDATE SET seen_at = excluded.seen_at",
+                (self.node_id, now.isoformat()),
+            )
+            count = await self._execute(
+                "UPDATE tasks SET status = ?, claimed_by = '', started_at = NULL, updated_at = ? "
+                "WHERE status = ? AND claimed_by NOT IN ('', ?) "
+                "AND claimed_by NOT IN (SELECT node_id FROM node_heartbeats WHERE seen_at >= ?)",
+                (TaskStatus.PENDING.value, now.isoformat(), TaskStatus.IN_PROGRESS.value, self.node_id, expired),
+            )
+            if count:
+                self._notify(NOTIFY_TASKS)
+        if count:
+            logger.warning("Released %d in_progress task(s) claimed by nodes silent for %ss", count, self.claim_lease_sec)
+        return count
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.claim_lease_sec / 3)
+            try:
+                await self.release_orphaned_claims()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("PostgreSQL heartbeat failed (%s); retrying next beat", e)
+
+    # ── Backend primitives ──
+
+    def _owns_transaction(self) -> bool:
+        return asyncio.current_task() in self._tx_conns
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+        conn = self._tx_conns.get(asyncio.current_task())
+        if conn is not None:
+            yield conn
+            return
+        requested = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            acquired = time.perf_counter()
+            try:
+                yield conn
+            finally:
+                self._pool_stats.record(acquired - requested, time.perf_counter() - acquired)
+
+    async def _fetchall(self, sql: str, params: tuple | list = ()) -> list:
+        started = time.perf_counter()
+        try:
+            async with self._connection() as conn:
+                return await conn.fetch(to_pg_params(sql), *params)
+        finally:
+            metrics.observe_query(sql, started)
+
+    async def _fetchone(self, sql: str, params: tuple | list = ()) -> asyncpg.Record | None:
+        started = time.perf_counter()
+        try:
+            async with self._connection() as conn:
+                return await conn.fetchrow(to_pg_params(sql), *params)
+        finally:
+            metrics.observe_query(sql, started)
+
+    async def _execute(self, sql: str, params: tuple | list = ()) -> int:
+        started = time.perf_counter()
+        try:
+            async with self.transaction():
+                status = await self._tx_conns[asyncio.current_task()].execute(to_pg_params(sql), *params)
+        finally:
+            metrics.observe_query(sql, started)
+        return _rowcount(status)
+
+    async def _executemany(self, sql: str, rows: list[tuple]) -> None:
+        started = time.perf_counter()
+        try:
+            async with self.transaction():
+                await self._tx_conns[asyncio.current_task()].executemany(to_pg_params(sql), rows)
+        finally:
+            metrics.observe_query(sql, started)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Unit of work on one pooled connection; nested calls from the same task join it.
+
+        Unlike SQLite, transactions from different tasks (and nodes) run
+        concurrently; row locks and MVCC keep them apart.
+        """
+        task = asyncio.current_task()
+        if task in self._tx_conns:
+            yield
+            return
+        requested = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            acquired = time.perf_counter()
+            notify: set[str] = set()
+            self._tx_conns[task] = conn
+            self._tx_notify[task] = notify
+            try:
+                async with conn.transaction():
+                    yield
+                    for channel in notify:  # delivered to every listening node at commit
+                        await conn.execute("SELECT pg_notify($1, $2)", _CHANNEL, channel)
+            finally:
+                del self._tx_conns[task]
+                del self._tx_notify[task]
+                self._writer_stats.record(acquired - requested, time.perf_counter() - acquired)
@@ -0,0 +1,188 @@
+"""Claude CLI 프로세스 예열 풀 — stdin 대기 중인 프로세스를 재사용해 콜드 스타트 제거"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+from app import metrics
+from app.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+_Key = tuple[tuple[str, ...], str]  # (argv, cwd)
+
+_STREAM_LIMIT = 4 * 1024 * 1024  # 4MB line buffer (default 64KB too small for large stream-json)
+
+
+@dataclass(slots=True)
+class _Idle:
+    proc: asyncio.subprocess.Process
+    expiry: asyncio.TimerHandle | None = None
+
+
+@dataclass(slots=True)
+class FirstEventStats:
+    count: int = 0
+    total_sec: float = 0.0
+    max_sec: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_sec += seconds
+        self.max_sec = max(self.max_sec, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "runs": self.count,
+            "avg_sec": round(self.total_sec / self.count, 3) if self.count else 0.0,
+            "max_sec": round(self.max_sec, 3),
+        }
+
+
+@dataclass(slots=True)
+class Launch:
+    """One claude process handed to a run; warm if it was pre-spawned."""
+
+    proc: asyncio.subprocess.Process
+    warm: bool
+    started: float = field(default_factory=time.perf_counter)
+
+
+class ClaudeLauncher:
+    """Hands out claude processes, keeping up to pool_size idle ones per (argv, cwd).
+
+    `claude -p` reads its prompt from stdin, so a process spawned ahead of
+    time has already paid interpreter startup and sits blocked on stdin
+    until a run writes the prompt. After each launch the pool is topped up
+    in the background; an idle process nobody claims within idle_sec is
+    killed (and reaped), so the pool shrinks back to zero when the queue
+    goes quiet. pool_size=0 spawns every run cold.
+    """
+
+    def __init__(self, *, pool_size: int = 0, idle_sec: float = 120) -> None:
+        self.pool_size = pool_size
+        self.idle_sec = idle_sec
+        self._idle: dict[_Key, list[_Idle]] = {}
+        self._refills: dict[_Key, asyncio.Task] = {}
+        self._reaping: set[asyncio.Task] = set()
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self.expired = 0
+        self._first_event = {True: FirstEventStats(), False: FirstEventStats()}
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> ClaudeLauncher:
+        return cls(pool_size=config.claude_warm_pool, idle_sec=config.claude_warm_idle_sec)
+
+    async def _spawn(self, argv: tuple[str, ...], cwd: str) -> asyncio.subprocess.Process:
+        env = os.environ.copy()
+        env.pop("CLAUDECODE", None)
+        return await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,  # merge stderr → stdout (prevent deadlock)
+            cwd=cwd or None,
+            env=env,
+            limit=_STREAM_LIMIT,
+        )
+
+    async def launch(self, argv: list[str], cwd: str, *, refill: bool = True) -> Launch:
+        """A warm process for this argv/cwd if one is idle, else a fresh one (FileNotFoundError propagates).
+
+        Pass refill=False for an argv that will not come up again (per-run flags
+        such as --resume or a budget cap), so no processes are pre-spawned for it.
+        """
+        key: _Key = (tuple(argv), cwd)
+        started = time.perf_counter()
+        launch: Launch | None = None
+        idle = self._idle.get(key, [])
+        while idle and launch is None:
+            entry = idle.pop()
+            if entry.expiry:
+                entry.expiry.cancel()
+            if entry.proc.returncode is None:
+                launch = Launch(entry.proc, warm=True, started=started)
+        if launch is None:
+            launch = Launch(await self._spawn(*key), warm=False, started=started)
+            self.cold_starts += 1
+        else:
+            self.warm_hits += 1
+        if refill:
+            self._refill(key)
+        return launch
+
+    def first_event(self, launch: Launch) -> float:
+        """Record time from launch() to the first stdout line; returns it in seconds."""
+        seconds = time.perf_counter() - launch.started
+        self._first_event[launch.warm].record(seconds)
+        metrics.CLAUDE_FIRST_EVENT.observe(seconds, start="warm" if launch.warm else "cold")
+        return seconds
+
+    def _refill(self, key: _Key) -> None:
+        if self.pool_size <= 0 or key in self._refills or len(self._idle.get(key, [])) >= self.pool_size:
+            return
+        task = asyncio.create_task(self._fill(key))
+        self._refills[key] = task
+        task.add_done_callback(lambda _: self._refills.pop(key, None))
+
+    async def _fill(self, key: _Key) -> None:
+        while len(self._idle.get(key, [])) < self.pool_size:
+            try:
+                proc = await self._spawn(*key)
+            except OSError:
+                logger.warning("Warm claude spawn failed for %s", key[1], exc_info=True)
+                return
+            entry = _Idle(proc)
+            entry.expiry = asyncio.get_running_loop().call_later(self.idle_sec, self._expire, key, entry)
+            self._idle.setdefault(key, []).append(entry)
+
+    def _expire(self, key: _Key, entry: _Idle) -> None:
+        idle = self._idle.get(key, [])
+        if entry in idle:
+            idle.remove(entry)
+            self.expired += 1
+            self._kill(entry.proc)
+        if not idle:
+            self._idle.pop(key, None)
+
+    def _kill(self, proc: asyncio.subprocess.Process) -> None:
+        """Kill an idle process and reap it in the background."""
+        if proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+        task = asyncio.create_task(proc.wait())
+        self._reaping.add(task)
+        task.add_done_callback(self._reaping.discard)
+
+    async def close(self) -> None:
+        """Kill every idle process (shutdown)."""
+        refills = list(self._refills.values())
+        for task in refills:
+            task.cancel()
+        await asyncio.gather(*refills, return_exceptions=True)
+        procs = [entry.proc for idle in self._idle.values() for entry in idle]
+        for idle in self._idle.values():
+            for entry in idle:
+                if entry.expiry:
+                    entry.expiry.cancel()
+        self._idle.clear()
+        for proc in procs:
+            self._kill(proc)
+        await asyncio.gather(*self._reaping, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "idle": sum(len(idle) for idle in self._idle.values()),
+            "warm_hits": self.warm_hits,
+            "cold_starts": self.cold_starts,
+            "expired": self.expired,
+            "first_event_warm": self._first_event[True].to_dict(),
+            "first_event_cold": self._first_event[False].to_dict(),
+        }
@@ -0,0 +1,122 @@
+"""로그 링 버퍼 — index 기반 O(1) 조회 + task별 보조 뷰"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_left
+from collections import deque
+from itertools import islice
+
+from app.models import LogEntry, LogLevel
+
+
+class LogRecord:
+    """Compact in-memory log entry; converted to LogEntry only when serialized."""
+
+    __slots__ = ("index", "timestamp", "level", "message", "task_id")
+
+    def __init__(self, index: int, timestamp: str, level: LogLevel, message: str, task_id: int | None = None) -> None:
+        self.index = index
+        self.timestamp = timestamp
+        self.level = level
+        self.message = message
+        self.task_id = task_id
+
+    def __repr__(self) -> str:
+        return f"LogRecord(index={self.index}, level={self.level.value}, task_id={self.task_id}, message={self.message[:40]!r})"
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "level": self.level.value,
+            "message": self.message,
+            "task_id": self.task_id,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def to_entry(self) -> LogEntry:
+        return LogEntry(
+            index=self.index,
+            timestamp=self.timestamp,
+            level=self.level,
+            message=self.message,
+            task_id=self.task_id,
+        )
+
+
+class LogRingBuffer:
+    """Fixed-capacity ring of LogRecords addressed by their monotonic index.
+
+    Record ``i`` lives in slot ``i % capacity`` while it is retained, so
+    ``since(after_index)`` is a slice instead of a scan. Records with a
+    task_id are also kept in a per-task view that is trimmed in step with
+    the ring, so evicted records never linger there.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self._capacity = capacity
+        self._slots: list[LogRecord | None] = [None] * capacity
+        self._next_index = 0
+        self._by_task: dict[int, deque[LogRecord]] = {}
+
+    def __len__(self) -> int:
+        return min(self._next_index, self._capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def first_index(self) -> int:
+        """Index of the oldest retained record."""
+        return max(0, self._next_index - self._capacity)
+
+    @property
+    def next_index(self) -> int:
+        """Index the next appended record will receive."""
+        return self._next_index
+
+    def append(self, timestamp: str, level: LogLevel, message: str, task_id: int | None = None) -> LogRecord:
+        index = self._next_index
+        pos = index % self._capacity
+        evicted = self._slots[pos]
+        if evicted is not None and evicted.task_id is not None:
+            view = self._by_task.get(evicted.task_id)
+            if view and view[0] is evicted:
+                view.popleft()
+                if not view:
+                    del self._by_task[evicted.task_id]
+        record = LogRecord(index, timestamp, level, message, task_id)
+        self._slots[pos] = record
+        if task_id is not None:
+            self._by_task.setdefault(task_id, deque()).append(record)
+        self._next_index = index + 1
+        return record
+
+    def since(self, after_index: int = 0, *, task_id: int | None = None) -> list[LogRecord]:
+        """Return retained records with index >= after_index (optionally for one task)."""
+        if task_id is not None:
+            return self._task_since(task_id, after_index)
+        start = max(after_index, self.first_index)
+        count = self._next_index - start
+        if count <= 0:
+            return []
+        pos = start % self._capacity
+        end = pos + count
+        if end <= self._capacity:
+            return self._slots[pos:end]  # type: ignore[return-value]
+        return self._slots[pos:] + self._slots[: end - self._capacity]  # type: ignore[operator]
+
+    def _task_since(self, task_id: int, after_index: int) -> list[LogRecord]:
+        view = self._by_task.get(task_id)
+        if not view:
+            return []
+        if after_index <= view[0].index:
+            return list(view)
+        pos = bisect_left(view, after_index, key=lambda r: r.index)
+        return list(islice(view, pos, None))
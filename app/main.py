@@ -9,9 +9,12 @@ from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 
 from app.agent import AgentWorker
+from app.api.compression import CompressionMiddleware
+from app.api.responses import FastJSONResponse
 from app.config import load_config
 from app.dashboard import build_dashboard_html
-from app.database import Database
+from app.database import create_database
+from app.profiler import LoopLagMonitor
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
@@ -19,19 +22,28 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     config = load_config()
-    db = Database(config.db_path)
+    db = create_database(config)
     await db.init()
     agent = AgentWorker(config, db)
     app.state.db = db
     app.state.agent = agent
+    app.state.loop_monitor = LoopLagMonitor.from_config(config)
+    if app.state.loop_monitor:
+        app.state.loop_monitor.start()
+    agent.reviews.start()  # resume review collection for PRs queued before a restart
     target_msg = config.target_project or "(none — use Plans for multi-target)"
     logging.getLogger(__name__).info("Claude Pilot started — target: %s", target_msg)
     yield
     await agent.stop_loop()
+    await agent.reviews.stop()
+    await agent.launcher.close()
+    if app.state.loop_monitor:
+        app.state.loop_monitor.stop()
     await db.close()
 
 
-app = FastAPI(title="Claude Pilot", lifespan=lifespan)
+app = FastAPI(title="Claude Pilot", lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
 
 
 # Dashboard
@@ -0,0 +1,200 @@
+"""Prometheus 텍스트 포맷 메트릭 — 의존성 없는 카운터/게이지/히스토그램 + 핫패스 계측"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import functools
+import math
+import re
+import time
+from collections.abc import Iterable
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 21600, 86400)
+COST_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+_LabelKey = tuple[str, ...]
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: _LabelKey, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: dict[str, str]) -> _LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    @abc.abstractmethod
+    def _samples(self) -> list[str]: ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[_LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[_LabelKey, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[_LabelKey, list] = {}  # key → [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-2] if series else 0.0
+
+    def _samples(self) -> list[str]:
+        lines: list[str] = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = 'le="' + _num(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, _INF)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_num(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics.values() for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+TASKS_FINISHED = REGISTRY.counter(
+    "pilot_tasks_finished_total", "Task attempts by outcome (done, failed, waiting_approval, rejected, retried, throttled)", ("outcome",)
+)
+TASK_QUEUE_WAIT = REGISTRY.histogram(
+    "pilot_task_queue_wait_seconds", "Creation to first start of a task", buckets=TASK_BUCKETS
+)
+TASK_DURATION = REGISTRY.histogram(
+    "pilot_task_duration_seconds", "Wall time of one task attempt (branch, claude run, commit, PR)", buckets=TASK_BUCKETS
+)
+TASK_COST = REGISTRY.histogram("pilot_task_cost_usd", "Cost reported by each claude run", buckets=COST_BUCKETS)
+CLAUDE_FIRST_EVENT = REGISTRY.histogram(
+    "pilot_claude_first_event_seconds", "Launch to first stream-json line", ("start",)
+)
+COMMAND_DURATION = REGISTRY.histogram("pilot_command_duration_seconds", "gh/git subprocess wall time", ("command",))
+DB_QUERY = REGISTRY.histogram("pilot_db_query_seconds", "Database statement latency by verb and table", ("op", "table"))
+SSE_SUBSCRIBERS = REGISTRY.gauge("pilot_sse_subscribers", "Open SSE streams", ("stream",))
+LOG_FLUSH_LAG = REGISTRY.histogram("pilot_log_flush_lag_seconds", "Log record creation to its DB insert completing")
+TASKS = REGISTRY.gauge("pilot_tasks", "Tasks by status (from the database at scrape time)", ("status",))
+LOOP_LAG = REGISTRY.histogram("pilot_event_loop_lag_seconds", "How late the event loop ran its heartbeat")
+CLAUDE_LIMIT = REGISTRY.gauge("pilot_claude_concurrency", "Adaptive claude limiter state", ("kind",))
+
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def _statement(sql: str) -> tuple[str, str]:
+    """(verb, first table) labels for a SQL statement; most statements are constants, so this is cached."""
+    verb = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ""
+    table = _STATEMENT_TABLE.search(sql)
+    return verb, table.group(1).lower() if table else ""
+
+
+def observe_query(sql: str, started: float) -> None:
+    """Record one statement's latency since started (perf_counter) into pilot_db_query_seconds."""
+    op, table = _statement(sql)
+    DB_QUERY.observe(time.perf_counter() - started, op=op, table=table)
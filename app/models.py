@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class EpicStatus(str, Enum):
@@ -67,6 +68,120 @@ class Task(BaseModel):
     task_order: int = 0
     # Epic fields
     epic_id: int | None = None
+    # Scheduling
+    deadline: str | None = None
+    not_before: str | None = None  # retry backoff: not claimable before this time
+    session_id: str = ""  # claude session of the last run (resumed by retries / review follow-ups)
+    finished_at: str | None = None  # when the last run ended, before any review wait
+
+
+@dataclass(slots=True)
+class TaskRecord:
+    """Read-side task row (no validation).
+
+    Database read paths return these instead of Task: rows are trusted
+    because every write goes through TaskCreate/TaskUpdate. Field order
+    matches the SELECT column list in app.database.
+    """
+
+    id: int
+    title: str
+    description: str
+    status: TaskStatus
+    priority: TaskPriority
+    labels: list[str]
+    created_at: str
+    updated_at: str
+    started_at: str | None
+    completed_at: str | None
+    output: str
+    error: str
+    exit_code: int | None
+    cost_usd: float | None
+    approval_status: str
+    rejection_feedback: str
+    retry_count: int
+    branch_name: str
+    pr_url: str
+    plan_id: int | None
+    target: str
+    task_order: int
+    epic_id: int | None
+    deadline: str | None
+    not_before: str | None
+    session_id: str
+    finished_at: str | None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "status": self.status,
+            "priority": self.priority,
+            "labels": self.labels,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "output": self.output,
+            "error": self.error,
+            "exit_code": self.exit_code,
+            "cost_usd": self.cost_usd,
+            "approval_status": self.approval_status,
+            "rejection_feedback": self.rejection_feedback,
+            "retry_count": self.retry_count,
+            "branch_name": self.branch_name,
+            "pr_url": self.pr_url,
+            "plan_id": self.plan_id,
+            "target": self.target,
+            "task_order": self.task_order,
+            "epic_id": self.epic_id,
+            "deadline": self.deadline,
+            "not_before": self.not_before,
+            "session_id": self.session_id,
+            "finished_at": self.finished_at,
+        }
+
+
+@dataclass(slots=True)
+class ReviewWatch:
+    """Merged PR whose review comments are being collected into a follow-up task."""
+
+    id: int
+    pr_url: str
+    task_id: int
+    title: str
+    due_at: str  # next check (or lease expiry while a check runs)
+    expires_at: str  # give up if no actionable comment by then
+    settling: bool  # comments seen; one more fetch after a short wait picks up late ones
+    created_at: str
+
+
+@dataclass(slots=True)
+class TaskSpan:
+    """One timed step of a task attempt: an execution phase or a claude tool call."""
+
+    id: int
+    task_id: int
+    attempt: int  # 1 for the first run; retries, reruns and the approval that follows share the run's number
+    kind: str  # "phase" | "tool"
+    name: str
+    started_at: str
+    duration_ms: float
+    detail: str
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "attempt": self.attempt,
+            "kind": self.kind,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "detail": self.detail,
+        }
 
 
 class TaskCreate(BaseModel):
@@ -76,6 +191,12 @@ class TaskCreate(BaseModel):
     labels: list[str] = Field(default_factory=list)
     epic_id: int | None = None
     target: str = ""  # 프로젝트 경로 (빈 문자열 = config 기본값)
+    deadline: str | None = None  # ISO 8601; due soon → scheduled ahead of priority
+
+    @field_validator("deadline")
+    @classmethod
+    def _normalize_deadline(cls, v: str | None) -> str | None:
+        return _utc_iso(v) if v else None
 
 
 class TaskUpdate(BaseModel):
@@ -86,6 +207,30 @@ class TaskUpdate(BaseModel):
     labels: list[str] | None = None
     epic_id: int | None = None  # 0 = remove from epic
     target: str | None = None
+    deadline: str | None = None  # "" = clear
+
+    @field_validator("deadline")
+    @classmethod
+    def _normalize_deadline(cls, v: str | None) -> str | None:
+        return _utc_iso(v) if v else v
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskCreate] = Field(min_length=1, max_length=1000)
+
+
+class TaskBulkUpdate(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+    patch: TaskUpdate
+
+
+class TaskBulkDelete(BaseModel):
+    # ids and filters combine with AND; at least one must be given
+    ids: list[int] | None = Field(default=None, max_length=1000)
+    status: TaskStatus | None = None
+    label: str | None = None
+    q: str | None = None
+    epic_id: int | None = None
 
 
 class Plan(BaseModel):
@@ -192,7 +337,16 @@ class DailySnapshot(BaseModel):
 
 class ApprovalRequest(BaseModel):
     feedback: str = ""
+    task_id: int | None = None  # /api/agent/* only; None = oldest task awaiting review
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
+
+
+def _utc_iso(value: str) -> str:
+    """Normalize an ISO 8601 timestamp to UTC at second precision (naive = UTC), so stored values sort as text."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds")
@@ -0,0 +1,171 @@
+"""gh/git 서브프로세스 실행 계층 — 읽기 결과 TTL 캐시, 동시 실행 제한, 명령별 지연 통계"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app import metrics
+from app.config import AppConfig
+
+
+@dataclass(slots=True)
+class CommandResult:
+    returncode: int
+    stdout: str  # stdout (+ stderr when merged), decoded and stripped
+    stderr: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+@dataclass(slots=True)
+class CommandStats:
+    """Spawns, cache hits and wall time for one command (e.g. "git checkout", "gh api")."""
+
+    name: str
+    spawned: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    total_sec: float = 0.0
+    max_sec: float = 0.0
+
+    def record(self, elapsed: float, ok: bool) -> None:
+        self.spawned += 1
+        self.total_sec += elapsed
+        self.max_sec = max(self.max_sec, elapsed)
+        if not ok:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "spawned": self.spawned,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "avg_ms": round(self.total_sec / self.spawned * 1000, 1) if self.spawned else 0.0,
+            "max_ms": round(self.max_sec * 1000, 1),
+        }
+
+
+_Key = tuple[str, tuple[str, ...], bool]
+
+
+class CommandRunner:
+    """Shared way to run gh/git: bounded spawns, cached reads, per-command latency.
+
+    Calls made with ttl > 0 are treated as idempotent reads: their result is
+    reused for ttl seconds, and identical calls already in flight share one
+    process. Any call without a ttl may change state, so it drops the cached
+    reads for its working directory. At most max_concurrency processes run
+    at once; run_many() fans a batch of commands out under that bound.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 8,
+        executables: dict[str, str] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.executables = executables or {}  # "gh" → path, e.g. a stand-in for tests
+        self._clock = clock
+        self._spawn = asyncio.Semaphore(max_concurrency)
+        self._cache: dict[_Key, tuple[float, CommandResult]] = {}
+        self._inflight: dict[_Key, asyncio.Future[CommandResult]] = {}
+        self._stats: dict[str, CommandStats] = {}
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> CommandRunner:
+        return cls(
+            max_concurrency=config.subprocess_max_concurrency,
+            executables={"gh": config.gh_command, "git": config.git_command},
+        )
+
+    def _stat(self, args: tuple[str, ...]) -> CommandStats:
+        name = " ".join(args[:2])
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = CommandStats(name)
+        return stat
+
+    async def run(self, *args: str, cwd: str | None = None, ttl: float = 0, merge_stderr: bool = False) -> CommandResult:
+        """Run a command; with ttl, serve a cached or in-flight identical call instead of spawning."""
+        key: _Key = (cwd or "", args, merge_stderr)
+        if ttl <= 0:
+            self.invalidate(cwd)
+            return await self._spawn_proc(args, cwd, merge_stderr)
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > self._clock():
+            self._stat(args).cache_hits += 1
+            return cached[1]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._stat(args).cache_hits += 1
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[CommandResult] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._spawn_proc(args, cwd, merge_stderr)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved: waiters re-raise it, no "never retrieved" warning
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if result.ok:
+            self._cache[key] = (self._clock() + ttl, result)
+        future.set_result(result)
+        return result
+
+    async def run_many(
+        self, commands: list[tuple[str, ...]], *, cwd: str | None = None, ttl: float = 0
+    ) -> list[CommandResult]:
+        """Run several commands concurrently (bounded by max_concurrency); results in input order."""
+        return list(await asyncio.gather(*(self.run(*cmd, cwd=cwd, ttl=ttl) for cmd in commands)))
+
+    def invalidate(self, cwd: str | None = None) -> None:
+        """Drop cached reads for one working directory (all when cwd is None)."""
+        if cwd is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == cwd]:
+            del self._cache[key]
+
+    async def _spawn_proc(self, args: tuple[str, ...], cwd: str | None, merge_stderr: bool) -> CommandResult:
+        program = self.executables.get(args[0], args[0])
+        stat = self._stat(args)
+        async with self._spawn:
+            started = time.perf_counter()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    program, *args[1:],
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE,
+                    cwd=cwd or None,
+                )
+            except FileNotFoundError as exc:
+                stat.record(time.perf_counter() - started, ok=False)
+                return CommandResult(127, "", f"{args[0]} not found: {exc}")
+            stdout, stderr = await proc.communicate()
+            elapsed = time.perf_counter() - started
+            stat.record(elapsed, ok=proc.returncode == 0)
+            metrics.COMMAND_DURATION.observe(elapsed, command=stat.name)
+        return CommandResult(
+            proc.returncode,
+            stdout.decode("utf-8", errors="replace").strip(),
+            stderr.decode("utf-8", errors="replace").strip() if stderr else "",
+        )
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "cached": len(self._cache),
+            "commands": [s.to_dict() for s in sorted(self._stats.values(), key=lambda s: -s.total_sec)],
+        }
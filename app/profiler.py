@@ -0,0 +1,186 @@
+"""라이브 프로세스 진단 — 이벤트 루프/aiosqlite 스레드 샘플링 프로파일러 + 루프 지연 감시"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from types import FrameType
+
+from app import metrics
+from app.config import AppConfig
+from app.models import _now_iso
+
+logger = logging.getLogger(__name__)
+
+_running = False  # one profile at a time: sampling costs the whole process some CPU
+
+
+class ProfileBusy(RuntimeError):
+    pass
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{frame.f_lineno})"
+
+
+def _stack(frame: FrameType | None) -> list[str]:
+    """Frame labels from the outermost call to the innermost."""
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _db_threads() -> dict[int, str]:
+    """aiosqlite worker threads (one per connection), found by the module their stack runs in."""
+    frames = sys._current_frames()
+    threads: dict[int, str] = {}
+    for thread in threading.enumerate():
+        frame = frames.get(thread.ident)
+        while frame is not None:
+            if frame.f_globals.get("__name__", "").startswith("aiosqlite"):
+                threads[thread.ident] = f"aiosqlite-{len(threads) + 1}"
+                break
+            frame = frame.f_back
+    return threads
+
+
+def sample(threads: dict[int, str], duration_sec: float, interval_sec: float) -> Counter[str]:
+    """Sample these threads' stacks every interval for duration; returns collapsed stack → sample count."""
+    counts: Counter[str] = Counter()
+    deadline = time.perf_counter() + duration_sec
+    while time.perf_counter() < deadline:
+        frames = sys._current_frames()
+        for ident, label in threads.items():
+            frame = frames.get(ident)
+            if frame is not None:
+                counts[";".join([label, *_stack(frame)])] += 1
+        del frames
+        time.sleep(interval_sec)
+    return counts
+
+
+def collapsed(counts: Counter[str]) -> str:
+    """Brendan Gregg collapsed-stack format (flamegraph.pl, speedscope, inferno)."""
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+
+async def profile(duration_sec: float, interval_sec: float = 0.005) -> str:
+    """Sample the event loop thread and the aiosqlite threads from a helper thread; returns collapsed stacks.
+
+    Must be awaited on the loop being profiled. Raises ProfileBusy while another profile runs.
+    """
+    global _running
+    if _running:
+        raise ProfileBusy("a profile is already running")
+    _running = True
+    try:
+        threads = {threading.get_ident(): "event-loop", **_db_threads()}
+        counts = await asyncio.to_thread(sample, threads, duration_sec, interval_sec)
+    finally:
+        _running = False
+    return collapsed(counts)
+
+
+class LoopLagMonitor:
+    """Warns when the event loop is blocked past a threshold, naming the task and frame that blocked it.
+
+    A heartbeat callback on the loop measures how late it runs. A watchdog
+    thread notices an overdue heartbeat while the loop is still stuck and
+    captures the loop thread's stack and current task at that moment; the
+    next heartbeat logs the stall with that culprit.
+    """
+
+    def __init__(self, threshold_sec: float = 0.1, *, keep: int = 50) -> None:
+        self.threshold_sec = threshold_sec
+        self._interval = threshold_sec / 2
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_ident: int | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._expected = 0.0  # perf_counter time the next heartbeat is due
+        self._culprit: dict | None = None  # captured by the watchdog during the current stall
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+        self.stalls = 0
+        self.max_lag_sec = 0.0
+        self._recent: deque[dict] = deque(maxlen=keep)
+
+    @classmethod
+    def from_config(cls, config: AppConfig) -> LoopLagMonitor | None:
+        if config.loop_lag_threshold_ms <= 0:
+            return None
+        return cls(config.loop_lag_threshold_ms / 1000)
+
+    def start(self) -> None:
+        """Begin monitoring the running loop (call from the loop thread)."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_ident = threading.get_ident()
+        self._stop.clear()
+        self._schedule()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def _schedule(self) -> None:
+        self._expected = time.perf_counter() + self._interval
+        self._handle = self._loop.call_later(self._interval, self._beat)
+
+    def _beat(self) -> None:
+        lag = max(0.0, time.perf_counter() - self._expected)
+        metrics.LOOP_LAG.observe(lag)
+        if lag >= self.threshold_sec:
+            self._report(lag, self._culprit or {"task": "", "coro": "", "frame": "", "stack": []})
+        self._culprit = None
+        self._schedule()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self._interval / 2):
+            if self._culprit is None and time.perf_counter() - self._expected >= self.threshold_sec:
+                self._culprit = self._capture()
+
+    def _capture(self) -> dict:
+        """What the loop thread is running right now (called from the watchdog thread)."""
+        frame = sys._current_frames().get(self._loop_ident)
+        stack = _stack(frame)
+        task = asyncio.current_task(self._loop)
+        coro = task.get_coro() if task else None
+        return {
+            "task": task.get_name() if task else "",
+            "coro": getattr(coro, "__qualname__", "") if coro else "",
+            "frame": stack[-1] if stack else "",
+            "stack": stack[-12:],
+        }
+
+    def _report(self, lag: float, culprit: dict) -> None:
+        self.stalls += 1
+        self.max_lag_sec = max(self.max_lag_sec, lag)
+        self._recent.append({"at": _now_iso(), "lag_ms": round(lag * 1000, 1), **culprit})
+        where = culprit["coro"] or "a plain callback"
+        if culprit["task"]:
+            where = f"task {culprit['task']} ({where})"
+        logger.warning("Event loop blocked %.0fms by %s at %s", lag * 1000, where, culprit["frame"] or "unknown frame")
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": round(self.threshold_sec * 1000, 1),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag_sec * 1000, 1),
+            "recent": list(self._recent),
+        }
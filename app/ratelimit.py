@@ -0,0 +1,150 @@
+"""Claude CLI 동시 실행 제어 — rate-limit/과부하 신호 기반 AIMD + 전역 일시정지"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
+
+
+class Signal(str, Enum):
+    RATE_LIMITED = "rate_limited"
+    OVERLOADED = "overloaded"
+
+
+@dataclass(slots=True)
+class Throttle:
+    signal: Signal
+    retry_at: float | None = None  # epoch seconds when the CLI says the limit resets
+
+
+@dataclass(slots=True)
+class RunSlot:
+    """Handle for one admitted run; set throttle if the run reported a limit."""
+
+    throttle: Throttle | None = None
+
+
+_RATE_LIMIT_RE = re.compile(r"rate[ _-]?limit|usage limit|too many requests|\b429\b", re.IGNORECASE)
+_OVERLOAD_RE = re.compile(r"overloaded|\b529\b", re.IGNORECASE)
+_RESET_AT_RE = re.compile(r"limit reached\|(\d{10})")  # "Claude AI usage limit reached|1767225600"
+
+
+def detect_throttle(event: dict | str) -> Throttle | None:
+    """Throttle signal in a stream-json event (error/failed result) or a plain output line."""
+    if isinstance(event, dict):
+        etype = event.get("type")
+        if etype == "result" and not (event.get("is_error") or str(event.get("subtype", "")).startswith("error")):
+            return None
+        if etype not in ("error", "result"):
+            return None
+        text = " ".join(str(event.get(k, "")) for k in ("error", "result", "message", "api_error_status"))
+    else:
+        text = event
+    if _OVERLOAD_RE.search(text):
+        return Throttle(Signal.OVERLOADED)
+    if _RATE_LIMIT_RE.search(text):
+        m = _RESET_AT_RE.search(text)
+        return Throttle(Signal.RATE_LIMITED, float(m.group(1)) if m else None)
+    return None
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent claude runs plus a global cooldown.
+
+    Each clean run raises the limit by 1/limit (about +1 per window of
+    successes, up to max_limit). A rate-limit or overload signal halves it
+    and pauses every new launch for the cooldown — or until the reset time
+    the CLI reported — doubling the cooldown while signals keep coming.
+    """
+
+    def __init__(
+        self,
+        max_limit: int = 2,
+        *,
+        min_limit: int = 1,
+        decrease: float = 0.5,
+        cooldown_sec: float = 30,
+        max_cooldown_sec: float = 900,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease = decrease
+        self.base_cooldown_sec = cooldown_sec
+        self.max_cooldown_sec = max_cooldown_sec
+        self._clock = clock
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.throttles = 0
+        self._cooldown = cooldown_sec
+        self._paused_until = 0.0
+        self._changed = asyncio.Event()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def paused_for(self) -> float:
+        return max(0.0, self._paused_until - self._clock())
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self.paused_for()
+            if delay <= 0 and self.in_flight < self.current_limit:
+                self.in_flight += 1
+                return
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=delay or None)
+            except TimeoutError:
+                pass
+
+    def release(self, throttle: Throttle | None = None) -> None:
+        self.in_flight -= 1
+        if throttle is None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cooldown = max(self.base_cooldown_sec, self._cooldown / 2)
+        else:
+            self.throttle(throttle)
+        self._changed.set()
+
+    def throttle(self, throttle: Throttle) -> float:
+        """Apply a throttle signal; returns the pause in seconds."""
+        now = self._clock()
+        self.throttles += 1
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        pause = self._cooldown
+        if throttle.retry_at is not None:
+            pause = max(pause, throttle.retry_at - now)
+        self._paused_until = max(self._paused_until, now + pause)
+        self._cooldown = min(self.max_cooldown_sec, self._cooldown * 2)
+        self._changed.set()
+        return pause
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[RunSlot]:
+        await self.acquire()
+        run = RunSlot()
+        try:
+            yield run
+        except BaseException:
+            # Cancelled/crashed runs free the slot without counting as a success
+            self.in_flight -= 1
+            self._changed.set()
+            raise
+        self.release(run.throttle)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.current_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "paused_for_sec": round(self.paused_for(), 1),
+            "next_cooldown_sec": self._cooldown,
+            "throttles": self.throttles,
+        }
@@ -10,6 +10,8 @@ import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 
+from app.api.conditional import cache_headers, etag_matches, not_modified, weak_etag
+from app.api.responses import FastJSONResponse
 from app.database import Database
 from app.reports.html_builder import build_report_html
 from app.reports.metrics import (
@@ -184,13 +186,18 @@ async def _generate_market(req: ReportGenerateRequest, db: Database) -> dict:
 
 @report_router.get("/api/reports")
 async def list_reports(
+    request: Request,
     type: str | None = None,
     limit: int = 30,
     db: Database = Depends(_get_db),
 ):
     report_type = ReportType(type) if type else None
+    count, last_modified = await db.reports_version(report_type)
+    etag = weak_etag("reports", type, limit, count, last_modified)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
     reports = await db.list_reports(report_type, limit=limit)
-    return [r.model_dump() for r in reports]
+    return FastJSONResponse([r.model_dump() for r in reports], headers=cache_headers(etag, last_modified))
 
 
 # ── GET /api/reports/{type}/{period_key} ──
@@ -200,13 +207,17 @@ async def list_reports(
 async def get_report_json(
     report_type: str,
     period_key: str,
+    request: Request,
     db: Database = Depends(_get_db),
 ):
     rt = ReportType(report_type)
     report = await db.get_report(rt, period_key)
     if not report:
         raise HTTPException(404, f"No {report_type} report found for {period_key}")
-    return report.model_dump()
+    etag = weak_etag("report", report.id, report.created_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, report.created_at)
+    return FastJSONResponse(report.model_dump(), headers=cache_headers(etag, report.created_at))
 
 
 # ── GET /api/reports/{type}/{period_key}/html ──
@@ -0,0 +1,299 @@
+"""리뷰 코멘트 수집 — 머지된 PR 을 배치 GraphQL 로 폴링해 후속 태스크 생성"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from app.config import AppConfig
+from app.database import Database
+from app.models import LogLevel, ReviewWatch, TaskCreate, TaskPriority
+from app.procs import CommandRunner
+
+logger = logging.getLogger(__name__)
+
+LogFn = Callable[..., None]  # (level, message, task_id) — AgentWorker._add_log
+
+# Patterns to skip: walkthrough summaries, processing messages, tips
+_SKIP_PATTERNS = [
+    "walkthrough",
+    "processing",
+    "in progress",
+    "<!-- tips_start",
+    "Thank you for using CodeRabbit",
+    "📝 Walkthrough",
+]
+
+_PR_URL_RE = re.compile(r"^https?://[^/]+/([^/]+)/([^/]+)/pull/(\d+)")
+
+# Review bodies plus their inline (file-level) comments, for one pull request
+_PR_FIELDS = (
+    "reviews(first: 50) { nodes { author { login } body "
+    "comments(first: 100) { nodes { author { login } body path } } } }"
+)
+
+
+def _skipped(body: str) -> bool:
+    lower = body.lower()
+    return any(pat.lower() in lower for pat in _SKIP_PATTERNS)
+
+
+def _login(node: dict) -> str:
+    return (node.get("author") or {}).get("login", "")
+
+
+def actionable_comments(pr: dict) -> list[str]:
+    """Inline comments, then review bodies, minus walkthroughs/tips and zero-actionable summaries."""
+    reviews = (pr.get("reviews") or {}).get("nodes") or []
+    comments: list[str] = []
+    for review in reviews:
+        for c in (review.get("comments") or {}).get("nodes") or []:
+            body = c.get("body") or ""
+            if body.strip() and not _skipped(body):
+                comments.append(f"[{_login(c)} on {c.get('path', '')}]: {body}")
+    for review in reviews:
+        body = review.get("body") or ""
+        if not body.strip() or "actionable comments posted: 0" in body.lower() or _skipped(body):
+            continue
+        comments.append(f"[{_login(review)} review]: {body}")
+    return comments
+
+
+def build_review_query(watches: list[ReviewWatch]) -> tuple[str, dict[tuple[str, str], int]]:
+    """One GraphQL query covering every watched PR; returns it with (repo alias, PR alias) → watch id."""
+    repos: dict[tuple[str, str], list[tuple[str, ReviewWatch]]] = {}
+    for w in watches:
+        m = _PR_URL_RE.match(w.pr_url)
+        if m:
+            owner, name, number = m.groups()
+            repos.setdefault((owner, name), []).append((number, w))
+    parts: list[str] = []
+    aliases: dict[tuple[str, str], int] = {}
+    for i, ((owner, name), prs) in enumerate(repos.items()):
+        repo_alias = f"r{i}"
+        fields = []
+        for number, w in prs:
+            pr_alias = f"pr{number}"
+            aliases[(repo_alias, pr_alias)] = w.id
+            fields.append(f"{pr_alias}: pullRequest(number: {number}) {{ {_PR_FIELDS} }}")
+        parts.append(f"{repo_alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ {' '.join(fields)} }}")
+    return "query { " + " ".join(parts) + " }", aliases
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+class ReviewCollector:
+    """Single background service turning review comments on merged PRs into backlog tasks.
+
+    Merged PRs are queued in the review_watches table — deduped by URL and
+    kept across restarts. Each pass leases the due watches and fetches
+    their reviews with one `gh api graphql` call per batch_size PRs, spacing
+    gh calls to stay under calls_per_min. Once a PR shows actionable
+    comments, one more fetch after settle_sec picks up late ones before the
+    follow-up task is created; PRs without any by max_wait_sec are dropped.
+    """
+
+    lease_sec = 120  # a leased watch comes due again after this if its pass never finished
+
+    def __init__(
+        self,
+        db: Database,
+        *,
+        cwd: str = "",
+        log: LogFn | None = None,
+        runner: CommandRunner | None = None,
+        batch_size: int = 20,
+        calls_per_min: int = 30,
+        initial_wait_sec: float = 180,  # give CodeRabbit time to post
+        poll_interval_sec: float = 30,
+        max_wait_sec: float = 600,
+        settle_sec: float = 30,
+        cache_ttl_sec: float = 0,  # identical graphql reads within this window reuse the last result
+    ) -> None:
+        self.db = db
+        self.cwd = cwd
+        self._log = log or (lambda level, message, task_id=None: logger.info(message))
+        self.runner = runner or CommandRunner()
+        self.batch_size = batch_size
+        self.calls_per_min = calls_per_min
+        self.initial_wait_sec = initial_wait_sec
+        self.poll_interval_sec = poll_interval_sec
+        self.max_wait_sec = max_wait_sec
+        self.settle_sec = settle_sec
+        self.cache_ttl_sec = cache_ttl_sec
+        self.gh_calls = 0
+        self.tasks_created = 0
+        self._next_call_at = 0.0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_config(
+        cls, config: AppConfig, db: Database, log: LogFn | None = None, runner: CommandRunner | None = None
+    ) -> ReviewCollector:
+        return cls(
+            db,
+            cwd=config.target_project,
+            log=log,
+            runner=runner or CommandRunner.from_config(config),
+            batch_size=config.review_batch_size,
+            calls_per_min=config.gh_calls_per_min,
+            cache_ttl_sec=config.gh_cache_ttl_sec,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the collection loop (resumes watches persisted before a restart)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def watch(self, pr_url: str, task_id: int, title: str) -> bool:
+        """Queue a merged PR for review collection; False if it is already queued."""
+        now = datetime.now(timezone.utc)
+        added = await self.db.add_review_watch(
+            pr_url, task_id, title,
+            due_at=_iso(now + timedelta(seconds=self.initial_wait_sec)),
+            expires_at=_iso(now + timedelta(seconds=self.max_wait_sec)),
+        )
+        if added:
+            pr_number = pr_url.rstrip("/").split("/")[-1]
+            self._log(LogLevel.SYSTEM, f"Queued PR #{pr_number} for review collection (first check in {self.initial_wait_sec:.0f}s)", task_id)
+        self.start()
+        self._wake.set()
+        return added
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                if await self.tick() >= self.batch_size:
+                    continue  # more PRs already due; the gh rate cap spaces the calls
+                delay = await self._until_next_due()
+            except Exception:
+                logger.exception("Review collection pass failed")
+                delay = self.poll_interval_sec
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+
+    async def _until_next_due(self) -> float | None:
+        due = await self.db.next_review_due()
+        if due is None:
+            return None  # idle until watch() queues a PR
+        return max(0.0, (datetime.fromisoformat(due) - datetime.now(timezone.utc)).total_seconds())
+
+    async def tick(self, now: datetime | None = None) -> int:
+        """Check one batch of due PRs; returns how many were checked."""
+        now = now or datetime.now(timezone.utc)
+        watches = await self.db.lease_review_watches(
+            _iso(now), _iso(now + timedelta(seconds=self.lease_sec)), self.batch_size
+        )
+        if not watches:
+            return 0
+        results = await self._fetch(watches)
+        for w in watches:
+            comments = results.get(w.id)  # None = fetch failed for this PR
+            if comments and not w.settling:
+                # Wait briefly for late-arriving comments, then fetch once more
+                await self.db.update_review_watch(w.id, _iso(now + timedelta(seconds=self.settle_sec)), True)
+            elif w.settling and comments is not None:
+                await self._finish(w, comments)
+            elif _iso(now) >= w.expires_at:
+                await self._finish(w, [])
+            else:
+                await self.db.update_review_watch(w.id, _iso(now + timedelta(seconds=self.poll_interval_sec)), w.settling)
+        return len(watches)
+
+    async def _fetch(self, watches: list[ReviewWatch]) -> dict[int, list[str] | None]:
+        query, aliases = build_review_query(watches)
+        if not aliases:
+            return {}
+        await self._throttle()
+        rc, output = await self._gh("api", "graphql", "-f", f"query={query}")
+        try:
+            data = (json.loads(output).get("data") or {}) if output else {}
+        except json.JSONDecodeError:
+            self._log(LogLevel.ERROR, f"gh api graphql JSON parse failed: {output[:200]}", None)
+            return {}
+        # Partial data comes back alongside per-PR errors (rc != 0): use what resolved
+        results: dict[int, list[str] | None] = {}
+        for (repo_alias, pr_alias), watch_id in aliases.items():
+            pr = (data.get(repo_alias) or {}).get(pr_alias)
+            results[watch_id] = actionable_comments(pr) if pr else None
+        return results
+
+    async def _throttle(self) -> None:
+        """Space gh calls evenly to stay under calls_per_min."""
+        loop = asyncio.get_running_loop()
+        wait = self._next_call_at - loop.time()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._next_call_at = max(self._next_call_at, loop.time()) + 60 / self.calls_per_min
+
+    async def _gh(self, *args: str) -> tuple[int, str]:
+        self.gh_calls += 1
+        result = await self.runner.run("gh", *args, cwd=self.cwd or None, ttl=self.cache_ttl_sec)
+        if result.returncode == 127 and not result.stdout:
+            self._log(LogLevel.ERROR, "gh CLI not found — review collection skipped", None)
+        elif not result.ok:
+            self._log(LogLevel.ERROR, f"gh {args[0]} {args[1]} failed (rc={result.returncode}): {result.stderr[:200]}", None)
+        return result.returncode, result.stdout
+
+    async def _finish(self, watch: ReviewWatch, comments: list[str]) -> None:
+        pr_number = watch.pr_url.rstrip("/").split("/")[-1]
+        if not comments:
+            await self.db.delete_review_watch(watch.id)
+            self._log(LogLevel.SYSTEM, f"No actionable review comments for PR #{pr_number}", watch.task_id)
+            return
+
+        original_task = await self.db.get_task(watch.task_id)
+        comments_md = "\n\n".join(f"- {c}" for c in comments)
+        description = (
+            f"Code review comments from PR: {watch.pr_url}\n\n"
+            f"## Review Comments\n\n{comments_md}"
+        )
+        # Task + dequeue commit together: a crash in between never loses or duplicates the follow-up
+        async with self.db.transaction():
+            new_task = await self.db.create_task(TaskCreate(
+                title=f"[Review] {watch.title}",
+                description=description,
+                priority=TaskPriority.LOW,
+                labels=["review"],
+                epic_id=original_task.epic_id if original_task else None,
+            ))
+            await self.db.delete_review_watch(watch.id)
+        self.tasks_created += 1
+        self._log(
+            LogLevel.SYSTEM,
+            f"Created review backlog task #{new_task.id} for PR #{pr_number} ({len(comments)} comments)",
+            watch.task_id,
+        )
+
+    async def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": await self.db.count_review_watches(),
+            "gh_calls": self.gh_calls,
+            "tasks_created": self.tasks_created,
+            "batch_size": self.batch_size,
+            "calls_per_min": self.calls_per_min,
+        }
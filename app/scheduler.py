@@ -0,0 +1,151 @@
+"""Task 스케줄러 — 우선순위 aging, epic/target 가중 공정 큐, 마감 기한 우선"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskRecord
+
+
+def _waited_sec(task: TaskRecord, now: datetime) -> float:
+    return (now - datetime.fromisoformat(task.created_at)).total_seconds()
+
+
+class Scheduler:
+    """Strict priority, oldest first.
+
+    Every policy runs tasks due within deadline_slack_sec first, earliest
+    deadline first. select() is the policy in pure Python (used by the
+    simulator); claim() for this one is the equivalent single SQL statement
+    (FOR UPDATE SKIP LOCKED on PostgreSQL), so the queue is never loaded.
+    """
+
+    name = "priority"
+
+    def __init__(self, *, deadline_slack_sec: float = 600) -> None:
+        self.deadline_slack_sec = deadline_slack_sec
+
+    def due_before(self, now: datetime) -> str:
+        return (now + timedelta(seconds=self.deadline_slack_sec)).isoformat(timespec="seconds")
+
+    def score(self, task: TaskRecord, now: datetime) -> float:
+        return task.priority
+
+    def select(self, candidates: list[TaskRecord], now: datetime) -> TaskRecord | None:
+        """Pick the next task from pending candidates (no side effects)."""
+        if not candidates:
+            return None
+        horizon = self.due_before(now)
+        due = [t for t in candidates if t.deadline and t.deadline <= horizon]
+        if due:
+            return min(due, key=lambda t: (t.deadline, -t.priority, t.id))
+        return self._rank(candidates, now)
+
+    def _rank(self, candidates: list[TaskRecord], now: datetime) -> TaskRecord:
+        return max(candidates, key=lambda t: (self.score(t, now), -t.id))
+
+    def dispatched(self, task: TaskRecord) -> None:
+        """Record that task was claimed (stateful policies update their bookkeeping)."""
+
+    async def claim(
+        self, db: Database, *, min_priority: int = 0, epic_id: int | None = None, now: datetime | None = None
+    ) -> TaskRecord | None:
+        """Claim the next task for this node, or None when nothing eligible is pending."""
+        now = now or datetime.now(timezone.utc)
+        return await db.claim_next_pending(min_priority, epic_id, due_before=self.due_before(now))
+
+
+class AgingScheduler(Scheduler):
+    """Effective priority rises one level per aging_sec waited, so low-priority work cannot starve.
+
+    Ranks a window of the oldest pending tasks in Python, then claims the
+    winner with a conditional UPDATE (moving on if another node took it).
+    """
+
+    name = "aging"
+    window = 1000  # pending tasks considered per claim (oldest first)
+
+    def __init__(self, *, aging_sec: float = 900, deadline_slack_sec: float = 600) -> None:
+        super().__init__(deadline_slack_sec=deadline_slack_sec)
+        self.aging_sec = aging_sec
+
+    def score(self, task: TaskRecord, now: datetime) -> float:
+        return task.priority + _waited_sec(task, now) / self.aging_sec
+
+    async def claim(
+        self, db: Database, *, min_priority: int = 0, epic_id: int | None = None, now: datetime | None = None
+    ) -> TaskRecord | None:
+        now = now or datetime.now(timezone.utc)
+        candidates = await db.list_pending_candidates(min_priority, epic_id, limit=self.window)
+        while candidates:
+            task = self.select(candidates, now)
+            claimed = await db.claim_task(task.id)
+            if claimed is not None:
+                self.dispatched(claimed)
+                return claimed
+            candidates.remove(task)  # claimed by another node in the meantime
+        return None
+
+
+class FairScheduler(AgingScheduler):
+    """Weighted fair queuing across flows (epics or targets), aging within each flow.
+
+    Start-time fair queuing: every flow carries a virtual start tag. The
+    backlogged flow with the smallest tag goes next and its tag advances by
+    1/weight, so busy flows share dispatches in proportion to their weights
+    however many tasks each has queued. A flow that was idle restarts at the
+    current virtual time rather than banking credit.
+    """
+
+    name = "fair"
+
+    def __init__(
+        self,
+        *,
+        key: str = "epic",
+        weights: dict[str, float] | None = None,
+        aging_sec: float = 900,
+        deadline_slack_sec: float = 600,
+    ) -> None:
+        super().__init__(aging_sec=aging_sec, deadline_slack_sec=deadline_slack_sec)
+        self.key = key
+        self.weights = weights or {}
+        self._tags: dict[str, float] = {}
+        self._vtime = 0.0
+
+    def flow(self, task: TaskRecord) -> str:
+        if self.key == "target":
+            return task.target
+        return "" if task.epic_id is None else str(task.epic_id)
+
+    def _start_tag(self, flow: str) -> float:
+        return max(self._tags.get(flow, 0.0), self._vtime)
+
+    def _rank(self, candidates: list[TaskRecord], now: datetime) -> TaskRecord:
+        flows: dict[str, list[TaskRecord]] = {}
+        for t in candidates:
+            flows.setdefault(self.flow(t), []).append(t)
+        chosen = min(flows, key=lambda f: (self._start_tag(f), -self.weights.get(f, 1.0), f))
+        return super()._rank(flows[chosen], now)
+
+    def dispatched(self, task: TaskRecord) -> None:
+        flow = self.flow(task)
+        start = self._start_tag(flow)
+        self._vtime = start
+        self._tags[flow] = start + 1 / self.weights.get(flow, 1.0)
+
+
+def create_scheduler(config: AppConfig) -> Scheduler:
+    slack = config.deadline_slack_sec
+    if config.scheduler == "aging":
+        return AgingScheduler(aging_sec=config.scheduler_aging_sec, deadline_slack_sec=slack)
+    if config.scheduler == "fair":
+        return FairScheduler(
+            key=config.scheduler_fair_key,
+            weights=config.scheduler_weights,
+            aging_sec=config.scheduler_aging_sec,
+            deadline_slack_sec=slack,
+        )
+    return Scheduler(deadline_slack_sec=slack)
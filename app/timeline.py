@@ -0,0 +1,108 @@
+"""태스크 실행 타임라인 — 단계/도구 호출 스팬 기록 + 단계별 백분위 집계"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from app.analytics import percentile
+
+PHASE = "phase"
+TOOL = "tool"
+
+# tool_use input keys worth showing next to the tool name, in order of preference
+_TOOL_DETAIL_KEYS = ("command", "file_path", "path", "pattern", "url", "description")
+
+SpanRow = tuple[str, str, str, float, str]  # (kind, name, started_at, duration_ms, detail)
+
+# Span duration histogram upper bounds in ms for /api/spans/stats (last bucket is open-ended)
+SPAN_BUCKETS_MS = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 30000, 60000,
+    120000, 300000, 600000, 1200000, 1800000, 3600000, 7200000,
+)
+
+
+def _wall(offset_sec: float = 0.0) -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=offset_sec)).isoformat()
+
+
+def tool_detail(tool_input: object) -> str:
+    """Short description of a tool call from its input (command, file path, ...)."""
+    if not isinstance(tool_input, dict):
+        return ""
+    for key in _TOOL_DETAIL_KEYS:
+        value = tool_input.get(key)
+        if isinstance(value, str) and value:
+            return value[:160]
+    return ""
+
+
+class TaskTimeline:
+    """Spans of one task attempt, buffered in memory and saved in one batch when the attempt ends.
+
+    Durations come from perf_counter; started_at is the wall clock, for
+    placing spans on the waterfall. A tool call runs from its tool_use
+    event to the next stream-json line (normally its tool_result).
+    """
+
+    def __init__(self, task_id: int) -> None:
+        self.task_id = task_id
+        self.spans: list[SpanRow] = []
+        self._open_tools: list[tuple[str, str, float, str]] = []  # (name, started_at, t0, detail)
+
+    def add(self, kind: str, name: str, seconds: float, detail: str = "", *, started_at: str | None = None) -> None:
+        """Record a span that just ended after `seconds`."""
+        start = started_at or _wall(seconds)
+        self.spans.append((kind, name, start, round(seconds * 1000, 1), detail))
+
+    @contextmanager
+    def phase(self, name: str, detail: str = "") -> Iterator[None]:
+        started_at, t0 = _wall(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(PHASE, name, time.perf_counter() - t0, detail, started_at=started_at)
+
+    def tool_started(self, name: str, detail: str = "") -> None:
+        self._open_tools.append((name, _wall(), time.perf_counter(), detail))
+
+    def tools_finished(self) -> None:
+        """Close every open tool call (parallel calls end together at the next event)."""
+        if not self._open_tools:
+            return
+        now = time.perf_counter()
+        for name, started_at, t0, detail in self._open_tools:
+            self.add(TOOL, name, now - t0, detail, started_at=started_at)
+        self._open_tools.clear()
+
+
+def summarize(rows: Iterable[tuple[str, str, int, int, float, float, float]]) -> dict[str, list[dict]]:
+    """Per-(kind, name) count, total, p50, p95 and max from span_histogram rows.
+
+    Rows are (kind, name, bucket, count, total_ms, min_ms, max_ms) per
+    SPAN_BUCKETS_MS bucket; percentiles are interpolated within their bucket
+    and clamped to the observed min/max.
+    """
+    groups: dict[tuple[str, str], list] = {}  # → [hist, count, total_ms, min_ms, max_ms]
+    for kind, name, bucket, count, total_ms, min_ms, max_ms in rows:
+        group = groups.setdefault((kind, name), [{}, 0, 0.0, min_ms, max_ms])
+        group[0][bucket] = group[0].get(bucket, 0) + count
+        group[1] += count
+        group[2] += total_ms
+        group[3] = min(group[3], min_ms)
+        group[4] = max(group[4], max_ms)
+    result: dict[str, list[dict]] = {PHASE: [], TOOL: []}
+    for (kind, name), (hist, count, total_ms, min_ms, max_ms) in groups.items():
+        result.setdefault(kind, []).append({
+            "name": name,
+            "count": count,
+            "total_ms": round(total_ms, 1),
+            "p50_ms": min(max(percentile(hist, 0.5, SPAN_BUCKETS_MS), min_ms), max_ms),
+            "p95_ms": min(max(percentile(hist, 0.95, SPAN_BUCKETS_MS), min_ms), max_ms),
+            "max_ms": max_ms,
+        })
+    for entries in result.values():
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+    return result
@@ -0,0 +1,213 @@
+"""End-to-end agent throughput — AgentWorker + API against the fake claude CLI
+
+Submits N tasks through the API, starts the agent loop, follows the log
+SSE stream like the dashboard does, and reports tasks/min, DB writes/s,
+SSE delivery latency (log record → client) and process RSS.
+
+Usage: python -m bench.agent_throughput [--tasks 50] [--events 20] [--event-rate 200] [--fail-rate 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.main import app
+from app.models import TaskStatus
+from bench.fake_claude import install
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE")
+
+
+def _count_writes(db: Database) -> Callable[[], int]:
+    """Wrap the backend primitives so every INSERT/UPDATE/DELETE statement is counted."""
+    count = 0
+
+    def wrap(method: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        async def counted(sql: str, *args, **kwargs):
+            nonlocal count
+            if sql.lstrip().upper().startswith(_WRITE_VERBS):
+                count += 1
+            return await method(sql, *args, **kwargs)
+        return counted
+
+    for name in ("_execute", "_executemany", "_fetchone", "_fetchall"):
+        setattr(db, name, wrap(getattr(db, name)))
+    return lambda: count
+
+
+async def _follow_sse(path: str, latencies: list[float], stop: asyncio.Event) -> None:
+    """Drive the SSE route straight through ASGI, timing each log event from its record timestamp."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+        "root_path": "", "app": app,
+    }
+    sent_request = False
+
+    async def receive() -> dict:
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] != "http.response.body":
+            return
+        received = datetime.now(timezone.utc)
+        for line in message.get("body", b"").decode().splitlines():
+            if line.startswith("data:"):
+                record = json.loads(line[5:])
+                latencies.append((received - datetime.fromisoformat(record["timestamp"])).total_seconds())
+
+    await app(scope, receive, send)
+
+
+def _rss_mb() -> tuple[float, float]:
+    """(current, peak) resident set size in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        current = pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        current = peak
+    return current, peak
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(
+    tasks: int = 50,
+    *,
+    timeout_sec: float = 600,
+    warm_pool: int = 0,
+    **fake_options,
+) -> dict:
+    """Drain `tasks` tasks through the agent and return the measurements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        db = Database(str(root / "bench.db"))
+        await db.init()
+        writes = _count_writes(db)
+        config = AppConfig(
+            target_project=str(root),
+            claude_command=install(root / "bin", **fake_options),
+            auto_approve=True,
+            retry_backoff_sec=0,
+            rate_limit_cooldown_sec=1,
+            claude_warm_pool=warm_pool,
+        )
+        agent = AgentWorker(config, db)
+        app.state.db = db
+        app.state.agent = agent
+
+        latencies: list[float] = []
+        stop = asyncio.Event()
+        sse = asyncio.create_task(_follow_sse("/api/agent/logs", latencies, stop))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            payload = {"tasks": [{"title": f"Bench task {i}", "description": "Make the change."} for i in range(tasks)]}
+            (await client.post("/api/tasks/bulk", json=payload)).raise_for_status()
+            writes_before = writes()
+            started = time.perf_counter()
+            (await client.post("/api/agent/start")).raise_for_status()
+            deadline = started + timeout_sec
+            while time.perf_counter() < deadline:
+                counts = await db.count_tasks_by_status()
+                if counts.get(TaskStatus.DONE.value, 0) + counts.get(TaskStatus.FAILED.value, 0) >= tasks:
+                    break
+                await asyncio.sleep(0.1)
+            elapsed = time.perf_counter() - started
+            (await client.post("/api/agent/stop")).raise_for_status()
+
+        # Let the stream deliver what is already buffered before disconnecting
+        for _ in range(50):
+            if len(latencies) >= len(agent.get_logs()):
+                break
+            await asyncio.sleep(0.1)
+        stop.set()
+        await asyncio.wait_for(sse, timeout=5)
+        await agent.launcher.close()
+        counts = await db.count_tasks_by_status()
+        await db.close()
+
+    rss, peak = _rss_mb()
+    done = counts.get(TaskStatus.DONE.value, 0)
+    return {
+        "tasks": tasks,
+        "done": done,
+        "failed": counts.get(TaskStatus.FAILED.value, 0),
+        "elapsed_sec": round(elapsed, 2),
+        "tasks_per_min": round(done / elapsed * 60, 1) if elapsed else 0.0,
+        "db_writes": writes() - writes_before,
+        "db_writes_per_sec": round((writes() - writes_before) / elapsed, 1) if elapsed else 0.0,
+        "sse_events": len(latencies),
+        "sse_p50_ms": round(_pct(latencies, 0.5) * 1000, 1),
+        "sse_p95_ms": round(_pct(latencies, 0.95) * 1000, 1),
+        "sse_max_ms": round(max(latencies, default=0) * 1000, 1),
+        "rss_mb": round(rss, 1),
+        "peak_rss_mb": round(peak, 1),
+        "launcher": agent.launcher.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--events", type=int, default=20, help="assistant events per run")
+    parser.add_argument("--event-rate", type=float, default=200, help="events per second")
+    parser.add_argument("--output-bytes", type=int, default=400)
+    parser.add_argument("--startup-sec", type=float, default=0.0, help="simulated CLI cold start")
+    parser.add_argument("--cost", type=float, default=0.01)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--warm-pool", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = asyncio.run(run(
+        args.tasks,
+        warm_pool=args.warm_pool,
+        events=args.events,
+        event_rate=args.event_rate,
+        output_bytes=args.output_bytes,
+        startup_sec=args.startup_sec,
+        cost=args.cost,
+        fail_rate=args.fail_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    ))
+    print(f"{report['done']}/{report['tasks']} done, {report['failed']} failed in {report['elapsed_sec']}s")
+    print(f"  throughput   {report['tasks_per_min']:8.1f} tasks/min")
+    print(f"  db writes    {report['db_writes']:8d} total   {report['db_writes_per_sec']:8.1f} /s")
+    print(f"  sse latency  p50 {report['sse_p50_ms']:.1f} ms   p95 {report['sse_p95_ms']:.1f} ms   "
+          f"max {report['sse_max_ms']:.1f} ms   ({report['sse_events']} events)")
+    print(f"  rss          {report['rss_mb']:.1f} MB   peak {report['peak_rss_mb']:.1f} MB")
+    launcher = report["launcher"]
+    print(f"  first event  warm {launcher['first_event_warm']['avg_sec'] * 1000:.0f} ms   "
+          f"cold {launcher['first_event_cold']['avg_sec'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
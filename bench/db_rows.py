@@ -0,0 +1,93 @@
+"""Task row read/serialize throughput — pydantic Task vs TaskRecord
+
+Usage: python -m bench.db_rows [--rows 5000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.database import Database
+from app.models import Task
+
+
+async def _seed(db: Database, rows: int) -> None:
+    for i in range(rows):
+        await db._db.execute(
+            "INSERT INTO tasks (title, description, priority, status, labels, output, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'done', ?, ?, '2026-01-01T00:00:00+00:00', '2026-01-01T00:00:00+00:00')",
+            (f"Task {i}", "description " * 20, i % 4, json.dumps(["bench", f"l{i % 7}"]), "output line\n" * 50),
+        )
+    await db._db.commit()
+
+
+async def _legacy_list(db: Database) -> list[Task]:
+    """Pre-TaskRecord read path: dict(row) + json.loads + Task(**d)."""
+    async with db._db.execute("SELECT * FROM tasks ORDER BY priority DESC, created_at ASC") as cur:
+        rows = await cur.fetchall()
+    out = []
+    for row in rows:
+        d = dict(row)
+        d["labels"] = json.loads(d.get("labels") or "[]")
+        out.append(Task(**d))
+    return out
+
+
+def _best(samples: list[float]) -> float:
+    return min(samples)
+
+
+async def run(rows: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "bench.db"))
+        await db.init()
+        await _seed(db, rows)
+
+        results: dict[str, float] = {}
+        cases = {
+            "list (pydantic Task)": lambda: _legacy_list(db),
+            "list (TaskRecord)": lambda: db.list_tasks(),
+        }
+        for name, fn in cases.items():
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                await fn()
+                samples.append(time.perf_counter() - t0)
+            results[name] = rows / _best(samples)
+
+        legacy = await _legacy_list(db)
+        records = await db.list_tasks()
+        for name, fn in {
+            "serialize (model_dump)": lambda: [t.model_dump() for t in legacy],
+            "serialize (to_dict)": lambda: [t.to_dict() for t in records],
+        }.items():
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - t0)
+            results[name] = rows / _best(samples)
+
+        await db.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    results = asyncio.run(run(args.rows, args.repeat))
+    print(f"rows={args.rows} repeat={args.repeat} (best of)")
+    for name, rate in results.items():
+        print(f"  {name:<26} {rate:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
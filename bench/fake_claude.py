@@ -0,0 +1,112 @@
+"""Fake claude CLI — realistic stream-json without API spend, for load tests
+
+Reads the prompt from stdin like `claude -p`, then emits a system init
+event, a stream of assistant text / tool_use events and a result event
+carrying cost, duration and session id (`--resume <id>` keeps the id).
+Behaviour comes from FAKE_CLAUDE_* environment variables:
+
+    STARTUP_SEC      delay before reading stdin (CLI boot)          0
+    EVENTS           assistant events per run                       5
+    EVENT_RATE       events per second                              50
+    DURATION_SEC     total run time; overrides EVENT_RATE           -
+    OUTPUT_BYTES     text size per assistant event                  200
+    TOOL_RATIO       fraction of events that are tool_use           0.3
+    COST             total_cost_usd per run                         0.01
+    FAIL_RATE        probability of an error exit                   0
+    RATE_LIMIT_RATE  probability of a 429 rate-limit result         0
+    SEED             seed outcomes on (seed, prompt) for repeatable runs
+
+Usage: install(bin_dir, events=20, fail_rate=0.1) → path for claude_command
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+_SCRIPT = Path(__file__).resolve()
+
+_DEFAULTS = {
+    "startup_sec": 0.0,
+    "events": 5,
+    "event_rate": 50.0,
+    "duration_sec": None,
+    "output_bytes": 200,
+    "tool_ratio": 0.3,
+    "cost": 0.01,
+    "fail_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "seed": None,
+}
+
+_TOOLS = ["Read", "Edit", "Bash", "Grep", "Write"]
+
+
+def _options() -> dict:
+    opts = dict(_DEFAULTS)
+    for name, default in _DEFAULTS.items():
+        raw = os.environ.get(f"FAKE_CLAUDE_{name.upper()}")
+        if raw is not None:
+            opts[name] = type(default)(raw) if default is not None else raw
+    return opts
+
+
+def _emit(event: dict) -> None:
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+def main(argv: list[str]) -> int:
+    opts = _options()
+    time.sleep(opts["startup_sec"])
+    prompt = sys.stdin.read()
+    session_id = argv[argv.index("--resume") + 1] if "--resume" in argv else str(uuid.uuid4())
+    rng = random.Random(f"{opts['seed']}:{prompt}") if opts["seed"] is not None else random.Random()
+    started = time.perf_counter()
+
+    _emit({"type": "system", "subtype": "init", "model": "fake-claude", "session_id": session_id, "cwd": os.getcwd()})
+    events = int(opts["events"])
+    interval = float(opts["duration_sec"]) / max(events, 1) if opts["duration_sec"] else 1 / float(opts["event_rate"])
+    text = ("lorem ipsum " * (int(opts["output_bytes"]) // 12 + 1))[: int(opts["output_bytes"])]
+    for i in range(events):
+        time.sleep(interval)
+        if rng.random() < opts["tool_ratio"]:
+            block = {"type": "tool_use", "id": f"toolu_{i}", "name": rng.choice(_TOOLS), "input": {}}
+        else:
+            block = {"type": "text", "text": f"[{i}] {text}"}
+        _emit({"type": "assistant", "message": {"content": [block]}, "session_id": session_id})
+
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    roll = rng.random()
+    if roll < opts["rate_limit_rate"]:
+        _emit({"type": "result", "subtype": "error", "is_error": True, "result": "API Error: 429 rate_limit_error",
+               "session_id": session_id, "duration_ms": duration_ms})
+        return 1
+    if roll < opts["rate_limit_rate"] + opts["fail_rate"]:
+        _emit({"type": "error", "error": "fake failure: tests did not pass", "session_id": session_id})
+        return 1
+    _emit({"type": "result", "subtype": "success", "result": f"Done ({len(prompt)} prompt chars)",
+           "total_cost_usd": opts["cost"], "duration_ms": duration_ms, "session_id": session_id})
+    return 0
+
+
+def install(bin_dir: Path, **options) -> str:
+    """Write a `claude` wrapper with these FAKE_CLAUDE_* options; returns its path."""
+    unknown = set(options) - set(_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown fake claude options: {sorted(unknown)}")
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    env = " ".join(f"FAKE_CLAUDE_{k.upper()}='{v}'" for k, v in options.items() if v is not None)
+    wrapper = bin_dir / "claude"
+    wrapper.write_text(f"#!/bin/sh\n{env} exec '{sys.executable}' '{_SCRIPT}' \"$@\"\n", encoding="utf-8")
+    wrapper.chmod(0o755)
+    return str(wrapper)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
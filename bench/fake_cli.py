@@ -0,0 +1,78 @@
+"""Offline gh/git stand-in — canned responses by argument prefix, every call logged
+
+Each rule in the FAKE_CLI_RESPONSES JSON file is matched against the call
+by tool and argument prefix; the first match decides stdout/returncode (and
+an optional delay in seconds). Unmatched calls succeed with no output.
+Every call is appended to FAKE_CLI_LOG as one JSON line.
+
+    [{"tool": "gh", "args": ["pr", "create"], "stdout": "https://github.com/o/r/pull/1"},
+     {"tool": "git", "args": ["push"], "returncode": 1, "stdout": "rejected"}]
+
+Usage: python -m bench.fake_cli <gh|git> [args...]
+       install(bin_dir, rules, log_path) writes gh/git wrappers for CommandRunner(executables=...)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+_SCRIPT = Path(__file__).resolve()
+
+
+def _match(rules: list[dict], tool: str, args: list[str]) -> dict:
+    for rule in rules:
+        prefix = rule.get("args", [])
+        if rule.get("tool", tool) == tool and args[: len(prefix)] == prefix:
+            return rule
+    return {}
+
+
+def main(argv: list[str]) -> int:
+    tool, args = argv[0], argv[1:]
+    log_path = os.environ.get("FAKE_CLI_LOG")
+    if log_path:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"tool": tool, "args": args, "cwd": os.getcwd()}) + "\n")
+    rules_path = os.environ.get("FAKE_CLI_RESPONSES")
+    rules = json.loads(Path(rules_path).read_text(encoding="utf-8")) if rules_path else []
+    rule = _match(rules, tool, args)
+    if rule.get("delay"):
+        time.sleep(rule["delay"])
+    if rule.get("stdout"):
+        print(rule["stdout"])
+    if rule.get("stderr"):
+        print(rule["stderr"], file=sys.stderr)
+    return int(rule.get("returncode", 0))
+
+
+def install(bin_dir: Path, rules: list[dict], log_path: Path) -> dict[str, str]:
+    """Write gh/git wrapper scripts bound to these rules; returns tool → executable path."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    rules_path = bin_dir / "responses.json"
+    rules_path.write_text(json.dumps(rules), encoding="utf-8")
+    executables: dict[str, str] = {}
+    for tool in ("gh", "git"):
+        wrapper = bin_dir / tool
+        wrapper.write_text(
+            "#!/bin/sh\n"
+            f"FAKE_CLI_RESPONSES='{rules_path}' FAKE_CLI_LOG='{log_path}' "
+            f"exec '{sys.executable}' '{_SCRIPT}' {tool} \"$@\"\n",
+            encoding="utf-8",
+        )
+        wrapper.chmod(0o755)
+        executables[tool] = str(wrapper)
+    return executables
+
+
+def read_log(log_path: Path) -> list[dict]:
+    if not log_path.exists():
+        return []
+    return [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines() if line]
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,115 @@
+"""API JSON encoding latency — default JSONResponse vs FastJSONResponse
+
+Serves realistic payloads (task board, reports with large raw_metrics)
+from two in-process apps: "before" returns dicts and lets FastAPI run
+jsonable_encoder + stdlib json; "after" returns FastJSONResponse.
+
+Usage: python -m bench.json_response [--tasks 2000] [--reports 90] [--requests 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.responses import FastJSONResponse, orjson
+from app.models import TaskPriority, TaskStatus
+from app.reports.models import ReportSnapshot, ReportType
+
+
+def _task_payload(n: int) -> list[dict]:
+    statuses = list(TaskStatus)
+    return [
+        {
+            "id": i,
+            "title": f"Task {i} — 작업",
+            "description": "Implement the thing. " * 10,
+            "status": statuses[i % len(statuses)],
+            "priority": TaskPriority(i % 4),
+            "labels": ["bench", f"l{i % 7}"],
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "updated_at": "2026-01-01T00:00:00+00:00",
+            "started_at": None,
+            "completed_at": None,
+            "output": "output line\n" * 40,
+            "error": "",
+            "exit_code": 0,
+            "cost_usd": 0.0123,
+            "approval_status": "",
+            "rejection_feedback": "",
+            "retry_count": 0,
+            "branch_name": f"feat/task-{i}",
+            "pr_url": "",
+            "plan_id": None,
+            "target": "",
+            "task_order": 0,
+            "epic_id": i % 5 or None,
+        }
+        for i in range(n)
+    ]
+
+
+def _report_payload(n: int) -> list[dict]:
+    trades = [
+        {"symbol": f"S{j:03d}", "pnl": j * 1.5, "buy_price": 100.0 + j, "sell_price": 101.0 + j, "quantity": 10}
+        for j in range(120)
+    ]
+    return [
+        ReportSnapshot(
+            report_type=ReportType.DAILY,
+            period_key=f"2026-01-{i % 28 + 1:02d}",
+            symbols_traded=[t["symbol"] for t in trades[:30]],
+            raw_metrics={"trades": trades, "hourly": {str(h): h * 0.1 for h in range(24)}},
+        ).model_dump()
+        for i in range(n)
+    ]
+
+
+def _build_apps(payloads: dict[str, object]) -> tuple[FastAPI, FastAPI]:
+    before, after = FastAPI(), FastAPI(default_response_class=FastJSONResponse)
+    for name, payload in payloads.items():
+        before.add_api_route(f"/{name}", lambda p=payload: p)
+        after.add_api_route(f"/{name}", lambda p=payload: FastJSONResponse(p))
+    return before, after
+
+
+async def _measure(app: FastAPI, path: str, requests: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    samples = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)  # warm-up
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            resp = await client.get(path)
+            samples.append((time.perf_counter() - t0) * 1000)
+            resp.raise_for_status()
+    return samples
+
+
+async def run(tasks: int, reports: int, requests: int) -> None:
+    payloads = {"tasks": _task_payload(tasks), "reports": _report_payload(reports)}
+    before, after = _build_apps(payloads)
+    print(f"orjson: {'yes' if orjson else 'no (stdlib fallback)'}  requests={requests}")
+    for name in payloads:
+        b = await _measure(before, f"/{name}", requests)
+        a = await _measure(after, f"/{name}", requests)
+        bm, am = statistics.median(b), statistics.median(a)
+        print(f"  /{name:<8} before p50 {bm:8.2f} ms   after p50 {am:8.2f} ms   ({bm / am:4.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--reports", type=int, default=90)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.reports, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Scheduler policies under synthetic load — throughput and wait-time tails
+
+Discrete-event simulation of one agent draining the queue: each dispatch
+takes a fixed service time, and the policy's select() picks the next task.
+
+Usage: python -m bench.scheduler_sim [--service-sec 60]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from app.models import TaskPriority, TaskRecord, TaskStatus
+from app.scheduler import AgingScheduler, FairScheduler, Scheduler
+
+_T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_task(
+    task_id: int,
+    arrival_sec: float,
+    priority: TaskPriority = TaskPriority.MEDIUM,
+    *,
+    epic_id: int | None = None,
+    target: str = "",
+    deadline_sec: float | None = None,
+) -> TaskRecord:
+    created = (_T0 + timedelta(seconds=arrival_sec)).isoformat()
+    deadline = None if deadline_sec is None else (_T0 + timedelta(seconds=deadline_sec)).isoformat(timespec="seconds")
+    return TaskRecord(
+        id=task_id, title=f"T{task_id}", description="", status=TaskStatus.PENDING, priority=priority,
+        labels=[], created_at=created, updated_at=created, started_at=None, completed_at=None, output="",
+        error="", exit_code=None, cost_usd=None, approval_status="", rejection_feedback="", retry_count=0,
+        branch_name="", pr_url="", plan_id=None, target=target, task_order=0, epic_id=epic_id, deadline=deadline,
+        not_before=None, session_id="", finished_at=None,
+    )
+
+
+@dataclass
+class SimResult:
+    waits: dict[int, float] = field(default_factory=dict)  # task id → seconds from arrival to dispatch
+    order: list[int] = field(default_factory=list)  # dispatch order
+    makespan_sec: float = 0.0
+
+    @property
+    def throughput_per_hour(self) -> float:
+        return len(self.order) / self.makespan_sec * 3600 if self.makespan_sec else 0.0
+
+    def percentile(self, ids: list[int], q: float) -> float:
+        values = sorted(self.waits[i] for i in ids)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def simulate(scheduler: Scheduler, tasks: list[TaskRecord], service_sec: float = 60) -> SimResult:
+    """Run tasks (arrival = created_at) through scheduler with one worker."""
+    arrivals = sorted(tasks, key=lambda t: (t.created_at, t.id))
+    arrival_at = {t.id: (datetime.fromisoformat(t.created_at) - _T0).total_seconds() for t in arrivals}
+    result = SimResult()
+    pending: list[TaskRecord] = []
+    clock, i = 0.0, 0
+    while i < len(arrivals) or pending:
+        while i < len(arrivals) and arrival_at[arrivals[i].id] <= clock:
+            pending.append(arrivals[i])
+            i += 1
+        if not pending:
+            clock = arrival_at[arrivals[i].id]
+            continue
+        task = scheduler.select(pending, _T0 + timedelta(seconds=clock))
+        pending.remove(task)
+        scheduler.dispatched(task)
+        result.waits[task.id] = clock - arrival_at[task.id]
+        result.order.append(task.id)
+        clock += service_sec
+    result.makespan_sec = clock
+    return result
+
+
+def overload(service_sec: float = 60) -> list[TaskRecord]:
+    """High-priority arrivals at full capacity for 200 slots, plus a low-priority review task every 10."""
+    tasks = [make_task(i, i * service_sec, TaskPriority.HIGH) for i in range(200)]
+    tasks += [make_task(1000 + i, i * 10 * service_sec, TaskPriority.LOW) for i in range(20)]
+    return tasks
+
+
+def flood(service_sec: float = 60) -> list[TaskRecord]:
+    """Epic 1 dumps 300 tasks at once; epic 2 trickles one task every 2 slots."""
+    tasks = [make_task(i, 0, epic_id=1) for i in range(300)]
+    tasks += [make_task(1000 + i, i * 2 * service_sec, epic_id=2) for i in range(100)]
+    return tasks
+
+
+def _policies(service_sec: float) -> list[Scheduler]:
+    return [
+        Scheduler(),
+        AgingScheduler(aging_sec=10 * service_sec),
+        FairScheduler(aging_sec=10 * service_sec),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--service-sec", type=float, default=60)
+    args = parser.parse_args()
+
+    scenarios = {
+        "overload (LOW vs HIGH)": (overload(args.service_sec), lambda t: "LOW" if t.priority == TaskPriority.LOW else "HIGH"),
+        "flood (epic 1 vs epic 2)": (flood(args.service_sec), lambda t: f"epic {t.epic_id}"),
+    }
+    for name, (tasks, group_of) in scenarios.items():
+        print(f"\n{name}: {len(tasks)} tasks, {args.service_sec:.0f}s each")
+        print(f"  {'policy':<10} {'tasks/h':>8} {'group':<8} {'p50 wait':>9} {'p99 wait':>9} {'max wait':>9}")
+        groups: dict[str, list[int]] = {}
+        for t in tasks:
+            groups.setdefault(group_of(t), []).append(t.id)
+        for policy in _policies(args.service_sec):
+            res = simulate(policy, tasks, args.service_sec)
+            for group, ids in sorted(groups.items()):
+                print(
+                    f"  {policy.name:<10} {res.throughput_per_hour:>8.1f} {group:<8} "
+                    f"{res.percentile(ids, 0.5):>8.0f}s {res.percentile(ids, 0.99):>8.0f}s {res.percentile(ids, 1.0):>8.0f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
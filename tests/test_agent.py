@@ -13,7 +13,7 @@ import pytest
 from app.agent import AgentWorker
 from app.config import AppConfig
 from app.database import Database
-from app.models import AgentState, EpicCreate, LogLevel, PlanCreate, PlanStatus, TaskCreate, TaskStatus
+from app.models import AgentState, EpicCreate, LogLevel, PlanCreate, PlanStatus, TaskCreate, TaskPriority, TaskStatus
 
 
 @pytest.fixture
@@ -66,14 +66,35 @@ async def test_log_after_index(setup):
     assert logs[0].message == "B"
 
 
-async def test_approve_when_not_waiting(setup):
+async def test_logs_per_task(setup):
     agent, _, _ = setup
-    assert agent.approve() is False
+    agent._add_log(LogLevel.SYSTEM, "global")
+    agent._add_log(LogLevel.SYSTEM, "one", 1)
+    agent._add_log(LogLevel.SYSTEM, "two", 2)
+    assert [l.message for l in agent.get_logs(task_id=1)] == ["one"]
+
+
+async def test_log_buffer_capacity():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "test.db"))
+        await db.init()
+        agent = AgentWorker(AppConfig(target_project=tmp, log_buffer_size=3), db)
+        for i in range(5):
+            agent._add_log(LogLevel.SYSTEM, f"m{i}")
+        assert [l.message for l in agent.get_logs()] == ["m2", "m3", "m4"]
+        await db.close()
+
+
+async def test_approve_when_not_waiting(setup):
+    agent, db, _ = setup
+    assert await agent.approve() is False
+    task = await db.create_task(TaskCreate(title="Pending"))
+    assert await agent.approve(task.id) is False
 
 
 async def test_reject_when_not_waiting(setup):
     agent, _, _ = setup
-    assert agent.reject("bad") is False
+    assert await agent.reject(feedback="bad") is False
 
 
 @patch("app.agent.asyncio.create_subprocess_exec")
@@ -109,6 +130,13 @@ async def test_run_task_failure(mock_exec, setup):
     assert agent._tasks_failed == 1
 
 
+async def _wait_for_status(db: Database, task_id: int, status: TaskStatus) -> None:
+    for _ in range(100):
+        if (await db.get_task(task_id)).status == status:
+            return
+        await asyncio.sleep(0.02)
+
+
 @patch("app.agent.asyncio.create_subprocess_exec")
 async def test_approval_gate(mock_exec):
     """Test manual approval flow."""
@@ -123,23 +151,19 @@ async def test_approval_gate(mock_exec):
         stdout = [json.dumps({"type": "result", "result": "Changes made", "total_cost_usd": 0.02})]
         mock_exec.return_value = _make_mock_process(stdout, returncode=0)
 
-        # Run in background
-        run_coro = asyncio.create_task(agent.run_task(task.id))
-
-        # Wait for approval state
-        for _ in range(50):
-            await asyncio.sleep(0.05)
-            if agent._state == AgentState.WAITING_APPROVAL:
-                break
-
-        assert agent._state == AgentState.WAITING_APPROVAL
+        # The run ends at the gate; the worker is free while the review is pending
+        await agent.run_task(task.id)
+        assert (await db.get_task(task.id)).status == TaskStatus.WAITING_APPROVAL
+        assert agent._state == AgentState.IDLE
+        assert not agent._exec_lock.locked()
 
-        # Approve
-        assert agent.approve()
-        await run_coro
+        assert await agent.approve(task.id)
+        assert not await agent.approve(task.id)  # already decided
+        await _wait_for_status(db, task.id, TaskStatus.DONE)
 
         t = await db.get_task(task.id)
         assert t.status == TaskStatus.DONE
+        assert agent._tasks_completed == 1
         await db.close()
 
 
@@ -157,15 +181,10 @@ async def test_rejection_flow(mock_exec):
         stdout = [json.dumps({"type": "result", "result": "Done", "total_cost_usd": 0.01})]
         mock_exec.return_value = _make_mock_process(stdout, returncode=0)
 
-        run_coro = asyncio.create_task(agent.run_task(task.id))
+        await agent.run_task(task.id)
 
-        for _ in range(50):
-            await asyncio.sleep(0.05)
-            if agent._state == AgentState.WAITING_APPROVAL:
-                break
-
-        assert agent.reject("Add error handling")
-        await run_coro
+        assert await agent.reject(task.id, "Add error handling")
+        await _wait_for_status(db, task.id, TaskStatus.PENDING)
 
         t = await db.get_task(task.id)
         assert t.status == TaskStatus.PENDING
@@ -185,6 +204,101 @@ async def test_loop_start_stop(mock_exec, setup):
     assert agent.get_status().state == AgentState.STOPPED
 
 
+async def test_loop_wakes_on_new_task(setup):
+    agent, db, config = setup
+    config.poll_interval = 60
+    picked = asyncio.Event()
+
+    async def fake_execute(task_id, title, description, **kwargs):
+        await db.set_task_done(task_id)
+        picked.set()
+
+    agent._execute_task = fake_execute
+    await agent.start_loop()
+    await asyncio.sleep(0.05)
+    assert agent.get_status().state == AgentState.IDLE
+
+    await db.create_task(TaskCreate(title="Now"))
+    await asyncio.wait_for(picked.wait(), timeout=2)
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_loop_runs_other_work_during_retry_backoff(mock_exec, setup):
+    agent, db, config = setup
+    config.poll_interval = 60
+    config.max_retries = 1
+    config.retry_backoff_sec = 60
+    flaky = await db.create_task(TaskCreate(title="Flaky", priority=TaskPriority.HIGH))
+    other = await db.create_task(TaskCreate(title="Other", priority=TaskPriority.LOW))
+    mock_exec.side_effect = [
+        _make_mock_process([json.dumps({"type": "error", "error": "Transient"})], returncode=1),
+        _make_mock_process([json.dumps({"type": "result", "result": "Done"})], returncode=0),
+    ]
+
+    await agent.start_loop()
+    for _ in range(100):
+        if (await db.get_task(other.id)).status == TaskStatus.DONE:
+            break
+        await asyncio.sleep(0.02)
+
+    # The failed task backs off in the queue instead of blocking the loop
+    assert (await db.get_task(other.id)).status == TaskStatus.DONE
+    t = await db.get_task(flaky.id)
+    assert t.status == TaskStatus.PENDING
+    assert t.retry_count == 1
+    assert t.not_before > t.updated_at
+    assert agent.get_status().state == AgentState.IDLE
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_loop_continues_while_tasks_await_review(mock_exec, setup):
+    agent, db, config = setup
+    config.auto_approve = False
+    config.poll_interval = 60
+    first = await db.create_task(TaskCreate(title="First", priority=TaskPriority.HIGH))
+    second = await db.create_task(TaskCreate(title="Second", priority=TaskPriority.LOW))
+    mock_exec.side_effect = [
+        _make_mock_process([json.dumps({"type": "result", "result": "One"})], returncode=0),
+        _make_mock_process([json.dumps({"type": "result", "result": "Two"})], returncode=0),
+        _make_mock_process([json.dumps({"type": "result", "result": "Two, fixed"})], returncode=0),
+    ]
+
+    await agent.start_loop()
+    await _wait_for_status(db, second.id, TaskStatus.WAITING_APPROVAL)
+    assert (await db.get_task(first.id)).status == TaskStatus.WAITING_APPROVAL
+
+    # Reviews are independent: the oldest is picked by default
+    assert await agent.reject(second.id, "Try again")
+    assert await agent.approve()
+    await _wait_for_status(db, first.id, TaskStatus.DONE)
+    assert (await db.get_task(first.id)).status == TaskStatus.DONE
+    assert (await db.get_task(second.id)).rejection_feedback == "Try again"
+
+
+async def test_loop_wakes_on_reopen(setup):
+    agent, db, config = setup
+    config.poll_interval = 60
+    task = await db.create_task(TaskCreate(title="Again"))
+    await db.set_task_failed(task.id, "boom")
+    runs: list[int] = []
+
+    async def fake_execute(task_id, title, description, **kwargs):
+        runs.append(task_id)
+        await db.set_task_done(task_id)
+
+    agent._execute_task = fake_execute
+    await agent.start_loop()
+    await asyncio.sleep(0.05)
+    assert runs == []
+
+    await db.retry_task(task.id)
+    for _ in range(100):
+        if runs:
+            break
+        await asyncio.sleep(0.01)
+    assert runs == [task.id]
+
+
 async def test_build_prompt(setup):
     agent, _, _ = setup
     p = agent._build_prompt("Fix bug", "In login module")
@@ -428,6 +542,101 @@ async def test_stream_json_parsing(mock_exec, setup):
     assert LogLevel.RESULT in levels
 
 
+# ── Session Resume ──
+
+
+def _prompt_sent(proc) -> str:
+    return proc.stdin.write.call_args.args[0].decode()
+
+
+@patch("app.agent.asyncio.sleep", new_callable=AsyncMock)
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_retry_resumes_session_with_error_tail(mock_exec, mock_sleep, setup):
+    agent, db, config = setup
+    config.max_retries = 1
+    task = await db.create_task(TaskCreate(title="Flaky task", description="Long original description"))
+    procs = [
+        _make_mock_process([
+            json.dumps({"type": "system", "subtype": "init", "session_id": "sess-1"}),
+            json.dumps({"type": "error", "error": "pytest: 3 failed"}),
+        ], returncode=1),
+        _make_mock_process([json.dumps({"type": "result", "result": "Fixed", "session_id": "sess-1"})]),
+    ]
+    mock_exec.side_effect = procs
+
+    await agent.run_task(task.id)
+
+    t = await db.get_task(task.id)
+    assert t.status == TaskStatus.DONE
+    assert t.session_id == "sess-1"
+    assert t.error == ""
+    second_cmd = list(mock_exec.call_args_list[1].args)
+    assert second_cmd[second_cmd.index("--resume") + 1] == "sess-1"
+    follow_up = _prompt_sent(procs[1])
+    assert "pytest: 3 failed" in follow_up
+    assert "Long original description" not in follow_up
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_rejected_task_resumes_with_feedback(mock_exec, setup):
+    agent, db, config = setup
+    config.auto_approve = False
+    task = await db.create_task(TaskCreate(title="Needs fix", description="Original spec"))
+    first = _make_mock_process([json.dumps({"type": "result", "result": "Done", "session_id": "sess-2"})])
+    second = _make_mock_process([json.dumps({"type": "result", "result": "Done again", "session_id": "sess-2"})])
+    mock_exec.side_effect = [first, second]
+
+    await agent.run_task(task.id)
+    assert await agent.reject(task.id, "Add error handling")
+    await _wait_for_status(db, task.id, TaskStatus.PENDING)
+    await agent.run_task(task.id)
+
+    assert "--resume" not in mock_exec.call_args_list[0].args
+    assert "--resume" in mock_exec.call_args_list[1].args
+    follow_up = _prompt_sent(second)
+    assert "Add error handling" in follow_up
+    assert "Original spec" not in follow_up
+    assert (await db.get_task(task.id)).status == TaskStatus.WAITING_APPROVAL
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_missing_session_falls_back_to_full_prompt(mock_exec, setup):
+    agent, db, config = setup
+    config.auto_approve = False
+    task = await db.create_task(TaskCreate(title="Needs fix", description="Original spec"))
+    await db.set_task_session(task.id, "gone")
+    await db.set_task_rejected(task.id, "Rename the helper")
+    fresh = _make_mock_process([json.dumps({"type": "result", "result": "Done", "session_id": "sess-3"})])
+    mock_exec.side_effect = [
+        _make_mock_process(["No conversation found with session ID: gone"], returncode=1),
+        fresh,
+    ]
+
+    await agent.run_task(task.id)
+
+    assert "--resume" not in mock_exec.call_args_list[1].args
+    prompt = _prompt_sent(fresh)
+    assert "Original spec" in prompt
+    assert "Rename the helper" in prompt
+    t = await db.get_task(task.id)
+    assert (t.status, t.session_id, t.retry_count) == (TaskStatus.WAITING_APPROVAL, "sess-3", 0)
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_resume_disabled_starts_fresh(mock_exec, setup):
+    agent, db, config = setup
+    config.claude_resume = False
+    task = await db.create_task(TaskCreate(title="T", description="Spec"))
+    await db.set_task_session(task.id, "sess-4")
+    await db.set_task_rejected(task.id, "Try again")
+    mock_exec.return_value = _make_mock_process([json.dumps({"type": "result", "result": "Done"})])
+
+    await agent.run_task(task.id)
+
+    assert "--resume" not in mock_exec.call_args.args
+    assert "Spec" in _prompt_sent(mock_exec.return_value)
+
+
 # ── Plan Tests ──
 
 
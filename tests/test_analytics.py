@@ -0,0 +1,176 @@
+"""Task analytics tests (rollup maintained on status changes, percentiles, breakdown API)"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.agent import AgentWorker
+from app.analytics import DURATION_BUCKETS, breakdown, daily, duration_bucket, percentile, since_day, totals
+from app.config import AppConfig
+from app.database import Database
+from app.models import EpicCreate, TaskCreate, TaskPriority, TaskStatus, TaskUpdate
+from bench.fake_claude import install
+
+
+@pytest.fixture
+async def db(tmp_path):
+    d = Database(str(tmp_path / "test.db"))
+    await d.init()
+    yield d
+    await d.close()
+
+
+async def _finish(db: Database, title: str, *, ok: bool = True, seconds: float = 60, cost: float | None = None, retries: int = 0, **fields):
+    task = await db.create_task(TaskCreate(title=title, **fields))
+    await db.set_task_started(task.id)
+    for _ in range(retries):
+        await db.increment_retry_count(task.id)
+    started = (datetime.now(timezone.utc) - timedelta(seconds=seconds)).isoformat()
+    await db._execute("UPDATE tasks SET started_at = ? WHERE id = ?", (started, task.id))
+    if ok:
+        await db.set_task_done(task.id, cost)
+    else:
+        await db.set_task_failed(task.id, "boom", cost)
+    return task
+
+
+# ── Math ──
+
+
+def test_percentile_interpolates_within_bucket():
+    assert percentile({}, 0.5) is None
+    # 10 samples in the (5, 10] bucket: the median sits halfway through it
+    assert percentile({duration_bucket(7): 10}, 0.5) == 7.5
+    assert percentile({0: 9, duration_bucket(100): 1}, 0.95) == 105.0
+    assert percentile({len(DURATION_BUCKETS): 3}, 0.5) == DURATION_BUCKETS[-1]
+
+
+def test_daily_fills_empty_days():
+    row = ("2026-03-02", "", 2, 1, 1, 2, 0.5, 2, 90.0, 3)
+    series = daily([row], [("2026-03-02", "", duration_bucket(30), 3)], "2026-03-01", 3)
+
+    assert [d["day"] for d in series] == ["2026-03-01", "2026-03-02", "2026-03-03"]
+    assert series[0]["done"] == 0 and series[0]["success_rate"] is None
+    mid = series[1]
+    assert (mid["done"], mid["failed"], mid["success_rate"], mid["cost_per_task"]) == (2, 1, 0.667, 0.25)
+    assert (mid["retry_rate"], mid["retries_per_task"], mid["avg_sec"]) == (0.333, 0.667, 30.0)
+
+
+def test_breakdown_and_totals_merge_days():
+    rows = [("2026-03-01", "a", 1, 0, 0, 0, 0.1, 1, 10.0, 1), ("2026-03-02", "a", 1, 1, 1, 1, 0.3, 2, 20.0, 2),
+            ("2026-03-02", "b", 0, 1, 0, 0, 0.0, 0, 0.0, 0)]
+    groups = breakdown(rows, [], 2)
+
+    assert [(g["key"], g["done"], g["failed"]) for g in groups] == [("a", 2, 1), ("b", 0, 1)]
+    assert groups[0]["tasks_per_day"] == 1.0
+    assert groups[1]["cost_per_task"] is None
+    assert totals(rows, [], 2)["failed"] == 2
+
+
+def test_since_day_window():
+    assert since_day(1, date(2026, 3, 10)) == "2026-03-10"
+    assert since_day(7, date(2026, 3, 10)) == "2026-03-04"
+
+
+# ── Rollup ──
+
+
+async def test_rollup_updated_on_completion(db):
+    epic = await db.create_epic(EpicCreate(title="E"))
+    await _finish(db, "a", seconds=30, cost=0.2, epic_id=epic.id, labels=["api", "api"], priority=TaskPriority.HIGH)
+    await _finish(db, "b", ok=False, seconds=600, retries=2, epic_id=epic.id, labels=["api"])
+    await _finish(db, "c", seconds=45, cost=0.4, target="/srv/other")
+    today = since_day(1)
+
+    (row,) = await db.task_rollup("all", today)
+    assert row[:8] == (today, "", 2, 1, 1, 2, pytest.approx(0.6), 2)
+
+    by_epic = {key: vals for _day, key, *vals in await db.task_rollup("epic", today)}
+    assert by_epic[str(epic.id)][:2] == [1, 1]
+    assert by_epic[""][:2] == [1, 0]
+    (label,) = await db.task_rollup("label", today)
+    assert label[1:4] == ("api", 1, 1)  # duplicate label counted once
+    priorities = {key: vals[0] + vals[1] for _day, key, *vals in await db.task_rollup("priority", today)}
+    assert priorities == {"high": 1, "medium": 2}
+    hist = await db.task_rollup_durations("all", today)
+    assert sum(count for *_, count in hist) == 3
+
+
+async def test_retried_task_counts_once_under_final_outcome(db):
+    task = await _finish(db, "flaky", ok=False, cost=0.1)
+    await db.retry_task(task.id)
+    await db.set_task_started(task.id)
+    await db.set_task_done(task.id, 0.2)
+    today = since_day(1)
+
+    (row,) = await db.task_rollup("all", today)
+    assert row[2:8] == (1, 0, 0, 0, pytest.approx(0.2), 1)
+    assert sum(count for *_, count in await db.task_rollup_durations("all", today)) == 1
+
+
+async def test_status_patch_rolls_up_and_back(db):
+    task = await db.create_task(TaskCreate(title="manual", labels=["ops"]))
+    await db.update_task(task.id, TaskUpdate(status=TaskStatus.DONE))
+    today = since_day(1)
+    (row,) = await db.task_rollup("all", today)
+    assert row[2:4] == (1, 0)
+
+    await db.bulk_update_tasks([task.id], TaskUpdate(status=TaskStatus.FAILED))
+    (row,) = await db.task_rollup("all", today)
+    assert row[2:4] == (0, 1)
+
+    await db.update_task(task.id, TaskUpdate(status=TaskStatus.PENDING))
+    assert await db.task_rollup("all", today) == []
+    assert await db.task_rollup("label", today) == []
+
+
+async def test_review_wait_not_counted_in_duration(db):
+    task = await db.create_task(TaskCreate(title="reviewed"))
+    await db.set_task_started(task.id)
+    started = (datetime.now(timezone.utc) - timedelta(hours=3)).isoformat()
+    ran = (datetime.now(timezone.utc) - timedelta(hours=3) + timedelta(seconds=40)).isoformat()
+    await db.set_task_waiting(task.id, "out", 0, 0.1)
+    await db._execute("UPDATE tasks SET started_at = ?, finished_at = ? WHERE id = ?", (started, ran, task.id))
+    await db.set_task_done(task.id)
+
+    (row,) = await db.task_rollup("all", since_day(1))
+    assert row[8] == pytest.approx(40, abs=1)
+    assert (await db.get_task(task.id)).finished_at == ran
+
+
+async def test_rollup_backfilled_once_for_existing_tasks(tmp_path):
+    path = str(tmp_path / "test.db")
+    d = Database(path)
+    await d.init()
+    await _finish(d, "old", cost=0.1)
+    await _finish(d, "older", cost=0.1)
+    await d._execute("DELETE FROM task_rollup_entries")
+    await d._execute("UPDATE task_rollup SET done = done + 5")  # a pre-entries rollup that double counted
+    await d.close()
+
+    d = Database(path)
+    await d.init()
+    (row,) = await d.task_rollup("all", since_day(1))
+    assert row[2] == 2
+    await d.close()
+
+    d = Database(path)
+    await d.init()  # rollup already populated: no double count
+    (row,) = await d.task_rollup("all", since_day(1))
+    assert row[2] == 2
+    await d.close()
+
+
+async def test_auto_approved_run_records_cost(tmp_path, db):
+    config = AppConfig(target_project=str(tmp_path), claude_command=install(tmp_path / "bin", events=1, cost=0.07), auto_approve=True)
+    agent = AgentWorker(config, db)
+    task = await db.create_task(TaskCreate(title="Costed"))
+
+    await agent.run_task(task.id)
+
+    assert (await db.get_task(task.id)).status == TaskStatus.DONE
+    (row,) = await db.task_rollup("all", since_day(1))
+    assert (row[6], row[7]) == (pytest.approx(0.07), 1)
+    await agent.launcher.close()
@@ -0,0 +1,348 @@
+"""REST API tests (ASGI in-process client)"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.agent import AgentWorker
+from app.api import responses
+from app.api.responses import FastJSONResponse
+from app.config import AppConfig
+from app.database import Database
+from app.main import app
+from app.models import EpicCreate, PlanCreate, TaskCreate, TaskPriority, TaskStatus
+
+
+@pytest.fixture
+async def client():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "test.db"))
+        await db.init()
+        app.state.db = db
+        app.state.agent = AgentWorker(AppConfig(target_project=tmp), db)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
+        await db.close()
+
+
+def test_fast_json_enums_and_unicode():
+    body = FastJSONResponse({"status": TaskStatus.DONE, "priority": TaskPriority.HIGH, "title": "한글"}).body
+    assert json.loads(body) == {"status": "done", "priority": 2, "title": "한글"}
+
+
+def test_fast_json_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse({"status": TaskStatus.DONE, "n": [1, 2]}).body
+    assert json.loads(body) == {"status": "done", "n": [1, 2]}
+
+
+async def test_list_tasks_json(client):
+    db = app.state.db
+    await db.create_task(TaskCreate(title="A", labels=["x"]))
+    resp = await client.get("/api/tasks")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    data = resp.json()
+    assert data[0]["title"] == "A"
+    assert data[0]["status"] == "pending"
+    assert data[0]["labels"] == ["x"]
+
+
+async def test_default_response_class(client):
+    resp = await client.get("/health")
+    assert resp.json() == {"status": "ok"}
+
+
+# ── Conditional Requests ──
+
+
+async def test_tasks_etag_304(client):
+    db = app.state.db
+    await db.create_task(TaskCreate(title="A"))
+    first = await client.get("/api/tasks")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "no-cache"
+    assert "last-modified" in first.headers
+
+    again = await client.get("/api/tasks", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+async def test_tasks_etag_changes_on_write(client):
+    db = app.state.db
+    t = await db.create_task(TaskCreate(title="A"))
+    etag = (await client.get("/api/tasks")).headers["etag"]
+
+    await db.set_task_started(t.id)
+    resp = await client.get("/api/tasks", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
+    etag = resp.headers["etag"]
+    await db.delete_task(t.id)
+    resp = await client.get("/api/tasks", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+
+async def test_tasks_etag_per_filter(client):
+    db = app.state.db
+    await db.create_task(TaskCreate(title="A", labels=["x"]))
+    etag_all = (await client.get("/api/tasks")).headers["etag"]
+    etag_y = (await client.get("/api/tasks?label=y")).headers["etag"]
+    assert etag_all != etag_y
+
+
+async def test_epic_and_plan_detail_etag(client):
+    db = app.state.db
+    epic = await db.create_epic(EpicCreate(title="E"))
+    plan = await db.create_plan(PlanCreate(title="P"))
+    for path in (f"/api/epics/{epic.id}", f"/api/plans/{plan.id}", "/api/epics", "/api/plans"):
+        etag = (await client.get(path)).headers["etag"]
+        assert (await client.get(path, headers={"If-None-Match": etag})).status_code == 304
+
+    # Adding a task to the epic invalidates both epic views
+    epic_etag = (await client.get(f"/api/epics/{epic.id}")).headers["etag"]
+    list_etag = (await client.get("/api/epics")).headers["etag"]
+    await db.create_task(TaskCreate(title="T", epic_id=epic.id))
+    assert (await client.get(f"/api/epics/{epic.id}", headers={"If-None-Match": epic_etag})).status_code == 200
+    assert (await client.get("/api/epics", headers={"If-None-Match": list_etag})).status_code == 200
+
+
+async def test_missing_resources_still_404(client):
+    assert (await client.get("/api/epics/999")).status_code == 404
+    assert (await client.get("/api/plans/999")).status_code == 404
+
+
+async def test_task_logs_etag(client):
+    db = app.state.db
+    t = await db.create_task(TaskCreate(title="A"))
+    await db.insert_log(t.id, "2026-01-01T00:00:00+00:00", "SYS", "one")
+    etag = (await client.get(f"/api/tasks/{t.id}/logs")).headers["etag"]
+    assert (await client.get(f"/api/tasks/{t.id}/logs", headers={"If-None-Match": etag})).status_code == 304
+    await db.insert_log(t.id, "2026-01-01T00:00:01+00:00", "SYS", "two")
+    assert (await client.get(f"/api/tasks/{t.id}/logs", headers={"If-None-Match": etag})).status_code == 200
+
+
+# ── Compression ──
+
+
+async def test_gzip_large_response(client):
+    db = app.state.db
+    for i in range(30):
+        await db.create_task(TaskCreate(title=f"Task {i}", description="x" * 200))
+    resp = await client.get("/api/tasks", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert len(resp.json()) == 30  # httpx decodes transparently
+
+
+async def test_small_response_not_compressed(client):
+    resp = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+
+
+async def test_no_compression_without_accept_encoding(client):
+    db = app.state.db
+    for i in range(30):
+        await db.create_task(TaskCreate(title=f"Task {i}", description="x" * 200))
+    resp = await client.get("/api/tasks", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+
+
+# ── Bulk Operations ──
+
+
+async def test_bulk_create_route(client):
+    resp = await client.post("/api/tasks/bulk", json={"tasks": [{"title": "A"}, {"title": "B", "priority": 3}]})
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [t["title"] for t in data] == ["A", "B"]
+    assert data[1]["priority"] == 3
+
+
+async def test_bulk_create_route_rejects_empty(client):
+    assert (await client.post("/api/tasks/bulk", json={"tasks": []})).status_code == 422
+
+
+async def test_bulk_update_route(client):
+    db = app.state.db
+    tasks = await db.bulk_create_tasks([TaskCreate(title="A"), TaskCreate(title="B")])
+    resp = await client.patch("/api/tasks/bulk", json={"ids": [t.id for t in tasks], "patch": {"labels": ["x"]}})
+    assert resp.status_code == 200
+    assert all(t["labels"] == ["x"] for t in resp.json())
+
+
+async def test_bulk_delete_route(client):
+    db = app.state.db
+    await db.bulk_create_tasks([TaskCreate(title="A", labels=["x"]), TaskCreate(title="B")])
+    resp = await client.post("/api/tasks/bulk/delete", json={"label": "x"})
+    assert resp.status_code == 200
+    assert resp.json()["deleted"] == 1
+    assert [t.title for t in await db.list_tasks()] == ["B"]
+
+    assert (await client.post("/api/tasks/bulk/delete", json={})).status_code == 400
+
+
+async def test_analyze_daily_replaces_tasks_atomically(client, monkeypatch):
+    db: Database = app.state.db
+    tag = "[Auto-generated from 2026-01-02 trading analysis]"
+    old = await db.create_task(TaskCreate(title="[Trading] old", description=tag, labels=["trading-analysis"]))
+
+    journal = httpx.MockTransport(lambda request: httpx.Response(200, json={"trades": [{"symbol": "X"}]}))
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kw: real_client(transport=journal, **kw))
+
+    async def fake_claude(prompt, task_id):
+        return 0, json.dumps({"summary": "s", "tasks": [{"title": "new"}]}), 0.1
+
+    monkeypatch.setattr(app.state.agent, "_run_claude", fake_claude)
+
+    async def broken_create(items):
+        await db._execute("INSERT INTO tasks (title) VALUES (?)", ("partial",))
+        raise RuntimeError("create failed")
+
+    monkeypatch.setattr(db, "bulk_create_tasks", broken_create)
+    with pytest.raises(RuntimeError):
+        await client.post("/api/analyze-daily", json={"date": "2026-01-02"})
+    assert [t.id for t in await db.list_tasks()] == [old.id]  # delete rolled back with the failed create
+
+    monkeypatch.undo()
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kw: real_client(transport=journal, **kw))
+    monkeypatch.setattr(app.state.agent, "_run_claude", fake_claude)
+    resp = await client.post("/api/analyze-daily", json={"date": "2026-01-02"})
+    assert resp.status_code == 200
+    assert [t.title for t in await db.list_tasks()] == ["[Trading] new"]
+
+
+async def test_agent_budget(client):
+    data = (await client.get("/api/agent/budget")).json()
+    assert data["spent_usd"] == 0
+    assert data["remaining_usd"] is None
+    assert data["paused"] is False
+
+
+async def test_task_approve_and_reject_routes(client):
+    db: Database = app.state.db
+    a = await db.create_task(TaskCreate(title="A"))
+    b = await db.create_task(TaskCreate(title="B"))
+    assert (await client.post("/api/tasks/9999/approve")).status_code == 404
+    assert (await client.post(f"/api/tasks/{a.id}/approve")).status_code == 409
+    for t in (a, b):
+        await db.set_task_started(t.id)
+        await db.set_task_waiting(t.id, "out", 0, None)
+
+    assert (await client.post(f"/api/tasks/{b.id}/reject", json={"feedback": "nope"})).status_code == 200
+    assert (await client.post(f"/api/tasks/{b.id}/approve")).status_code == 409
+    assert (await client.post("/api/agent/approve")).status_code == 200  # oldest waiting: a
+    assert (await client.post("/api/agent/approve")).status_code == 400
+
+
+async def test_agent_reviews(client):
+    data = (await client.get("/api/agent/reviews")).json()
+    assert data["queued"] == 0
+    assert data["gh_calls"] == 0
+
+
+async def test_agent_launcher(client):
+    data = (await client.get("/api/agent/launcher")).json()
+    assert data["pool_size"] == 0
+    assert data["warm_hits"] == data["cold_starts"] == 0
+
+
+async def test_task_spans_and_stats(client):
+    task_id = (await client.post("/api/tasks", json={"title": "Timed"})).json()["id"]
+    db = app.state.db
+    await db.add_task_spans(task_id, [
+        ("phase", "claude", "2099-01-01T00:00:00+00:00", 900.0, ""),
+        ("tool", "Bash", "2099-01-01T00:00:01+00:00", 300.0, "pytest -q"),
+    ])
+
+    resp = await client.get(f"/api/tasks/{task_id}/spans")
+    spans = resp.json()
+    assert [(s["kind"], s["name"], s["attempt"]) for s in spans] == [("phase", "claude", 1), ("tool", "Bash", 1)]
+    assert spans[1]["detail"] == "pytest -q"
+    etag = resp.headers["etag"]
+    assert (await client.get(f"/api/tasks/{task_id}/spans", headers={"If-None-Match": etag})).status_code == 304
+
+    stats = (await client.get("/api/spans/stats?days=1")).json()
+    assert stats["phase"][0]["name"] == "claude"
+    assert stats["tool"][0]["p95_ms"] == 300.0
+    assert (await client.get("/api/spans/stats?days=0")).status_code == 422
+    assert (await client.get("/api/spans/stats?days=100000")).status_code == 422
+
+
+async def test_analytics_daily_and_breakdown(client):
+    db = app.state.db
+    for title, labels in (("a", ["api"]), ("b", ["api", "ui"])):
+        task = await db.create_task(TaskCreate(title=title, labels=labels))
+        await db.set_task_started(task.id)
+        await db.set_task_done(task.id, 0.5)
+
+    resp = await client.get("/api/analytics/daily?days=7")
+    data = resp.json()
+    assert len(data["series"]) == 7
+    assert data["series"][-1]["done"] == 2
+    assert (data["totals"]["done"], data["totals"]["cost_per_task"], data["totals"]["success_rate"]) == (2, 0.5, 1.0)
+    etag = resp.headers["etag"]
+    assert (await client.get("/api/analytics/daily?days=7", headers={"If-None-Match": etag})).status_code == 304
+
+    groups = (await client.get("/api/analytics/breakdown?by=label&days=7")).json()["groups"]
+    assert [(g["key"], g["done"]) for g in groups] == [("api", 2), ("ui", 1)]
+    assert (await client.get("/api/analytics/breakdown?by=color")).status_code == 400
+    assert (await client.get("/api/analytics/daily?days=0")).status_code == 400
+
+
+async def test_admin_profile(client):
+    resp = await client.get("/api/admin/profile?seconds=0.2&interval_ms=5")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in resp.text.splitlines())
+    assert any(line.startswith("event-loop;") for line in resp.text.splitlines())
+    assert (await client.get("/api/admin/profile?seconds=0")).status_code == 400
+    assert (await client.get("/api/admin/profile?seconds=1&interval_ms=0")).status_code == 400
+
+
+async def test_admin_loop_disabled_without_monitor(client):
+    assert (await client.get("/api/admin/loop")).json() == {"enabled": False}
+
+
+async def test_prometheus_metrics(client):
+    await client.post("/api/tasks", json={"title": "Counted"})
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert "# TYPE pilot_task_duration_seconds histogram" in body
+    assert 'pilot_tasks{status="pending"} 1' in body
+    assert 'pilot_tasks{status="done"} 0' in body
+    assert 'pilot_claude_concurrency{kind="in_flight"} 0' in body
+
+
+async def test_agent_procs(client):
+    data = (await client.get("/api/agent/procs")).json()
+    assert data["max_concurrency"] == 8
+    assert data["commands"] == []
+
+
+async def test_agent_limiter(client):
+    data = (await client.get("/api/agent/limiter")).json()
+    assert data["limit"] == data["max_limit"] == 2
+    assert data["in_flight"] == 0
+    assert data["paused_for_sec"] == 0
+
+
+async def test_db_stats(client):
+    await client.get("/api/tasks")
+    data = (await client.get("/api/db/stats")).json()
+    assert data["writer"]["name"] == "writer"
+    assert sum(r["acquired"] for r in data["readers"]) >= 1
@@ -0,0 +1,199 @@
+"""Budget tracker / budget-aware scheduler tests"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.agent import AgentWorker
+from app.budget import BudgetScheduler, BudgetTracker
+from app.config import AppConfig
+from app.database import Database
+from app.models import EpicCreate, TaskCreate, TaskPriority, TaskStatus, TaskUpdate
+from app.scheduler import Scheduler
+from bench.scheduler_sim import make_task
+from tests.test_agent import _make_mock_process
+
+
+@pytest.fixture
+async def db(tmp_path):
+    d = Database(str(tmp_path / "test.db"))
+    await d.init()
+    yield d
+    await d.close()
+
+
+# ── Tracker ──
+
+
+def test_record_and_remaining():
+    budget = BudgetTracker(daily_usd=10, epic_usd={"1": 2})
+    budget.record(1.5, epic_id=1)
+    budget.record(3.0)
+    assert budget.remaining() == 5.5
+    assert budget.remaining(make_task(1, 0, epic_id=1)) == 0.5
+    assert budget.remaining(make_task(2, 0, epic_id=2)) == 5.5
+    assert BudgetTracker().remaining() is None
+
+
+def test_paused_and_tight():
+    budget = BudgetTracker(daily_usd=10, pause_ratio=0.9, tight_ratio=0.5)
+    budget.record(4.0)
+    assert not budget.tight()
+    budget.record(2.0)
+    assert budget.tight()
+    assert not budget.paused()
+    budget.record(3.0)
+    assert budget.paused()
+
+
+def test_paused_when_run_would_overshoot():
+    budget = BudgetTracker(epic_usd={"1": 6})
+    budget.record(3.0, epic_id=1)
+    budget.record(1.0, epic_id=1)
+    pricey = make_task(1, 0, epic_id=1)
+    pricey.cost_usd = 2.5  # last run cost
+    assert budget.paused(pricey)
+    assert not budget.paused(make_task(2, 0, epic_id=1))  # epic mean 2.0 still fits
+
+
+def test_estimate_fallbacks():
+    budget = BudgetTracker(daily_usd=100)
+    assert budget.estimate(make_task(1, 0, epic_id=1)) == 0.0
+    budget.record(1.0, epic_id=1)
+    budget.record(3.0, epic_id=1)
+    budget.record(5.0)
+    assert budget.estimate(make_task(1, 0, epic_id=1)) == 2.0
+    assert budget.estimate(make_task(2, 0, epic_id=9)) == 3.0
+
+
+def test_day_rollover():
+    budget = BudgetTracker(daily_usd=1)
+    today = datetime.now(timezone.utc)
+    budget.record(1.0, now=today)
+    assert budget.paused(now=today)
+    assert not budget.paused(now=today + timedelta(days=1))
+
+
+def test_epic_and_target_ceilings_are_cumulative():
+    budget = BudgetTracker(epic_usd={"1": 2}, target_usd={"api": 5})
+    today = datetime.now(timezone.utc)
+    budget.record(1.5, epic_id=1, target="api", now=today)
+    tomorrow = today + timedelta(days=1)
+    assert budget.remaining(make_task(1, 0, epic_id=1), now=tomorrow) == 0.5
+    assert budget.remaining(make_task(2, 0, target="api"), now=tomorrow) == 3.5
+    assert budget.snapshot()["spent_usd"] == 0  # only the daily total restarted
+
+
+def test_tight_model():
+    budget = BudgetTracker(daily_usd=10, tight_ratio=0.5, tight_model="haiku")
+    assert budget.model_for(None, "opus") == "opus"
+    budget.record(6.0)
+    assert budget.model_for(None, "opus") == "haiku"
+
+
+async def test_load_from_db(db: Database):
+    epic = await db.create_epic(EpicCreate(title="E"))
+    t = await db.create_task(TaskCreate(title="Ran", epic_id=epic.id))
+    await db.record_spend(1.25, task_id=t.id, epic_id=epic.id)
+    await db.create_task(TaskCreate(title="Not run"))
+
+    budget = BudgetTracker(epic_usd={str(epic.id): 2})
+    await budget.load(db)
+    assert budget.remaining(make_task(9, 0, epic_id=epic.id)) == 0.75
+
+
+async def test_load_counts_runs_not_task_updates(db: Database):
+    epic = await db.create_epic(EpicCreate(title="E"))
+    t = await db.create_task(TaskCreate(title="Retried", epic_id=epic.id))
+    await db.record_spend(1.0, task_id=t.id, epic_id=epic.id)  # first run
+    await db.record_spend(2.0, task_id=t.id, epic_id=epic.id)  # retry
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    await db._execute("UPDATE spend_ledger SET recorded_at = ? WHERE cost_usd = ?", (yesterday, 1.0))
+    await db.set_task_done(t.id, 2.0)
+    await db.update_task(t.id, TaskUpdate(title="Touched today"))  # unrelated updates add no spend
+
+    budget = BudgetTracker(daily_usd=10, epic_usd={str(epic.id): 5})
+    await budget.load(db)
+    snap = budget.snapshot()
+    assert (snap["spent_usd"], snap["runs"]) == (2.0, 1)
+    assert budget.remaining(make_task(9, 0, epic_id=epic.id)) == 2.0  # both runs count toward the epic
+
+
+async def test_ledger_seeded_from_existing_task_costs(tmp_path):
+    d = Database(str(tmp_path / "old.db"))
+    await d.init()
+    t = await d.create_task(TaskCreate(title="Ran before the ledger"))
+    await d.set_task_waiting(t.id, "", 0, 0.5)
+    await d._execute("DROP TABLE spend_ledger")
+    await d.close()
+
+    d = Database(str(tmp_path / "old.db"))
+    await d.init()
+    assert await d.spend_since() == [(None, "", 0.5, 1)]
+    await d.close()
+
+
+# ── Scheduler ──
+
+
+async def test_daily_ceiling_stops_dispatch(db: Database):
+    await db.create_task(TaskCreate(title="Waiting"))
+    budget = BudgetTracker(daily_usd=1)
+    sched = BudgetScheduler(Scheduler(), budget)
+    budget.record(0.99)
+    assert await sched.claim(db) is None
+    assert (await db.list_tasks())[0].status == TaskStatus.PENDING
+
+
+async def test_epic_ceiling_skips_only_that_epic(db: Database):
+    spent = await db.create_epic(EpicCreate(title="Spent"))
+    fresh = await db.create_epic(EpicCreate(title="Fresh"))
+    await db.create_task(TaskCreate(title="Blocked", epic_id=spent.id, priority=TaskPriority.URGENT))
+    ok = await db.create_task(TaskCreate(title="Allowed", epic_id=fresh.id, priority=TaskPriority.LOW))
+    budget = BudgetTracker(epic_usd={str(spent.id): 1})
+    budget.record(1.0, epic_id=spent.id)
+
+    claimed = await BudgetScheduler(Scheduler(), budget).claim(db)
+    assert claimed.id == ok.id
+
+
+def test_tight_budget_prefers_cheaper_tasks():
+    budget = BudgetTracker(daily_usd=10, tight_ratio=0.5)
+    budget.record(6.0)
+    big = make_task(1, 0, TaskPriority.URGENT)
+    big.cost_usd = 3.0
+    small = make_task(2, 0, TaskPriority.LOW)
+    small.cost_usd = 0.5
+    sched = BudgetScheduler(Scheduler(), budget)
+    assert sched.select([big, small], datetime.now(timezone.utc)) is small
+
+
+# ── Agent Integration ──
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_run_capped_by_remaining_budget(mock_exec, tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(
+        target_project=str(tmp_path), auto_approve=True, claude_max_budget=5.0,
+        budget_daily_usd=3.0, budget_tight_ratio=0.5, budget_tight_model="haiku",
+    )
+    agent = AgentWorker(config, db)
+    agent._budget.record(2.0)
+    task = await db.create_task(TaskCreate(title="Cheap"))
+    stdout = [json.dumps({"type": "result", "result": "ok", "total_cost_usd": 0.4})]
+    mock_exec.return_value = _make_mock_process(stdout, returncode=0)
+
+    await agent.run_task(task.id)
+
+    cmd = list(mock_exec.call_args.args)
+    assert cmd[cmd.index("--max-budget-usd") + 1] == "1.0"
+    assert cmd[cmd.index("--model") + 1] == "haiku"
+    assert agent.get_budget()["spent_usd"] == 2.4
+    assert await db.spend_since() == [(None, "", 0.4, 1)]
+    await db.close()
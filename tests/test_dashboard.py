@@ -75,6 +75,12 @@ def test_slide_panel_close(html):
     assert "Escape" in html
 
 
+def test_task_timeline_in_panel(html):
+    assert 'id="spTimeline"' in html
+    assert "/api/tasks/${taskId}/spans" in html
+    assert "function timelineHtml" in html
+
+
 def test_task_log_in_panel(html):
     assert "Execution Log" in html
     assert 'id="spLogArea"' in html
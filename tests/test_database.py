@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+import sqlite3
 import tempfile
 from pathlib import Path
 
 import pytest
 
 from app.database import Database
-from app.models import EpicCreate, EpicStatus, EpicUpdate, PlanCreate, PlanStatus, PlanUpdate, TaskCreate, TaskPriority, TaskStatus, TaskUpdate
+from app.models import EpicCreate, EpicStatus, EpicUpdate, PlanCreate, PlanStatus, PlanUpdate, Task, TaskCreate, TaskPriority, TaskRecord, TaskStatus, TaskUpdate
 
 
 @pytest.fixture
@@ -83,6 +85,95 @@ async def test_pick_next_pending_empty(db: Database):
     assert await db.pick_next_pending() is None
 
 
+async def test_task_deadline_roundtrip(db: Database):
+    t = await db.create_task(TaskCreate(title="Due", deadline="2026-03-01T09:00:00+09:00"))
+    assert t.deadline == "2026-03-01T00:00:00+00:00"
+    moved = await db.update_task(t.id, TaskUpdate(deadline="2026-03-02T00:00:00"))
+    assert moved.deadline == "2026-03-02T00:00:00+00:00"
+    cleared = await db.update_task(t.id, TaskUpdate(deadline=""))
+    assert cleared.deadline is None
+
+
+async def test_claim_next_pending(db: Database):
+    await db.create_task(TaskCreate(title="Low", priority=TaskPriority.LOW))
+    urgent = await db.create_task(TaskCreate(title="Urgent", priority=TaskPriority.URGENT))
+    claimed = await db.claim_next_pending()
+    assert claimed.id == urgent.id
+    assert claimed.status == TaskStatus.IN_PROGRESS
+    assert claimed.started_at is not None
+    assert (await db.claim_next_pending()).title == "Low"
+    assert await db.claim_next_pending() is None
+
+
+async def test_requeued_task_waits_for_not_before(db: Database):
+    t = await db.create_task(TaskCreate(title="Backing off", priority=TaskPriority.URGENT))
+    await db.create_task(TaskCreate(title="Ready", priority=TaskPriority.LOW))
+    await db.claim_next_pending()
+    await db.requeue_task(t.id, not_before="2999-01-01T00:00:00+00:00")
+
+    requeued = await db.get_task(t.id)
+    assert requeued.status == TaskStatus.PENDING
+    assert requeued.not_before == "2999-01-01T00:00:00+00:00"
+    assert [c.title for c in await db.list_pending_candidates()] == ["Ready"]
+    assert (await db.claim_next_pending()).title == "Ready"
+    assert await db.claim_next_pending() is None
+
+    await db.requeue_task(t.id, not_before="2000-01-01T00:00:00+00:00")
+    claimed = await db.claim_next_pending()
+    assert claimed.id == t.id
+    assert claimed.not_before is None
+
+
+async def test_session_and_retry_error_lifecycle(db: Database):
+    t = await db.create_task(TaskCreate(title="Resumable"))
+    assert t.session_id == ""
+    await db.set_task_session(t.id, "sess-1")
+    await db.requeue_task(t.id, error="exit 1: tests failed")
+    requeued = await db.get_task(t.id)
+    assert (requeued.session_id, requeued.error) == ("sess-1", "exit 1: tests failed")
+
+    await db.set_task_started(t.id)
+    assert (await db.get_task(t.id)).error == ""  # a new attempt starts clean
+    await db.set_task_failed(t.id, "boom")
+    retried = await db.retry_task(t.id)
+    assert retried.session_id == ""  # manual retry starts a fresh session
+
+
+async def test_reset_stuck_tasks_after_node_id_change(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    before = Database(path, read_pool_size=0, node_id="old-hostname")
+    await before.init()
+    task = await before.create_task(TaskCreate(title="A"))
+    await before.claim_next_pending()
+    await before.close()  # crash: the claim is left in_progress
+
+    after = Database(path, read_pool_size=0, node_id="new-hostname")
+    await after.init()
+    try:
+        assert await after.reset_stuck_tasks() == 1
+        assert (await after.get_task(task.id)).status == TaskStatus.PENDING
+    finally:
+        await after.close()
+
+
+async def test_listener_fires_after_commit(db: Database):
+    seen: list[str] = []
+    db.add_listener(seen.append)
+    await db.create_task(TaskCreate(title="New"))
+    assert seen == ["tasks"]
+
+    seen.clear()
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await db.create_task(TaskCreate(title="Gone"))
+            raise RuntimeError("rollback")
+    assert seen == []
+
+    db.remove_listener(seen.append)
+    await db.create_task(TaskCreate(title="Unheard"))
+    assert seen == []
+
+
 async def test_task_lifecycle(db: Database):
     t = await db.create_task(TaskCreate(title="Lifecycle"))
     await db.set_task_started(t.id)
@@ -111,6 +202,32 @@ async def test_task_rejection(db: Database):
     assert r.rejection_feedback == "Needs tests"
 
 
+async def test_decide_approval_once(db: Database):
+    t = await db.create_task(TaskCreate(title="Review"))
+    assert await db.decide_approval(t.id, True) is None  # not awaiting review
+    await db.set_task_started(t.id)
+    await db.set_task_waiting(t.id, "out", 0, None)
+    decided = await db.decide_approval(t.id, False)
+    assert decided.approval_status == "rejected"
+    assert await db.decide_approval(t.id, True) is None  # already decided
+
+    # A rerun reopens the gate
+    await db.set_task_rejected(t.id, "again")
+    await db.set_task_waiting(t.id, "out 2", 0, None)
+    assert (await db.decide_approval(t.id, True)).approval_status == "approved"
+
+
+async def test_reset_stuck_keeps_waiting_approval(db: Database):
+    running = await db.create_task(TaskCreate(title="Running"))
+    review = await db.create_task(TaskCreate(title="Review"))
+    await db.set_task_started(running.id)
+    await db.set_task_started(review.id)
+    await db.set_task_waiting(review.id, "out", 0, None)
+    assert await db.reset_stuck_tasks() == 1
+    assert (await db.get_task(running.id)).status == TaskStatus.PENDING
+    assert (await db.get_task(review.id)).status == TaskStatus.WAITING_APPROVAL
+
+
 async def test_task_failure(db: Database):
     t = await db.create_task(TaskCreate(title="Fail"))
     await db.set_task_failed(t.id, "crash")
@@ -119,6 +236,28 @@ async def test_task_failure(db: Database):
     assert f.error == "crash"
 
 
+# ── Task Record Tests ──
+
+
+def test_task_record_fields_match_model():
+    assert list(TaskRecord.__dataclass_fields__) == list(Task.model_fields)
+
+
+async def test_task_record_types(db: Database):
+    t = await db.create_task(TaskCreate(title="Typed", priority=TaskPriority.HIGH, labels=["a", "b"]))
+    assert isinstance(t, TaskRecord)
+    assert t.status is TaskStatus.PENDING
+    assert t.priority is TaskPriority.HIGH
+    assert t.labels == ["a", "b"]
+
+
+async def test_task_record_to_dict_matches_model_dump(db: Database):
+    t = await db.create_task(TaskCreate(title="Dump", labels=["x"], epic_id=None))
+    await db.set_task_waiting(t.id, "out", 0, 0.25)
+    rec = await db.get_task(t.id)
+    assert rec.to_dict() == Task(**rec.to_dict()).model_dump()
+
+
 # ── Label Tests ──
 
 
@@ -595,6 +734,67 @@ async def test_get_epic_stats_empty(db: Database):
     assert stats["done"] == 0
 
 
+async def test_epic_stats_cost_and_duration(db: Database):
+    epic = await db.create_epic(EpicCreate(title="Cost"))
+    t1 = await db.create_task(TaskCreate(title="A", epic_id=epic.id))
+    t2 = await db.create_task(TaskCreate(title="B", epic_id=epic.id))
+    await db._db.execute(
+        "UPDATE tasks SET started_at = ?, completed_at = ?, cost_usd = ? WHERE id = ?",
+        ("2026-01-01T00:00:00+00:00", "2026-01-01T00:01:30+00:00", 0.25, t1.id),
+    )
+    await db._db.execute("UPDATE tasks SET cost_usd = ? WHERE id = ?", (0.5, t2.id))
+    await db._db.commit()
+    stats = await db.get_epic_stats(epic.id)
+    assert stats["cost_usd"] == 0.75
+    assert stats["duration_sec"] == 90.0
+    assert stats["avg_duration_sec"] == 90.0
+
+
+async def test_epic_stats_follow_task_changes(db: Database):
+    e1 = await db.create_epic(EpicCreate(title="E1"))
+    e2 = await db.create_epic(EpicCreate(title="E2"))
+    t = await db.create_task(TaskCreate(title="Move", epic_id=e1.id))
+    await db.update_task(t.id, TaskUpdate(epic_id=e2.id))
+    assert (await db.get_epic_stats(e1.id))["total"] == 0
+    assert (await db.get_epic_stats(e2.id))["by_status"] == {"pending": 1}
+
+    await db.set_task_failed(t.id, "boom")
+    assert (await db.get_epic_stats(e2.id))["by_status"] == {"failed": 1}
+
+    await db.delete_task(t.id)
+    assert (await db.get_epic_stats(e2.id))["total"] == 0
+    async with db._db.execute("SELECT COUNT(*) FROM epic_task_stats") as cur:
+        assert (await cur.fetchone())[0] == 0
+
+
+async def test_epic_stats_unlinked_on_epic_delete(db: Database):
+    epic = await db.create_epic(EpicCreate(title="Gone"))
+    await db.create_task(TaskCreate(title="A", epic_id=epic.id))
+    await db.delete_epic(epic.id)
+    assert (await db.get_epic_stats(epic.id))["total"] == 0
+
+
+async def test_list_epic_stats(db: Database):
+    e1 = await db.create_epic(EpicCreate(title="E1"))
+    e2 = await db.create_epic(EpicCreate(title="E2"))
+    await db.create_task(TaskCreate(title="A", epic_id=e1.id))
+    await db.create_task(TaskCreate(title="B", epic_id=e1.id))
+    stats = await db.list_epic_stats([e1.id, e2.id])
+    assert stats[e1.id]["total"] == 2
+    assert stats[e2.id]["total"] == 0
+    assert stats[e1.id] == await db.get_epic_stats(e1.id)
+
+
+async def test_epic_stats_rebuilt_on_init(db: Database):
+    epic = await db.create_epic(EpicCreate(title="Rebuild"))
+    await db.create_task(TaskCreate(title="A", epic_id=epic.id))
+    await db._db.execute("DELETE FROM epic_task_stats")
+    await db._db.commit()
+    await db.close()
+    await db.init()
+    assert (await db.get_epic_stats(epic.id))["total"] == 1
+
+
 async def test_list_tasks_filter_by_epic(db: Database):
     epic = await db.create_epic(EpicCreate(title="Epic"))
     await db.create_task(TaskCreate(title="In epic", epic_id=epic.id))
@@ -647,3 +847,204 @@ async def test_epic_migration(db: Database):
     assert t.epic_id is None
     p = await db.create_plan(PlanCreate(title="Normal"))
     assert p.epic_id is None
+
+
+# ── Bulk Operation Tests ──
+
+
+async def test_bulk_create_tasks(db: Database):
+    epic = await db.create_epic(EpicCreate(title="Epic"))
+    items = [TaskCreate(title=f"T{i}", labels=["bulk"], epic_id=epic.id) for i in range(1200)]
+    tasks = await db.bulk_create_tasks(items)
+    assert len(tasks) == 1200
+    assert [t.title for t in tasks[:3]] == ["T0", "T1", "T2"]
+    assert all(t.labels == ["bulk"] and t.epic_id == epic.id for t in tasks)
+    assert (await db.get_epic_stats(epic.id))["total"] == 1200
+
+
+async def test_bulk_create_empty(db: Database):
+    assert await db.bulk_create_tasks([]) == []
+
+
+async def test_bulk_update_tasks(db: Database):
+    tasks = await db.bulk_create_tasks([TaskCreate(title=f"T{i}") for i in range(3)])
+    ids = [t.id for t in tasks[:2]]
+    updated = await db.bulk_update_tasks(ids, TaskUpdate(priority=TaskPriority.URGENT, labels=["x"]))
+    assert [t.id for t in updated] == ids
+    assert all(t.priority == TaskPriority.URGENT and t.labels == ["x"] for t in updated)
+    untouched = await db.get_task(tasks[2].id)
+    assert untouched.priority == TaskPriority.MEDIUM
+
+
+async def test_bulk_update_missing_ids(db: Database):
+    assert await db.bulk_update_tasks([999], TaskUpdate(title="X")) == []
+
+
+async def test_delete_tasks_by_ids(db: Database):
+    tasks = await db.bulk_create_tasks([TaskCreate(title=f"T{i}") for i in range(3)])
+    deleted = await db.delete_tasks([tasks[0].id, tasks[2].id, 999])
+    assert deleted == [tasks[0].id, tasks[2].id]
+    assert [t.id for t in await db.list_tasks()] == [tasks[1].id]
+
+
+async def test_delete_tasks_by_filter(db: Database):
+    await db.bulk_create_tasks([
+        TaskCreate(title="A", description="[day 1]", labels=["auto"]),
+        TaskCreate(title="B", description="[day 2]", labels=["auto"]),
+        TaskCreate(title="C", description="[day 1]"),
+    ])
+    deleted = await db.delete_tasks(label="auto", search="[day 1]")
+    assert len(deleted) == 1
+    assert sorted(t.title for t in await db.list_tasks()) == ["B", "C"]
+
+
+async def test_delete_tasks_requires_filter(db: Database):
+    await db.create_task(TaskCreate(title="A"))
+    with pytest.raises(ValueError):
+        await db.delete_tasks()
+    assert await db.delete_tasks([]) == []
+    assert len(await db.list_tasks()) == 1
+
+
+async def test_create_plan_tasks(db: Database):
+    plan = await db.create_plan(PlanCreate(title="Plan"))
+    tasks = await db.create_plan_tasks(plan.id, [("A", "a", "be"), ("B", "b", "fe")])
+    assert [(t.title, t.task_order, t.target, t.plan_id) for t in tasks] == [
+        ("A", 0, "be", plan.id),
+        ("B", 1, "fe", plan.id),
+    ]
+
+
+# ── Transaction Tests ──
+
+
+async def test_transaction_commits_together(db: Database):
+    async with db.transaction():
+        a = await db.create_task(TaskCreate(title="A"))
+        await db.set_task_started(a.id)
+    task = await db.get_task(a.id)
+    assert task.status == TaskStatus.IN_PROGRESS
+
+
+async def test_transaction_rollback(db: Database):
+    with pytest.raises(RuntimeError):
+        async with db.transaction():
+            await db.create_task(TaskCreate(title="A"))
+            raise RuntimeError("boom")
+    assert await db.list_tasks() == []
+    # connection is usable afterwards
+    await db.create_task(TaskCreate(title="B"))
+    assert [t.title for t in await db.list_tasks()] == ["B"]
+
+
+async def test_transaction_isolates_other_writers(db: Database):
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def unit_of_work():
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.create_task(TaskCreate(title="rolled back"))
+                entered.set()
+                await release.wait()
+                raise RuntimeError("abort")
+
+    worker = asyncio.create_task(unit_of_work())
+    await entered.wait()
+    writer = asyncio.create_task(db.create_task(TaskCreate(title="kept")))
+    await asyncio.sleep(0.01)
+    assert not writer.done()  # waits for the open transaction
+    release.set()
+    await worker
+    await writer
+    assert [t.title for t in await db.list_tasks()] == ["kept"]
+
+
+async def test_commits_per_task_lifecycle(db: Database, monkeypatch):
+    commits = 0
+    original = db._db.commit
+
+    async def counting_commit():
+        nonlocal commits
+        commits += 1
+        await original()
+
+    monkeypatch.setattr(db._db, "commit", counting_commit)
+    task = await db.create_task(TaskCreate(title="A"))
+    await db.set_task_started(task.id, branch_name="feature/a")
+    await asyncio.gather(*(db.insert_log(task.id, f"t{i}", "CLAUDE", f"line {i}") for i in range(50)))
+    assert await db.increment_retry_count(task.id) == 1
+    await db.set_task_waiting(task.id, "out", 0, 0.1)
+    await db.set_task_done(task.id)
+    assert len(await db.get_task_logs(task.id)) == 50
+    assert commits <= 7, commits
+
+
+async def test_delete_epic_atomic(db: Database):
+    epic = await db.create_epic(EpicCreate(title="Epic"))
+    task = await db.create_task(TaskCreate(title="T", epic_id=epic.id))
+    assert await db.delete_epic(epic.id) is True
+    assert (await db.get_task(task.id)).epic_id is None
+    assert await db.delete_epic(epic.id) is False
+
+
+async def test_reorder_plan_tasks(db: Database):
+    plan = await db.create_plan(PlanCreate(title="Plan"))
+    a, b, c = await db.create_plan_tasks(plan.id, [("A", "", ""), ("B", "", ""), ("C", "", "")])
+    await db.reorder_plan_tasks(plan.id, [c.id, a.id, b.id])
+    assert [t.title for t in await db.get_plan_tasks(plan.id)] == ["C", "A", "B"]
+
+
+# ── Connection Pool Tests ──
+
+
+async def test_reads_use_reader_pool(db: Database):
+    await db.create_task(TaskCreate(title="A"))
+    await db.list_tasks()
+    stats = db.pool_stats()
+    assert len(stats["readers"]) == 4
+    assert sum(r["acquired"] for r in stats["readers"]) >= 1
+    assert stats["writer"]["acquired"] >= 1
+    assert stats["idle_readers"] == 4
+
+
+async def test_readers_are_read_only(db: Database):
+    with pytest.raises(sqlite3.OperationalError):
+        await db._readers[0].execute("DELETE FROM tasks")
+
+
+async def test_reads_see_own_uncommitted_writes(db: Database):
+    async with db.transaction():
+        t = await db.create_task(TaskCreate(title="A"))
+        assert (await db.get_task(t.id)).title == "A"
+        other = asyncio.create_task(db.get_task(t.id))
+        assert await other is None  # other tasks only see committed rows
+
+
+async def test_reads_proceed_during_write_transaction(db: Database):
+    await db.create_task(TaskCreate(title="A"))
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def long_write():
+        async with db.transaction():
+            await db.create_task(TaskCreate(title="B"))
+            entered.set()
+            await release.wait()
+
+    writer = asyncio.create_task(long_write())
+    await entered.wait()
+    titles = [t.title for t in await asyncio.wait_for(db.list_tasks(), 1)]
+    assert titles == ["A"]
+    release.set()
+    await writer
+    assert len(await db.list_tasks()) == 2
+
+
+async def test_no_reader_pool(tmp_path):
+    db = Database(str(tmp_path / "single.db"), read_pool_size=0)
+    await db.init()
+    await db.create_task(TaskCreate(title="A"))
+    assert [t.title for t in await db.list_tasks()] == ["A"]
+    assert db.pool_stats()["readers"] == []
+    await db.close()
@@ -0,0 +1,259 @@
+"""PostgreSQL backend tests (CLAUDE_PILOT_TEST_PG_DSN or pgserver; skipped otherwise)"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from app.analytics import since_day
+from app.database import NOTIFY_TASKS
+from app.database_pg import PostgresDatabase, _rowcount, to_pg_params
+from app.models import EpicCreate, PlanCreate, TaskCreate, TaskStatus, TaskUpdate
+from app.reports.models import ReportType
+
+
+# ── Placeholder Conversion ──
+
+
+def test_to_pg_params():
+    assert to_pg_params("SELECT * FROM t WHERE a = ? AND b IN (?, ?)") == "SELECT * FROM t WHERE a = $1 AND b IN ($2, $3)"
+    assert to_pg_params("UPDATE t SET a = '?' WHERE b = ?") == "UPDATE t SET a = '?' WHERE b = $1"
+
+
+def test_rowcount():
+    assert _rowcount("UPDATE 3") == 3
+    assert _rowcount("INSERT 0 1") == 1
+    assert _rowcount("CREATE TABLE") == 0
+
+
+# ── Server Fixtures ──
+
+
+@pytest.fixture(scope="session")
+def pg_dsn():
+    dsn = os.environ.get("CLAUDE_PILOT_TEST_PG_DSN")
+    if dsn:
+        yield dsn
+        return
+    pytest.importorskip("asyncpg")
+    pgserver = pytest.importorskip("pgserver")
+    with tempfile.TemporaryDirectory() as tmp:
+        server = pgserver.get_server(tmp, cleanup_mode="stop")
+        yield server.get_uri()
+        server.cleanup()
+
+
+@pytest.fixture
+async def pg(pg_dsn):
+    asyncpg = pytest.importorskip("asyncpg")
+    conn = await asyncpg.connect(pg_dsn)
+    await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public")
+    await conn.close()
+    d = PostgresDatabase(pg_dsn, pool_size=4, node_id="node-a")
+    await d.init()
+    yield d
+    await d.close()
+
+
+@pytest.fixture
+async def pg_other(pg, pg_dsn):
+    """A second node sharing the same database."""
+    d = PostgresDatabase(pg_dsn, pool_size=4, node_id="node-b")
+    await d.init()
+    yield d
+    await d.close()
+
+
+# ── CRUD ──
+
+
+async def test_pg_create_and_search(pg: PostgresDatabase):
+    task = await pg.create_task(TaskCreate(title="Fix Login bug", labels=["auth"]))
+    assert task.id > 0
+    assert task.labels == ["auth"]
+    await pg.create_task(TaskCreate(title="Other"))
+
+    found = await pg.list_tasks(search="login")
+    assert [t.id for t in found] == [task.id]
+
+    updated = await pg.update_task(task.id, TaskUpdate(status=TaskStatus.DONE))
+    assert updated.status == TaskStatus.DONE
+    assert await pg.delete_task(task.id)
+    assert await pg.get_task(task.id) is None
+
+
+async def test_pg_bulk_ops(pg: PostgresDatabase):
+    created = await pg.bulk_create_tasks([TaskCreate(title=f"T{i}", labels=["bulk"]) for i in range(5)])
+    assert [t.title for t in created] == [f"T{i}" for i in range(5)]
+    updated = await pg.bulk_update_tasks([t.id for t in created[:2]], TaskUpdate(priority=3))
+    assert all(t.priority == 3 for t in updated)
+    deleted = await pg.delete_tasks(label="bulk")
+    assert deleted == [t.id for t in created]
+
+
+async def test_pg_transaction_rollback(pg: PostgresDatabase):
+    with pytest.raises(RuntimeError):
+        async with pg.transaction():
+            await pg.create_task(TaskCreate(title="gone"))
+            raise RuntimeError("boom")
+    assert await pg.list_tasks() == []
+
+
+async def test_pg_epic_stats_trigger(pg: PostgresDatabase):
+    epic = await pg.create_epic(EpicCreate(title="E"))
+    a = await pg.create_task(TaskCreate(title="a", epic_id=epic.id))
+    await pg.create_task(TaskCreate(title="b", epic_id=epic.id))
+    await pg.set_task_started(a.id)
+    await pg.set_task_done(a.id)
+
+    stats = await pg.get_epic_stats(epic.id)
+    assert stats["total"] == 2
+    assert stats["by_status"] == {"done": 1, "pending": 1}
+
+
+async def test_pg_task_rollup(pg: PostgresDatabase):
+    for ok in (True, True, False):
+        task = await pg.create_task(TaskCreate(title="t", labels=["api"]))
+        await pg.set_task_started(task.id)
+        if ok:
+            await pg.set_task_done(task.id, 0.25)
+        else:
+            await pg.set_task_failed(task.id, "boom")
+
+    today = since_day(1)
+    (row,) = await pg.task_rollup("label", today)
+    assert row[:4] == (today, "api", 2, 1)
+    assert row[6] == pytest.approx(0.5)
+    assert sum(count for *_, count in await pg.task_rollup_durations("all", today)) == 3
+
+
+async def test_pg_rollup_follows_status_changes(pg: PostgresDatabase):
+    task = await pg.create_task(TaskCreate(title="t"))
+    await pg.set_task_started(task.id)
+    await pg.set_task_failed(task.id, "boom")
+    await pg.retry_task(task.id)
+    await pg.update_task(task.id, TaskUpdate(status=TaskStatus.DONE))
+
+    today = since_day(1)
+    (row,) = await pg.task_rollup("all", today)
+    assert row[2:4] == (1, 0)
+    await pg.update_task(task.id, TaskUpdate(status=TaskStatus.PENDING))
+    assert await pg.task_rollup("all", today) == []
+
+
+async def test_pg_span_histogram(pg: PostgresDatabase):
+    await pg.add_task_spans(1, [("phase", "claude", "2026-01-01T00:00:00+00:00", 1200.0, ""),
+                                ("phase", "claude", "2026-01-01T00:00:01+00:00", 1500.0, "")])
+    assert await pg.span_histogram("") == [("phase", "claude", 10, 2, 2700.0, 1200.0, 1500.0)]
+
+
+async def test_pg_upsert_report(pg: PostgresDatabase):
+    await pg.upsert_report(ReportType.DAILY, "2026-01-02", {"daily_pnl": 1.0})
+    report = await pg.upsert_report(ReportType.DAILY, "2026-01-02", {"daily_pnl": 2.5})
+    assert report.daily_pnl == 2.5
+    assert len(await pg.list_reports(ReportType.DAILY)) == 1
+
+
+async def test_pg_plan_and_logs(pg: PostgresDatabase):
+    plan = await pg.create_plan(PlanCreate(title="P"))
+    tasks = await pg.create_plan_tasks(plan.id, [("one", "", ""), ("two", "", "")])
+    assert [t.task_order for t in tasks] == [0, 1]
+    assert (await pg.pick_next_plan_task(plan.id)).id == tasks[0].id
+    assert await pg.plan_version(plan.id)
+
+    await pg.insert_log(tasks[0].id, "2026-01-01T00:00:00", "SYS", "hello")
+    logs = await pg.get_task_logs(tasks[0].id)
+    assert [entry.message for entry in logs] == ["hello"]
+
+
+# ── Multi-node Queue ──
+
+
+async def test_pg_concurrent_claims_are_distinct(pg: PostgresDatabase, pg_other: PostgresDatabase):
+    await pg.bulk_create_tasks([TaskCreate(title=f"T{i}") for i in range(6)])
+    claims = await asyncio.gather(*(db.claim_next_pending() for db in (pg, pg_other) * 4))
+    claimed = [t for t in claims if t is not None]
+    assert len(claimed) == 6
+    assert len({t.id for t in claimed}) == 6
+    assert all(t.status == TaskStatus.IN_PROGRESS for t in claimed)
+
+
+async def test_pg_claim_prefers_due_task(pg: PostgresDatabase):
+    await pg.create_task(TaskCreate(title="Urgent", priority=3))
+    due = await pg.create_task(TaskCreate(title="Due", priority=0, deadline="2026-01-01T00:00:00"))
+    assert (await pg.claim_next_pending(due_before="2026-01-01T00:10:00+00:00")).id == due.id
+    assert (await pg.claim_task(due.id)) is None
+    assert [t.title for t in await pg.list_pending_candidates()] == ["Urgent"]
+
+
+async def test_pg_claim_skips_backing_off_task(pg: PostgresDatabase):
+    t = await pg.create_task(TaskCreate(title="Retry later", priority=3))
+    await pg.create_task(TaskCreate(title="Ready", priority=0))
+    await pg.claim_next_pending()
+    await pg.requeue_task(t.id, not_before="2999-01-01T00:00:00+00:00")
+    assert (await pg.claim_next_pending()).title == "Ready"
+    assert await pg.claim_next_pending() is None
+
+
+async def test_pg_review_watch_lease(pg: PostgresDatabase):
+    url = "https://github.com/acme/api/pull/1"
+    assert await pg.add_review_watch(url, 1, "t", "2000-01-01T00:00:00+00:00", "2999-01-01T00:00:00+00:00")
+    assert not await pg.add_review_watch(url, 1, "t", "2000-01-01T00:00:00+00:00", "2999-01-01T00:00:00+00:00")
+    leased = await pg.lease_review_watches("2026-01-01T00:00:00+00:00", "2026-01-01T00:02:00+00:00", 10)
+    assert [w.pr_url for w in leased] == [url]
+    assert await pg.lease_review_watches("2026-01-01T00:00:00+00:00", "2026-01-01T00:02:00+00:00", 10) == []
+    assert await pg.next_review_due() == "2026-01-01T00:02:00+00:00"
+
+
+async def test_pg_reset_stuck_only_own_node(pg: PostgresDatabase, pg_other: PostgresDatabase):
+    await pg.bulk_create_tasks([TaskCreate(title="a"), TaskCreate(title="b")])
+    mine = await pg.claim_next_pending()
+    theirs = await pg_other.claim_next_pending()
+
+    assert await pg.reset_stuck_tasks() == 1
+    assert (await pg.get_task(mine.id)).status == TaskStatus.PENDING
+    assert (await pg.get_task(theirs.id)).status == TaskStatus.IN_PROGRESS
+
+
+async def test_pg_dead_node_claims_released(pg: PostgresDatabase, pg_other: PostgresDatabase):
+    await pg.bulk_create_tasks([TaskCreate(title="a"), TaskCreate(title="b")])
+    mine = await pg.claim_next_pending()
+    theirs = await pg_other.claim_next_pending()
+    assert await pg.release_orphaned_claims() == 0  # node-b heartbeated on init
+
+    await pg._execute("UPDATE node_heartbeats SET seen_at = '2000-01-01T00:00:00+00:00' WHERE node_id = 'node-b'")
+    assert await pg.release_orphaned_claims() == 1
+    assert (await pg.get_task(theirs.id)).status == TaskStatus.PENDING
+    assert await pg._fetchone("SELECT claimed_by FROM tasks WHERE id = ?", (theirs.id,)) == ("",)
+    assert (await pg.get_task(mine.id)).status == TaskStatus.IN_PROGRESS
+
+
+async def test_pg_notify_reaches_other_node(pg: PostgresDatabase, pg_other: PostgresDatabase):
+    woke = asyncio.Event()
+    pg_other.add_listener(lambda channel: channel == NOTIFY_TASKS and woke.set())
+    await pg.create_task(TaskCreate(title="wake up"))
+    await asyncio.wait_for(woke.wait(), timeout=5)
+
+
+async def test_pg_listen_reconnects_after_termination(pg: PostgresDatabase, pg_other: PostgresDatabase):
+    woke: list[str] = []
+    pg_other.add_listener(woke.append)
+    pid = pg_other._listen_conn.get_server_pid()
+    await pg._execute("SELECT pg_terminate_backend(?)", (pid,))
+    for _ in range(100):
+        if woke and pg_other._listen_conn is not None:
+            break
+        await asyncio.sleep(0.05)
+    assert woke == [NOTIFY_TASKS]  # missed notifications are covered by a wakeup on reconnect
+    assert pg_other._listen_conn.get_server_pid() != pid
+
+    woke.clear()
+    await pg.create_task(TaskCreate(title="after reconnect"))
+    for _ in range(100):
+        if woke:
+            break
+        await asyncio.sleep(0.05)
+    assert woke == [NOTIFY_TASKS]
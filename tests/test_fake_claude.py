@@ -0,0 +1,76 @@
+"""Fake claude CLI + throughput harness tests (real subprocesses, no API spend)"""
+
+from __future__ import annotations
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskCreate, TaskStatus
+from bench.agent_throughput import run
+from bench.fake_claude import install
+
+
+async def _agent(tmp_path, **fake_options) -> AgentWorker:
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(
+        target_project=str(tmp_path),
+        claude_command=install(tmp_path / "bin", **fake_options),
+        auto_approve=True,
+        retry_backoff_sec=0,
+    )
+    return AgentWorker(config, db)
+
+
+# ── Fake CLI ──
+
+
+async def test_fake_run_completes_with_cost_and_session(tmp_path):
+    agent = await _agent(tmp_path, events=4, event_rate=1000, tool_ratio=0.5, cost=0.25, seed=1)
+    task = await agent.db.create_task(TaskCreate(title="Fake work"))
+
+    await agent.run_task(task.id)
+
+    t = await agent.db.get_task(task.id)
+    assert t.status == TaskStatus.DONE
+    assert any("($0.2500)" in log.message for log in agent.get_logs())
+    assert len(t.session_id) == 36
+    assert any(log.message == "Model: fake-claude" for log in agent.get_logs())
+    await agent.db.close()
+
+
+async def test_fake_failures_use_retries(tmp_path):
+    agent = await _agent(tmp_path, events=1, event_rate=1000, fail_rate=1.0)
+    agent.config.max_retries = 1
+    task = await agent.db.create_task(TaskCreate(title="Always fails"))
+
+    await agent.run_task(task.id)
+
+    t = await agent.db.get_task(task.id)
+    assert (t.status, t.retry_count) == (TaskStatus.FAILED, 1)
+    assert "fake failure" in t.error
+    await agent.db.close()
+
+
+async def test_fake_rate_limit_throttles_agent(tmp_path):
+    agent = await _agent(tmp_path, events=1, event_rate=1000, rate_limit_rate=1.0)
+    task = await agent.db.create_task(TaskCreate(title="Busy API"))
+
+    await agent.run_task(task.id)
+
+    t = await agent.db.get_task(task.id)
+    assert (t.status, t.retry_count) == (TaskStatus.PENDING, 0)
+    assert agent.get_limiter()["throttles"] == 1
+    await agent.db.close()
+
+
+# ── Harness ──
+
+
+async def test_throughput_harness_smoke():
+    report = await run(3, events=3, event_rate=1000, timeout_sec=60)
+    assert (report["done"], report["failed"]) == (3, 0)
+    assert report["tasks_per_min"] > 0
+    assert report["db_writes"] > 0
+    assert report["sse_events"] > 0
+    assert report["peak_rss_mb"] > 0
@@ -0,0 +1,159 @@
+"""Warm claude process pool tests (stub CLI script with a simulated cold start)"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.launcher import ClaudeLauncher
+from app.models import TaskCreate, TaskStatus
+
+# Pays a startup delay before reading stdin, like CLI boot + auth, then answers in stream-json
+_STUB = """
+import json, os, sys, time
+time.sleep(float(os.environ.get("STUB_STARTUP_SEC", "0.3")))
+prompt = sys.stdin.read()
+print(json.dumps({"type": "system", "subtype": "init", "model": "stub", "pid": os.getpid()}), flush=True)
+print(json.dumps({"type": "result", "result": f"done: {len(prompt)} chars", "total_cost_usd": 0.01}), flush=True)
+"""
+
+
+@pytest.fixture
+def stub_cli(tmp_path) -> str:
+    script = tmp_path / "stub_claude.py"
+    script.write_text(_STUB, encoding="utf-8")
+    wrapper = tmp_path / "claude"
+    wrapper.write_text(f"#!/bin/sh\nexec '{sys.executable}' '{script}' \"$@\"\n", encoding="utf-8")
+    wrapper.chmod(0o755)
+    return str(wrapper)
+
+
+async def _wait_idle(launcher: ClaudeLauncher, n: int) -> None:
+    for _ in range(100):
+        if launcher.stats()["idle"] == n:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"pool never reached {n} idle: {launcher.stats()}")
+
+
+async def _finish(launch, prompt: bytes = b"hi") -> bytes:
+    stdout, _ = await launch.proc.communicate(prompt)
+    return stdout
+
+
+# ── Pool ──
+
+
+async def test_launch_reuses_warm_process(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=1)
+    first = await launcher.launch([stub_cli, "-p"], str(tmp_path))
+    assert not first.warm
+    await _wait_idle(launcher, 1)
+
+    second = await launcher.launch([stub_cli, "-p"], str(tmp_path))
+    assert second.warm
+    assert b"done: 2 chars" in await _finish(second)
+    await _finish(first)
+    stats = launcher.stats()
+    assert (stats["warm_hits"], stats["cold_starts"]) == (1, 1)
+    await launcher.close()
+
+
+async def test_pool_keyed_by_argv_and_cwd(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=1)
+    await _finish(await launcher.launch([stub_cli, "-p"], str(tmp_path)))
+    await _wait_idle(launcher, 1)
+    other_model = await launcher.launch([stub_cli, "-p", "--model", "haiku"], str(tmp_path))
+    other_cwd = await launcher.launch([stub_cli, "-p"], str(Path(tmp_path).parent))
+    assert not other_model.warm and not other_cwd.warm
+    await asyncio.gather(_finish(other_model), _finish(other_cwd))
+    await launcher.close()
+
+
+async def test_idle_process_expires(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=1, idle_sec=0.5)
+    await _finish(await launcher.launch([stub_cli, "-p"], str(tmp_path)))
+    await _wait_idle(launcher, 1)
+    proc = next(iter(launcher._idle.values()))[0].proc
+    await _wait_idle(launcher, 0)
+    assert launcher.stats()["expired"] == 1
+    for _ in range(100):  # reaped by the launcher, nobody else waits on it
+        if proc.returncode is not None:
+            break
+        await asyncio.sleep(0.02)
+    assert proc.returncode is not None
+    await launcher.close()
+
+
+async def test_one_off_argv_not_refilled(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=2)
+    launch = await launcher.launch([stub_cli, "-p", "--resume", "abc"], str(tmp_path), refill=False)
+    assert not launch.warm
+    await _finish(launch)
+    await asyncio.sleep(0.1)
+    assert launcher.stats()["idle"] == 0
+    await launcher.close()
+
+
+async def test_disabled_pool_spawns_cold(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=0)
+    for _ in range(2):
+        launch = await launcher.launch([stub_cli, "-p"], str(tmp_path))
+        assert not launch.warm
+        await _finish(launch)
+    assert launcher.stats()["idle"] == 0
+
+
+async def test_close_kills_idle(stub_cli, tmp_path):
+    launcher = ClaudeLauncher(pool_size=2)
+    await _finish(await launcher.launch([stub_cli, "-p"], str(tmp_path)))
+    await _wait_idle(launcher, 2)
+    procs = [e.proc for idle in launcher._idle.values() for e in idle]
+    await launcher.close()
+    assert launcher.stats()["idle"] == 0
+    assert all(p.returncode is not None for p in procs)
+
+
+# ── Agent Integration ──
+
+
+async def test_second_task_starts_warm(stub_cli, tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(target_project=str(tmp_path), claude_command=stub_cli, auto_approve=True, claude_warm_pool=1)
+    agent = AgentWorker(config, db)
+    for title in ("First", "Second"):
+        task = await db.create_task(TaskCreate(title=title))
+        await agent.run_task(task.id)
+        assert (await db.get_task(task.id)).status == TaskStatus.DONE
+        await _wait_idle(agent.launcher, 1)
+
+    stats = agent.launcher.stats()
+    assert (stats["warm_hits"], stats["cold_starts"]) == (1, 1)
+    # The warm process already paid the 0.3s startup while the first task ran
+    assert stats["first_event_warm"]["avg_sec"] < stats["first_event_cold"]["avg_sec"] - 0.1
+    await agent.launcher.close()
+    await db.close()
+
+
+async def test_budget_capped_run_not_refilled(stub_cli, tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(
+        target_project=str(tmp_path), claude_command=stub_cli, auto_approve=True,
+        claude_warm_pool=1, budget_daily_usd=5.0,
+    )
+    agent = AgentWorker(config, db)
+    task = await db.create_task(TaskCreate(title="Capped"))
+    await agent.run_task(task.id)
+    assert (await db.get_task(task.id)).status == TaskStatus.DONE
+    await asyncio.sleep(0.1)
+    assert agent.launcher.stats()["idle"] == 0  # its --max-budget-usd value won't repeat
+    await agent.launcher.close()
+    await db.close()
@@ -0,0 +1,76 @@
+"""Log ring buffer tests"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.logbuffer import LogRecord, LogRingBuffer
+from app.models import LogLevel
+
+
+def _fill(buf: LogRingBuffer, n: int, task_id: int | None = None) -> None:
+    for i in range(n):
+        buf.append(f"t{i}", LogLevel.SYSTEM, f"m{i}", task_id)
+
+
+def test_empty():
+    buf = LogRingBuffer(4)
+    assert len(buf) == 0
+    assert buf.since() == []
+    assert buf.since(task_id=1) == []
+
+
+def test_since_before_wrap():
+    buf = LogRingBuffer(10)
+    _fill(buf, 5)
+    assert [r.index for r in buf.since()] == [0, 1, 2, 3, 4]
+    assert [r.index for r in buf.since(3)] == [3, 4]
+    assert buf.since(5) == []
+
+
+def test_since_after_wrap():
+    buf = LogRingBuffer(4)
+    _fill(buf, 10)
+    assert len(buf) == 4
+    assert buf.first_index == 6
+    assert buf.next_index == 10
+    # Evicted indices are clamped to the oldest retained record
+    assert [r.index for r in buf.since(0)] == [6, 7, 8, 9]
+    assert [r.index for r in buf.since(7)] == [7, 8, 9]
+    assert [r.message for r in buf.since(9)] == ["m9"]
+
+
+def test_task_view():
+    buf = LogRingBuffer(10)
+    buf.append("t", LogLevel.SYSTEM, "a", 1)
+    buf.append("t", LogLevel.SYSTEM, "b", 2)
+    buf.append("t", LogLevel.SYSTEM, "c", 1)
+    buf.append("t", LogLevel.SYSTEM, "global")
+    assert [r.message for r in buf.since(task_id=1)] == ["a", "c"]
+    assert [r.message for r in buf.since(1, task_id=1)] == ["c"]
+    assert [r.message for r in buf.since(task_id=2)] == ["b"]
+    assert buf.since(task_id=3) == []
+
+
+def test_task_view_trimmed_with_ring():
+    buf = LogRingBuffer(3)
+    buf.append("t", LogLevel.SYSTEM, "old", 7)
+    _fill(buf, 3)
+    assert buf.since(task_id=7) == []
+    buf.append("t", LogLevel.SYSTEM, "new", 7)
+    assert [r.message for r in buf.since(task_id=7)] == ["new"]
+
+
+def test_record_serialization():
+    rec = LogRecord(3, "2026-01-01T00:00:00+00:00", LogLevel.TOOL, "Tool: Read", 5)
+    entry = rec.to_entry()
+    assert entry.index == 3
+    assert entry.level == LogLevel.TOOL
+    assert json.loads(rec.to_json()) == json.loads(entry.model_dump_json())
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        LogRingBuffer(0)
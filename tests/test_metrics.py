@@ -0,0 +1,117 @@
+"""Prometheus metrics tests (text format, histogram buckets, DB/agent instrumentation)"""
+
+from __future__ import annotations
+
+import pytest
+
+from app import metrics
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.metrics import Registry
+from app.models import TaskCreate
+from bench.fake_claude import install
+
+
+# ── Registry ──
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    runs = registry.counter("runs_total", "Runs", ("outcome",))
+    open_streams = registry.gauge("streams", "Open streams")
+    runs.inc(outcome="done")
+    runs.inc(2, outcome="failed")
+    open_streams.inc()
+    open_streams.inc()
+    open_streams.dec()
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == [
+        "# HELP runs_total Runs",
+        "# TYPE runs_total counter",
+        'runs_total{outcome="done"} 1',
+        'runs_total{outcome="failed"} 2',
+    ]
+    assert lines[-1] == "streams 1"
+
+
+def test_histogram_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", ("path",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, path="/x")
+
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{path="/x",le="0.1"} 2',
+        'latency_seconds_bucket{path="/x",le="1"} 3',
+        'latency_seconds_bucket{path="/x",le="+Inf"} 4',
+        'latency_seconds_sum{path="/x"} 3.65',
+        'latency_seconds_count{path="/x"} 4',
+    ]
+
+
+def test_label_values_escaped_and_duplicates_rejected():
+    registry = Registry()
+    registry.counter("c_total", "C", ("cmd",)).inc(cmd='say "hi"\n')
+    assert 'c_total{cmd="say \\"hi\\"\\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        registry.gauge("c_total", "again")
+
+
+# ── Instrumentation ──
+
+
+async def test_database_statements_timed_by_verb_and_table(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    inserts = metrics.DB_QUERY.count(op="insert", table="tasks")
+    selects = metrics.DB_QUERY.count(op="select", table="tasks")
+
+    task = await db.create_task(TaskCreate(title="Timed"))
+
+    assert (await db.get_task(task.id)).title == "Timed"
+    assert metrics.DB_QUERY.count(op="insert", table="tasks") == inserts + 1
+    assert metrics.DB_QUERY.count(op="select", table="tasks") > selects
+    assert "create_task" in type(db).__dict__ and "create_task" not in vars(db)  # methods left as defined
+    await db.close()
+
+
+def test_statement_labels():
+    assert metrics._statement("SELECT id FROM tasks WHERE id = ?") == ("select", "tasks")
+    assert metrics._statement("  INSERT INTO logs (a) VALUES (?)") == ("insert", "logs")
+    assert metrics._statement("UPDATE epics SET title = ?") == ("update", "epics")
+    assert metrics._statement("DELETE FROM task_spans") == ("delete", "task_spans")
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("x", "help")
+
+
+async def test_agent_run_records_outcome_duration_and_cost(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(
+        target_project=str(tmp_path),
+        claude_command=install(tmp_path / "bin", events=2, event_rate=1000, cost=0.3),
+        auto_approve=True,
+    )
+    agent = AgentWorker(config, db)
+    done = metrics.TASKS_FINISHED.value(outcome="done")
+    durations = metrics.TASK_DURATION.count()
+    waits = metrics.TASK_QUEUE_WAIT.count()
+    costs = metrics.TASK_COST.sum()
+    cold = metrics.CLAUDE_FIRST_EVENT.count(start="cold")
+    task = await db.create_task(TaskCreate(title="Measured"))
+
+    await agent.run_task(task.id)
+
+    assert metrics.TASKS_FINISHED.value(outcome="done") == done + 1
+    assert metrics.TASK_DURATION.count() == durations + 1
+    assert metrics.TASK_QUEUE_WAIT.count() == waits + 1
+    assert metrics.TASK_COST.sum() == pytest.approx(costs + 0.3)
+    assert metrics.CLAUDE_FIRST_EVENT.count(start="cold") == cold + 1
+    await agent.launcher.close()
+    await db.close()
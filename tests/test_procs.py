@@ -0,0 +1,169 @@
+"""gh/git runner tests (TTL cache, in-flight sharing, spawn limit) against the offline fake CLI"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.models import LogLevel
+from app.procs import CommandRunner
+from bench.fake_cli import install, read_log
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def log_path(tmp_path) -> Path:
+    return tmp_path / "calls.jsonl"
+
+
+def _runner(tmp_path: Path, log_path: Path, rules: list[dict] | None = None, **kwargs) -> CommandRunner:
+    return CommandRunner(executables=install(tmp_path / "bin", rules or [], log_path), **kwargs)
+
+
+# ── Runner ──
+
+
+async def test_read_cached_within_ttl(tmp_path, log_path):
+    clock = FakeClock()
+    runner = _runner(tmp_path, log_path, [{"tool": "gh", "args": ["api"], "stdout": '{"data": {}}'}], clock=clock)
+
+    first = await runner.run("gh", "api", "graphql", cwd=str(tmp_path), ttl=30)
+    second = await runner.run("gh", "api", "graphql", cwd=str(tmp_path), ttl=30)
+    assert first == second
+    assert first.stdout == '{"data": {}}'
+    assert len(read_log(log_path)) == 1
+
+    clock.now += 31
+    await runner.run("gh", "api", "graphql", cwd=str(tmp_path), ttl=30)
+    assert len(read_log(log_path)) == 2
+    stat = runner.stats()["commands"][0]
+    assert (stat["name"], stat["spawned"], stat["cache_hits"]) == ("gh api", 2, 1)
+
+
+async def test_concurrent_identical_reads_share_one_process(tmp_path, log_path):
+    runner = _runner(tmp_path, log_path, [{"args": ["status"], "stdout": "clean", "delay": 0.2}])
+    results = await asyncio.gather(*(runner.run("git", "status", ttl=5) for _ in range(5)))
+    assert {r.stdout for r in results} == {"clean"}
+    assert len(read_log(log_path)) == 1
+
+
+async def test_mutation_drops_cached_reads_for_its_cwd(tmp_path, log_path):
+    runner = _runner(tmp_path, log_path)
+    repo, other = str(tmp_path / "bin"), str(tmp_path)
+    await runner.run("git", "diff", "--stat", cwd=repo, ttl=60)
+    await runner.run("git", "diff", "--stat", cwd=other, ttl=60)
+    await runner.run("git", "add", "-A", cwd=repo)
+    await runner.run("git", "diff", "--stat", cwd=repo, ttl=60)
+    await runner.run("git", "diff", "--stat", cwd=other, ttl=60)
+    assert [c["args"][0] for c in read_log(log_path)] == ["diff", "diff", "add", "diff"]
+
+
+async def test_failed_reads_not_cached(tmp_path, log_path):
+    runner = _runner(tmp_path, log_path, [{"args": ["pr", "view"], "returncode": 1, "stderr": "no pull request"}])
+    for _ in range(2):
+        result = await runner.run("gh", "pr", "view", ttl=60)
+        assert not result.ok
+        assert result.stderr == "no pull request"
+    assert len(read_log(log_path)) == 2
+    assert runner.stats()["commands"][0]["errors"] == 2
+
+
+async def test_spawns_bounded_and_batch_keeps_order(tmp_path, log_path):
+    runner = _runner(tmp_path, log_path, [{"args": ["log"], "delay": 0.1}], max_concurrency=2)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = await runner.run_many([("git", "log", f"-{i}") for i in range(4)])
+    assert loop.time() - started >= 0.2  # 4 calls, 2 at a time
+    assert [r.ok for r in results] == [True] * 4
+    assert sorted(c["args"][1] for c in read_log(log_path)) == ["-0", "-1", "-2", "-3"]
+
+
+async def test_missing_executable(tmp_path):
+    runner = CommandRunner(executables={"gh": str(tmp_path / "missing-gh")})
+    result = await runner.run("gh", "pr", "list")
+    assert result.returncode == 127
+    assert "not found" in result.stderr
+
+
+# ── Agent Integration ──
+
+
+async def test_gitflow_helpers_use_runner(tmp_path, log_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(target_project=str(tmp_path), gitflow=True, base_branch="main")
+    agent = AgentWorker(config, db)
+    pr_url = "https://github.com/acme/api/pull/7"
+    agent.procs.executables = install(tmp_path / "bin", [
+        {"tool": "gh", "args": ["pr", "create"], "stdout": f"Creating pull request\n{pr_url}"},
+        {"tool": "git", "args": ["push"], "returncode": 1, "stdout": "fatal: no upstream"},
+    ], log_path)
+
+    branch = await agent._create_branch(3, "Add cache")
+    assert branch == "feat/task-3-add-cache"
+    assert await agent._create_pr(3, "Add cache", branch) == pr_url
+    assert await agent._merge_pr(pr_url, 3)
+    await agent._git("push", "-u", "origin", branch, task_id=3)
+
+    calls = [(c["tool"], *c["args"][:2]) for c in read_log(log_path)]
+    assert calls == [
+        ("git", "fetch", "origin"),
+        ("git", "switch", "-c"),
+        ("gh", "pr", "create"),
+        ("gh", "pr", "merge"),
+        ("git", "push", "-u"),
+    ]
+    assert read_log(log_path)[1]["args"] == ["switch", "-c", branch, "origin/main"]
+    assert all(c["cwd"] == str(tmp_path) for c in read_log(log_path))
+    errors = [log.message for log in agent.get_logs() if log.level == LogLevel.ERROR]
+    assert errors == ["git push failed: fatal: no upstream"]
+    await db.close()
+
+
+def _count(log_path: Path, verb: str) -> int:
+    return sum(c["args"][0] == verb for c in read_log(log_path))
+
+
+async def _gitflow_agent(tmp_path: Path, log_path: Path, rules: list[dict]) -> AgentWorker:
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    agent = AgentWorker(AppConfig(target_project=str(tmp_path), gitflow=True, git_fetch_interval_sec=60), db)
+    agent.procs.executables = install(tmp_path / "bin", rules, log_path)
+    return agent
+
+
+async def test_branches_share_one_fetch_until_merge(tmp_path, log_path):
+    agent = await _gitflow_agent(tmp_path, log_path, [])
+    await asyncio.gather(*(agent._create_branch(i, f"Task {i}") for i in range(3)))
+    assert _count(log_path, "fetch") == 1
+    assert _count(log_path, "switch") == 3
+
+    await agent._merge_pr("https://github.com/acme/api/pull/1", 0)
+    await agent._create_branch(4, "After merge")
+    assert _count(log_path, "fetch") == 2
+    assert _count(log_path, "checkout") == 0
+    await agent.db.close()
+
+
+async def test_branch_from_local_base_without_remote(tmp_path, log_path):
+    agent = await _gitflow_agent(tmp_path, log_path, [{"args": ["fetch"], "returncode": 128, "stdout": "no origin"}])
+    branch = await agent._create_branch(1, "Offline")
+    await agent._cleanup_branch(branch, 1)
+    assert [c["args"] for c in read_log(log_path)][1:] == [
+        ["switch", "-c", "feat/task-1-offline", "main"],
+        ["switch", "--discard-changes", "--detach", "main"],
+        ["branch", "-D", "feat/task-1-offline"],
+    ]
+    await agent.db.close()
@@ -0,0 +1,104 @@
+"""Sampling profiler + event-loop lag monitor tests"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+
+from app import profiler
+from app.database import Database
+from app.profiler import LoopLagMonitor, ProfileBusy, collapsed, profile, sample
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+# ── Sampler ──
+
+
+def test_sample_collapses_thread_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,))
+    worker.start()
+    try:
+        counts = sample({worker.ident: "worker"}, 0.1, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sum(counts.values()) >= 5
+    stack = max(counts, key=counts.get)
+    assert stack.startswith("worker;")
+    assert "_spin (tests/test_profiler.py:" in stack
+
+
+def test_collapsed_format():
+    assert collapsed({"a;b": 3, "a": 1}) == "a 1\na;b 3\n"
+
+
+async def test_profile_covers_loop_and_aiosqlite_threads(tmp_path):
+    db = Database(str(tmp_path / "test.db"), read_pool_size=1)
+    await db.init()
+
+    async def busy_loop():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            time.sleep(0.002)
+            await asyncio.sleep(0)
+
+    stacks, _ = await asyncio.gather(profile(0.2, 0.005), busy_loop())
+
+    roots = {line.split(";", 1)[0] for line in stacks.splitlines()}
+    assert {"event-loop", "aiosqlite-1", "aiosqlite-2"} <= roots
+    assert "busy_loop (tests/test_profiler.py:" in stacks
+    await db.close()
+
+
+async def test_one_profile_at_a_time():
+    first = asyncio.create_task(profile(0.2))
+    await asyncio.sleep(0.05)
+    with pytest.raises(ProfileBusy):
+        await profile(0.1)
+    await first
+    assert not profiler._running
+
+
+# ── Loop lag ──
+
+
+async def test_lag_monitor_names_blocking_task(caplog):
+    monitor = LoopLagMonitor(0.05)
+    monitor.start()
+
+    async def blocker():
+        await asyncio.sleep(0.05)
+        time.sleep(0.25)
+
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.profiler"):
+            await asyncio.create_task(blocker(), name="slow-one")
+            await asyncio.sleep(0.1)
+    finally:
+        monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["stalls"] >= 1
+    stall = max(stats["recent"], key=lambda s: s["lag_ms"])
+    assert stall["lag_ms"] >= 150
+    assert (stall["task"], stall["coro"]) == ("slow-one", "test_lag_monitor_names_blocking_task.<locals>.blocker")
+    assert stall["frame"].startswith("blocker (tests/test_profiler.py:")
+    assert any("blocked" in r.message and "slow-one" in r.message for r in caplog.records)
+
+
+async def test_lag_monitor_quiet_when_loop_is_idle():
+    monitor = LoopLagMonitor(0.05)
+    monitor.start()
+    await asyncio.sleep(0.3)
+    monitor.stop()
+    assert monitor.stats()["stalls"] == 0
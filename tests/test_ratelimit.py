@@ -0,0 +1,139 @@
+"""Adaptive limiter / throttle detection tests"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import patch
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskCreate, TaskStatus
+from app.ratelimit import AdaptiveLimiter, Signal, Throttle, detect_throttle
+from tests.test_agent import _make_mock_process
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ── Detection ──
+
+
+def test_detect_rate_limit_result():
+    event = {"type": "result", "is_error": True, "result": "Claude AI usage limit reached|1767225600"}
+    throttle = detect_throttle(event)
+    assert throttle == Throttle(Signal.RATE_LIMITED, 1767225600.0)
+
+
+def test_detect_overload_error():
+    assert detect_throttle({"type": "error", "error": "API Error: 529 Overloaded"}).signal == Signal.OVERLOADED
+    assert detect_throttle("Error: 429 Too Many Requests").signal == Signal.RATE_LIMITED
+
+
+def test_detect_ignores_successful_result_and_other_events():
+    assert detect_throttle({"type": "result", "result": "Fixed the rate limit bug"}) is None
+    assert detect_throttle({"type": "assistant", "message": "rate limit"}) is None
+    assert detect_throttle({"type": "error", "error": "file not found"}) is None
+
+
+# ── AIMD ──
+
+
+def test_throttle_halves_limit_and_pauses():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(4, cooldown_sec=30, max_cooldown_sec=100, clock=clock)
+    assert limiter.throttle(Throttle(Signal.OVERLOADED)) == 30
+    assert limiter.current_limit == 2
+    assert limiter.paused_for() == 30
+    assert limiter.throttle(Throttle(Signal.OVERLOADED)) == 60  # cooldown doubles while signals repeat
+    assert limiter.current_limit == 1
+    limiter.throttle(Throttle(Signal.OVERLOADED))
+    assert limiter.throttle(Throttle(Signal.OVERLOADED)) == 100  # capped
+    assert limiter.current_limit == 1  # never below min_limit
+
+
+def test_reset_time_extends_pause():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(2, cooldown_sec=30, clock=clock)
+    limiter.throttle(Throttle(Signal.RATE_LIMITED, retry_at=clock.now + 3600))
+    assert limiter.paused_for() == 3600
+
+
+def test_successes_ramp_limit_back_up():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(4, cooldown_sec=30, clock=clock)
+    limiter.throttle(Throttle(Signal.OVERLOADED))
+    limiter.throttle(Throttle(Signal.OVERLOADED))
+    assert limiter.current_limit == 1
+    clock.now += 1000
+    for _ in range(8):
+        limiter.in_flight += 1
+        limiter.release()
+    assert limiter.current_limit == 4
+    assert limiter.stats()["next_cooldown_sec"] == 30
+
+
+async def test_acquire_waits_for_slot():
+    limiter = AdaptiveLimiter(1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    limiter.release()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert limiter.in_flight == 1
+
+
+async def test_acquire_waits_out_pause():
+    limiter = AdaptiveLimiter(2, cooldown_sec=0.05)
+    limiter.throttle(Throttle(Signal.OVERLOADED))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await limiter.acquire()
+    assert loop.time() - started >= 0.04
+
+
+async def test_slot_releases_on_cancel():
+    limiter = AdaptiveLimiter(1)
+
+    async def hold():
+        async with limiter.slot():
+            await asyncio.sleep(10)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0.01)
+    assert limiter.in_flight == 1
+    holder.cancel()
+    await asyncio.gather(holder, return_exceptions=True)
+    assert limiter.in_flight == 0
+    assert limiter.current_limit == 1
+
+
+# ── Agent Integration ──
+
+
+@patch("app.agent.asyncio.create_subprocess_exec")
+async def test_rate_limited_task_requeued_without_retry(mock_exec, tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(target_project=str(tmp_path), auto_approve=True, retry_backoff_sec=0)
+    agent = AgentWorker(config, db)
+    task = await db.create_task(TaskCreate(title="Busy API"))
+    stdout = [json.dumps({"type": "result", "is_error": True, "result": "API Error: 429 rate_limit_error"})]
+    mock_exec.return_value = _make_mock_process(stdout, returncode=1)
+
+    await agent.run_task(task.id)
+
+    t = await db.get_task(task.id)
+    assert t.status == TaskStatus.PENDING
+    assert t.retry_count == 0
+    assert mock_exec.call_count == 1
+    assert agent.get_limiter()["paused_for_sec"] > 0
+    assert agent.get_limiter()["throttles"] == 1
+    await db.close()
@@ -0,0 +1,185 @@
+"""Review collector tests (batched GraphQL polling, persisted queue)"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.database import Database
+from app.models import EpicCreate, ReviewWatch, TaskCreate
+from app.reviews import ReviewCollector, actionable_comments, build_review_query
+
+
+@pytest.fixture
+async def db(tmp_path):
+    d = Database(str(tmp_path / "test.db"))
+    await d.init()
+    yield d
+    await d.close()
+
+
+def _pr(*reviews: dict) -> dict:
+    return {"reviews": {"nodes": list(reviews)}}
+
+
+def _review(body: str = "", *inline: tuple[str, str]) -> dict:
+    return {
+        "author": {"login": "coderabbitai"},
+        "body": body,
+        "comments": {"nodes": [{"author": {"login": "coderabbitai"}, "path": p, "body": b} for p, b in inline]},
+    }
+
+
+class FakeGh:
+    """Stands in for `gh api graphql`: answers every aliased PR from a url → pr-node map."""
+
+    def __init__(self, prs: dict[str, dict | None]) -> None:
+        self.prs = prs
+        self.queries: list[str] = []
+
+    async def __call__(self, *args: str) -> tuple[int, str]:
+        query = args[-1].removeprefix("query=")
+        self.queries.append(query)
+        data: dict = {}
+        for url, pr in self.prs.items():
+            owner, name, _, number = url.split("/")[-4:]
+            repo = f'repository(owner: "{owner}", name: "{name}")'
+            if repo not in query or f"pr{number}:" not in query:
+                continue
+            alias = query.split(repo)[0].rsplit(" ", 2)[-2].rstrip(":")
+            data.setdefault(alias, {})[f"pr{number}"] = pr
+        return 0, json.dumps({"data": data})
+
+
+def _collector(db: Database, gh: FakeGh, **kwargs) -> ReviewCollector:
+    kwargs.setdefault("calls_per_min", 60_000)
+    collector = ReviewCollector(db, initial_wait_sec=0, **kwargs)
+    collector._gh = gh
+    return collector
+
+
+# ── Parsing ──
+
+
+def test_actionable_comments_filters_noise():
+    pr = _pr(
+        _review("📝 Walkthrough\nSummary of changes"),
+        _review("Actionable comments posted: 2", ("app/a.py", "Handle None here"), ("app/b.py", "<!-- tips_start -->")),
+        _review("Actionable comments posted: 0"),
+    )
+    assert actionable_comments(pr) == [
+        "[coderabbitai on app/a.py]: Handle None here",
+        "[coderabbitai review]: Actionable comments posted: 2",
+    ]
+    assert actionable_comments({"reviews": None}) == []
+
+
+def test_query_batches_prs_by_repo():
+    now = "2026-01-01T00:00:00+00:00"
+    watches = [
+        ReviewWatch(i, url, i, "t", now, now, False, now)
+        for i, url in enumerate([
+            "https://github.com/acme/api/pull/3",
+            "https://github.com/acme/web/pull/7",
+            "https://github.com/acme/api/pull/4",
+            "not a pr url",
+        ])
+    ]
+    query, aliases = build_review_query(watches)
+    assert query.count("repository(") == 2
+    assert query.count("pullRequest(") == 3
+    assert aliases == {("r0", "pr3"): 0, ("r0", "pr4"): 2, ("r1", "pr7"): 1}
+
+
+# ── Collection ──
+
+
+async def test_comments_settle_then_create_task(db: Database):
+    epic = await db.create_epic(EpicCreate(title="E"))
+    task = await db.create_task(TaskCreate(title="Add cache", epic_id=epic.id))
+    url = "https://github.com/acme/api/pull/12"
+    gh = FakeGh({url: _pr(_review("", ("app/cache.py", "Evict on write")))})
+    collector = _collector(db, gh, settle_sec=30)
+
+    assert await collector.watch(url, task.id, "Add cache")
+    assert not await collector.watch(url, task.id, "Add cache")  # deduped
+    await collector.stop()
+
+    now = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert await collector.tick(now) == 1  # comments seen → settling
+    assert await collector.tick(now) == 0  # not due again until settle_sec
+    gh.prs[url] = _pr(_review("", ("app/cache.py", "Evict on write"), ("app/cache.py", "Add a TTL")))
+    assert await collector.tick(now + timedelta(seconds=31)) == 1
+
+    followups = [t for t in await db.list_tasks() if t.title == "[Review] Add cache"]
+    assert len(followups) == 1
+    assert followups[0].epic_id == epic.id
+    assert "Add a TTL" in followups[0].description
+    assert followups[0].labels == ["review"]
+    assert await db.count_review_watches() == 0
+
+
+async def test_one_gh_call_per_batch(db: Database):
+    urls = [f"https://github.com/acme/{repo}/pull/{n}" for repo in ("api", "web") for n in range(1, 6)]
+    gh = FakeGh({url: _pr() for url in urls})
+    collector = _collector(db, gh, batch_size=4)
+    for i, url in enumerate(urls):
+        await db.add_review_watch(url, i, "t", "2000-01-01T00:00:00+00:00", "2999-01-01T00:00:00+00:00")
+
+    now = datetime.now(timezone.utc)
+    assert [await collector.tick(now) for _ in range(4)] == [4, 4, 2, 0]
+    assert len(gh.queries) == 3
+    assert await db.count_review_watches() == 10  # no comments yet, still watched
+
+
+async def test_watch_expires_without_comments(db: Database):
+    url = "https://github.com/acme/api/pull/5"
+    gh = FakeGh({url: _pr(_review("Actionable comments posted: 0"))})
+    collector = _collector(db, gh, max_wait_sec=60, poll_interval_sec=30)
+    await collector.watch(url, 1, "Quiet PR")
+    await collector.stop()
+
+    start = datetime.now(timezone.utc) + timedelta(seconds=1)
+    assert await collector.tick(start) == 1
+    assert await db.count_review_watches() == 1
+    assert await collector.tick(start + timedelta(seconds=61)) == 1
+    assert await db.count_review_watches() == 0
+    assert await db.list_tasks() == []
+
+
+async def test_failed_fetch_keeps_watch(db: Database):
+    url = "https://github.com/acme/api/pull/9"
+    collector = _collector(db, FakeGh({url: None}))
+    await collector.watch(url, 1, "Gone")
+    await collector.stop()
+    assert await collector.tick(datetime.now(timezone.utc) + timedelta(seconds=1)) == 1
+    assert await db.count_review_watches() == 1
+
+
+async def test_queue_survives_restart(db: Database):
+    url = "https://github.com/acme/api/pull/21"
+    first = _collector(db, FakeGh({}))
+    await first.watch(url, 1, "Before restart")
+    await first.stop()
+
+    gh = FakeGh({url: _pr(_review("", ("x.py", "Rename")))})
+    second = _collector(db, gh, settle_sec=0)
+    second.start()
+    for _ in range(100):
+        if await db.count_review_watches() == 0:
+            break
+        await asyncio.sleep(0.02)
+    await second.stop()
+    assert [t.title for t in await db.list_tasks()] == ["[Review] Before restart"]
+
+
+async def test_gh_calls_spaced_by_rate(db: Database):
+    collector = ReviewCollector(db, calls_per_min=1200)  # one call per 50ms
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(3):
+        await collector._throttle()
+    assert loop.time() - start >= 0.09
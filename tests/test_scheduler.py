@@ -0,0 +1,125 @@
+"""Scheduler policy tests (simulated load + DB claims)"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskCreate, TaskPriority, TaskStatus
+from app.scheduler import AgingScheduler, FairScheduler, Scheduler, create_scheduler
+from bench.scheduler_sim import _T0, flood, make_task, overload, simulate
+
+
+@pytest.fixture
+async def db(tmp_path):
+    d = Database(str(tmp_path / "test.db"))
+    await d.init()
+    yield d
+    await d.close()
+
+
+def _max_wait(result, ids) -> float:
+    return max(result.waits[i] for i in ids)
+
+
+# ── Simulation ──
+
+
+def test_aging_bounds_low_priority_wait():
+    tasks = overload()
+    low = [t.id for t in tasks if t.priority == TaskPriority.LOW]
+    strict = simulate(Scheduler(), tasks)
+    aging = simulate(AgingScheduler(aging_sec=600), tasks)
+
+    # Strict priority: review tasks only run once the high-priority stream ends
+    assert _max_wait(strict, low) >= 10_000
+    assert _max_wait(aging, low) <= 2_400
+    # Reordering is work-conserving: same tasks, same makespan
+    assert sorted(strict.order) == sorted(aging.order)
+    assert strict.throughput_per_hour == aging.throughput_per_hour == 60.0
+
+
+def test_fair_isolates_trickle_epic_from_flood():
+    tasks = flood()
+    trickle = [t.id for t in tasks if t.epic_id == 2]
+    fifo = simulate(Scheduler(), tasks)
+    fair = simulate(FairScheduler(), tasks)
+
+    assert _max_wait(fifo, trickle) >= 10_000
+    assert _max_wait(fair, trickle) <= 60
+    assert fair.makespan_sec == fifo.makespan_sec
+
+
+def test_fair_shares_follow_weights():
+    tasks = [make_task(i, 0, epic_id=1) for i in range(400)]
+    tasks += [make_task(1000 + i, 0, epic_id=2) for i in range(400)]
+    result = simulate(FairScheduler(weights={"1": 3, "2": 1}), tasks)
+
+    first = result.order[:200]
+    assert sum(1 for i in first if i < 1000) == 150
+
+
+def test_fair_by_target():
+    sched = FairScheduler(key="target")
+    tasks = [make_task(i, 0, target="/repo/a") for i in range(5)] + [make_task(10, 1, target="/repo/b")]
+    result = simulate(sched, tasks)
+    assert result.order[:2] == [0, 10]
+
+
+def test_deadline_runs_first():
+    sched = AgingScheduler(deadline_slack_sec=600)
+    now = _T0 + timedelta(seconds=60)
+    urgent = make_task(1, 0, TaskPriority.URGENT)
+    due = make_task(2, 0, TaskPriority.LOW, deadline_sec=300)
+    later = make_task(3, 0, TaskPriority.LOW, deadline_sec=3600)
+    assert sched.select([urgent, later, due], now) is due
+    assert sched.select([urgent, later], now) is urgent
+
+
+def test_create_scheduler_from_config():
+    assert type(create_scheduler(AppConfig())) is Scheduler
+    assert isinstance(create_scheduler(AppConfig(scheduler="aging")), AgingScheduler)
+    fair = create_scheduler(AppConfig(scheduler="fair", scheduler_fair_key="target", scheduler_weights={"/a": 2}))
+    assert isinstance(fair, FairScheduler)
+    assert fair.key == "target"
+    assert fair.weights == {"/a": 2}
+
+
+# ── DB Claims ──
+
+
+async def test_strict_claim_prefers_due_task(db: Database):
+    await db.create_task(TaskCreate(title="Urgent", priority=TaskPriority.URGENT))
+    soon = (datetime.now(timezone.utc) + timedelta(minutes=5)).isoformat()
+    far = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    await db.create_task(TaskCreate(title="Later", priority=TaskPriority.LOW, deadline=far))
+    due = await db.create_task(TaskCreate(title="Due", priority=TaskPriority.LOW, deadline=soon))
+
+    sched = Scheduler(deadline_slack_sec=600)
+    first = await sched.claim(db)
+    assert first.id == due.id
+    assert first.status == TaskStatus.IN_PROGRESS
+    assert (await sched.claim(db)).title == "Urgent"
+    assert (await sched.claim(db)).title == "Later"
+    assert await sched.claim(db) is None
+
+
+async def test_aging_claim_through_db(db: Database):
+    low = await db.create_task(TaskCreate(title="Old low", priority=TaskPriority.LOW))
+    await db.create_task(TaskCreate(title="New high", priority=TaskPriority.HIGH))
+    two_hours_ago = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    await db._execute("UPDATE tasks SET created_at = ? WHERE id = ?", (two_hours_ago, low.id))
+
+    # Waiting 2h at one level per 10 min lifts LOW (0) well past a fresh HIGH (2)
+    claimed = await AgingScheduler(aging_sec=600).claim(db)
+    assert claimed.id == low.id
+    assert (await db.get_task(low.id)).status == TaskStatus.IN_PROGRESS
+
+
+async def test_claim_task_only_pending(db: Database):
+    t = await db.create_task(TaskCreate(title="Once"))
+    assert (await db.claim_task(t.id)).status == TaskStatus.IN_PROGRESS
+    assert await db.claim_task(t.id) is None
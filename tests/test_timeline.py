@@ -0,0 +1,122 @@
+"""Task timeline tests (span recording, per-phase percentiles, agent phases against the fake claude CLI)"""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.agent import AgentWorker
+from app.config import AppConfig
+from app.database import Database
+from app.models import TaskCreate, TaskStatus
+from app.timeline import PHASE, TOOL, TaskTimeline, summarize, tool_detail
+from bench.fake_claude import install
+
+
+async def _agent(tmp_path, *, auto_approve: bool = True, **fake_options) -> AgentWorker:
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    config = AppConfig(
+        target_project=str(tmp_path),
+        claude_command=install(tmp_path / "bin", **fake_options),
+        auto_approve=auto_approve,
+        retry_backoff_sec=0,
+    )
+    return AgentWorker(config, db)
+
+
+# ── Recorder ──
+
+
+def test_phase_and_parallel_tools():
+    timeline = TaskTimeline(1)
+    with timeline.phase("prompt"):
+        pass
+    timeline.tool_started("Read", "app/main.py")
+    timeline.tool_started("Grep")
+    timeline.tools_finished()
+    timeline.tools_finished()  # nothing open: no-op
+
+    assert [(kind, name) for kind, name, *_ in timeline.spans] == [(PHASE, "prompt"), (TOOL, "Read"), (TOOL, "Grep")]
+    assert timeline.spans[1][4] == "app/main.py"
+    assert all(duration >= 0 for *_, duration, _ in timeline.spans)
+
+
+def test_tool_detail_prefers_command_then_path():
+    assert tool_detail({"command": "pytest -q", "description": "run tests"}) == "pytest -q"
+    assert tool_detail({"file_path": "README.md"}) == "README.md"
+    assert tool_detail({"todos": []}) == ""
+    assert tool_detail(None) == ""
+
+
+def test_summarize_percentiles_sorted_by_total():
+    # claude: 50 spans in (20, 50] ms and 50 in (50, 100] ms; rows as span_histogram returns them
+    rows = [(PHASE, "claude", 5, 50, 1750.0, 21.0, 50.0), (PHASE, "claude", 6, 50, 3750.0, 51.0, 100.0),
+            (PHASE, "branch", 2, 1, 5.0, 5.0, 5.0), (TOOL, "Bash", 5, 1, 40.0, 40.0, 40.0)]
+    stats = summarize(rows)
+
+    assert [e["name"] for e in stats[PHASE]] == ["claude", "branch"]
+    claude = stats[PHASE][0]
+    assert (claude["count"], claude["total_ms"], claude["p50_ms"], claude["p95_ms"], claude["max_ms"]) == (100, 5500.0, 50.0, 95.0, 100.0)
+    assert stats[TOOL] == [{"name": "Bash", "count": 1, "total_ms": 40.0, "p50_ms": 40.0, "p95_ms": 40.0, "max_ms": 40.0}]
+
+
+# ── Storage ──
+
+
+async def test_spans_grouped_by_attempt(tmp_path):
+    db = Database(str(tmp_path / "test.db"))
+    await db.init()
+    span = (PHASE, "claude", "2026-01-01T00:00:00+00:00", 1200.0, "")
+
+    assert await db.add_task_spans(7, [span]) == 1
+    assert await db.add_task_spans(7, [span]) == 2
+    assert await db.add_task_spans(7, [(PHASE, "approval_wait", "2026-01-01T00:01:00+00:00", 5.0, "")], new_attempt=False) == 2
+    assert await db.add_task_spans(8, [], new_attempt=False) == 1
+
+    spans = await db.get_task_spans(7)
+    assert [(s.attempt, s.name) for s in spans] == [(1, "claude"), (2, "claude"), (2, "approval_wait")]
+    assert await db.span_histogram("2026-01-01T00:00:30+00:00") == [(PHASE, "approval_wait", 2, 1, 5.0, 5.0, 5.0)]
+    assert sorted(await db.span_histogram("")) == [(PHASE, "approval_wait", 2, 1, 5.0, 5.0, 5.0), (PHASE, "claude", 10, 2, 2400.0, 1200.0, 1200.0)]
+    await db.close()
+
+
+# ── Agent ──
+
+
+async def test_agent_records_phases_and_tool_calls(tmp_path):
+    agent = await _agent(tmp_path, events=6, event_rate=1000, tool_ratio=1.0)
+    task = await agent.db.create_task(TaskCreate(title="Timed run"))
+
+    await agent.run_task(task.id)
+
+    spans = await agent.db.get_task_spans(task.id)
+    phases = [s.name for s in spans if s.kind == PHASE]
+    assert {"context", "prompt", "claude", "claude_start"} <= set(phases)
+    tools = [s for s in spans if s.kind == TOOL]
+    assert len(tools) == 6
+    assert {s.attempt for s in spans} == {1}
+    assert not agent._timelines
+    await agent.launcher.close()
+    await agent.db.close()
+
+
+async def test_retry_is_a_new_attempt_and_approval_wait_joins_it(tmp_path):
+    agent = await _agent(tmp_path, auto_approve=False, events=1, event_rate=1000)
+    task = await agent.db.create_task(TaskCreate(title="Reviewed"))
+
+    await agent.run_task(task.id)
+    await agent.db.retry_task(task.id)
+    await agent.run_task(task.id)
+    assert (await agent.db.get_task(task.id)).status == TaskStatus.WAITING_APPROVAL
+    assert await agent.approve(task.id)
+    for _ in range(50):
+        spans = await agent.db.get_task_spans(task.id)
+        if spans[-1].name == "approval_wait":
+            break
+        await asyncio.sleep(0.05)
+
+    assert spans[-1].name == "approval_wait"
+    assert spans[-1].attempt == 2
+    assert {s.attempt for s in spans} == {1, 2}
+    await agent.launcher.close()
+    await agent.db.close()